@@ -0,0 +1,87 @@
+-- Mart 6.0 — SLA cube (one scan of ${staging}.case_sla_metrics for every declared grain)
+-- Grains (GROUPING SETS):
+--   date       -> intake_date
+--   week       -> intake_week (Monday start)
+--   tier       -> tier
+--   case_type  -> case_type
+--   tier_case_type -> tier × case_type
+--   date_tier  -> intake_date × tier
+-- Columns not part of a row's grain are NULL. Per-grain marts (sla_daily, sla_by_tier_case_type)
+-- are thin views filtered on `grain`; new dashboard cuts should add a grouping set here.
+
+CREATE OR REPLACE TABLE ${mart}.sla_cube AS
+WITH base AS (
+  SELECT
+    intake_date,
+    CAST(date_trunc('week', intake_date) AS DATE) AS intake_week,
+    tier,
+    case_type,
+    first_touch_business_minutes,
+    first_resolution_business_minutes_including_cw,
+    first_resolution_business_minutes_paused_cw,
+    sla_b_breached,
+    sla_a_breached_including_cw,
+    sla_a_breached_paused_cw,
+    is_triage_missing_for_sla,
+    is_terminal_missing_for_sla
+  FROM ${staging}.case_sla_metrics
+),
+cube AS (
+  SELECT
+    GROUPING(intake_date, intake_week, tier, case_type) AS grouping_id,
+    intake_date,
+    intake_week,
+    tier,
+    case_type,
+
+    COUNT(*) AS cases,
+
+    -- SLA B evaluated when triage exists
+    SUM(CASE WHEN first_touch_business_minutes IS NOT NULL THEN 1 ELSE 0 END) AS cases_with_triage,
+    ROUND(100.0 * AVG(CASE WHEN first_touch_business_minutes IS NOT NULL AND sla_b_breached THEN 1 ELSE 0 END), 3) AS sla_b_breach_pct,
+
+    quantile_cont(first_touch_business_minutes, 0.50) AS ft_p50_min,
+    quantile_cont(first_touch_business_minutes, 0.90) AS ft_p90_min,
+    quantile_cont(first_touch_business_minutes, 0.95) AS ft_p95_min,
+
+    -- SLA A evaluated on resolved cases (terminal)
+    SUM(CASE WHEN first_resolution_business_minutes_including_cw IS NOT NULL THEN 1 ELSE 0 END) AS cases_resolved,
+
+    ROUND(100.0 * AVG(CASE WHEN first_resolution_business_minutes_including_cw IS NOT NULL AND sla_a_breached_including_cw THEN 1 ELSE 0 END), 3) AS sla_a_breach_pct_including_cw,
+    ROUND(100.0 * AVG(CASE WHEN first_resolution_business_minutes_paused_cw IS NOT NULL AND sla_a_breached_paused_cw THEN 1 ELSE 0 END), 3) AS sla_a_breach_pct_paused_cw,
+
+    quantile_cont(first_resolution_business_minutes_including_cw, 0.50) AS fr_p50_min_inc_cw,
+    quantile_cont(first_resolution_business_minutes_including_cw, 0.90) AS fr_p90_min_inc_cw,
+    quantile_cont(first_resolution_business_minutes_including_cw, 0.95) AS fr_p95_min_inc_cw,
+
+    quantile_cont(first_resolution_business_minutes_paused_cw, 0.50) AS fr_p50_min_pause_cw,
+    quantile_cont(first_resolution_business_minutes_paused_cw, 0.90) AS fr_p90_min_pause_cw,
+    quantile_cont(first_resolution_business_minutes_paused_cw, 0.95) AS fr_p95_min_pause_cw,
+
+    -- DQ rollups (monitoring)
+    ROUND(100.0 * AVG(CASE WHEN is_triage_missing_for_sla THEN 1 ELSE 0 END), 3) AS dq_triage_missing_pct,
+    ROUND(100.0 * AVG(CASE WHEN is_terminal_missing_for_sla THEN 1 ELSE 0 END), 3) AS dq_terminal_missing_pct
+
+  FROM base
+  GROUP BY GROUPING SETS (
+    (intake_date),
+    (intake_week),
+    (tier),
+    (case_type),
+    (tier, case_type),
+    (intake_date, tier)
+  )
+)
+SELECT
+  -- GROUPING bitmask order: intake_date, intake_week, tier, case_type (1 = rolled up)
+  CASE grouping_id
+    WHEN 7  THEN 'date'
+    WHEN 11 THEN 'week'
+    WHEN 13 THEN 'tier'
+    WHEN 14 THEN 'case_type'
+    WHEN 12 THEN 'tier_case_type'
+    WHEN 5  THEN 'date_tier'
+  END AS grain,
+  * EXCLUDE (grouping_id)
+FROM cube
+ORDER BY grain, intake_date, intake_week, tier, case_type;
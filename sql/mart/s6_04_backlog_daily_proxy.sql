@@ -3,23 +3,23 @@
 -- Backlog proxy:
 --   open_backlog_proxy = cumulative_intake - cumulative_terminal (resolved + cancelled)
 
-CREATE OR REPLACE TABLE mart.backlog_daily_proxy AS
+CREATE OR REPLACE TABLE ${mart}.backlog_daily_proxy AS
 WITH daily_intake AS (
   SELECT intake_date AS cal_date, COUNT(*) AS intake_cases
-  FROM raw.cases
+  FROM ${raw}.cases
   GROUP BY 1
 ),
 daily_terminal AS (
   SELECT
     CAST(COALESCE(resolved_ts, cancelled_ts) AS DATE) AS cal_date,
     COUNT(*) AS terminal_cases
-  FROM staging.case_milestones
+  FROM ${staging}.case_milestones
   WHERE resolved_ts IS NOT NULL OR cancelled_ts IS NOT NULL
   GROUP BY 1
 ),
 calendar AS (
   SELECT cal_date::DATE AS cal_date
-  FROM raw.calendar_dim
+  FROM ${raw}.calendar_dim
 )
 SELECT
   c.cal_date,
@@ -3,7 +3,7 @@
 -- Simple, interpretable congestion index:
 --   congestion_index = open_backlog_proxy / NULLIF(effective_agents_total, 0)
 
-CREATE OR REPLACE TABLE mart.congestion_daily AS
+CREATE OR REPLACE TABLE ${mart}.congestion_daily AS
 SELECT
   b.cal_date,
   s.team_tz,
@@ -12,7 +12,7 @@ SELECT
   b.open_backlog_proxy,
   s.effective_agents_total,
   ROUND(b.open_backlog_proxy::DOUBLE / NULLIF(s.effective_agents_total, 0), 4) AS congestion_index
-FROM mart.backlog_daily_proxy b
-LEFT JOIN mart.staffing_daily s
+FROM ${mart}.backlog_daily_proxy b
+LEFT JOIN ${mart}.staffing_daily s
   ON s.cal_date = b.cal_date
 ORDER BY 1;
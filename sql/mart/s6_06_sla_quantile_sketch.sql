@@ -0,0 +1,69 @@
+-- Mart 6.6 — Mergeable quantile sketches for SLA durations
+-- Grain: intake_date + tier + metric
+--
+-- Log-bucket sketch (DDSketch-style) so weekly / monthly / rolling views never re-scan case rows:
+-- - bucket_key = CEIL(LN(x) / LN(gamma)), gamma = (1 + alpha) / (1 - alpha)
+-- - any value in bucket k is within relative error alpha of 2 * gamma^k / (gamma + 1)
+-- - zero durations are counted separately (zero_count); log buckets only cover x > 0
+-- - sketches merge exactly by summing bucket counts (see src/sla_sketch.py)
+
+CREATE OR REPLACE TABLE ${mart}.sla_quantile_sketch AS
+WITH params AS (
+  SELECT 0.01 AS relative_accuracy
+),
+long AS (
+  -- UNPIVOT drops NULL values, so each metric only sketches cases where it is defined
+  UNPIVOT (
+    SELECT
+      intake_date,
+      tier,
+      first_touch_business_minutes,
+      first_resolution_business_minutes_including_cw,
+      first_resolution_business_minutes_paused_cw
+    FROM ${staging}.case_sla_metrics
+  )
+  ON first_touch_business_minutes,
+     first_resolution_business_minutes_including_cw,
+     first_resolution_business_minutes_paused_cw
+  INTO NAME metric VALUE metric_value
+),
+keyed AS (
+  SELECT
+    l.intake_date,
+    l.tier,
+    l.metric,
+    l.metric_value::DOUBLE AS metric_value,
+    CASE
+      WHEN l.metric_value > 0
+      THEN CAST(CEIL(LN(l.metric_value) / LN((1 + p.relative_accuracy) / (1 - p.relative_accuracy))) AS INTEGER)
+    END AS bucket_key
+  FROM long l
+  CROSS JOIN params p
+),
+buckets AS (
+  SELECT
+    intake_date,
+    tier,
+    metric,
+    bucket_key,
+    COUNT(*) AS bucket_count,
+    MIN(metric_value) AS min_value,
+    MAX(metric_value) AS max_value
+  FROM keyed
+  GROUP BY 1,2,3,4
+)
+SELECT
+  b.intake_date,
+  b.tier,
+  b.metric,
+  SUM(b.bucket_count) AS n,
+  COALESCE(SUM(b.bucket_count) FILTER (WHERE b.bucket_key IS NULL), 0) AS zero_count,
+  MIN(b.min_value) AS min_value,
+  MAX(b.max_value) AS max_value,
+  COALESCE(list(b.bucket_key ORDER BY b.bucket_key) FILTER (WHERE b.bucket_key IS NOT NULL), []) AS bucket_keys,
+  COALESCE(list(b.bucket_count ORDER BY b.bucket_key) FILTER (WHERE b.bucket_key IS NOT NULL), []) AS bucket_counts,
+  p.relative_accuracy
+FROM buckets b
+CROSS JOIN params p
+GROUP BY b.intake_date, b.tier, b.metric, p.relative_accuracy
+ORDER BY 1,2,3;
@@ -0,0 +1,118 @@
+-- Mart 6.7 — Hourly open backlog by tier and stage (event sweep line)
+-- Grain: (hour_ts, tier, stage); stage = 'ALL' is the tier total.
+-- Unlike backlog_daily_proxy this is intraday and reopen-aware:
+-- - a case opens at INTAKE and closes at RESOLVED / CANCELLED; REOPENED opens it again
+--   (a reopened case with no later terminal event stays open to the end of the data)
+-- - events landing after a close (e.g. tz-inconsistent REVIEW_QA after RESOLVED) do not reopen it
+-- - while open, the case sits in the stage of its latest event (INVESTIGATION, REVIEW_QA, ...)
+--
+-- Method (one sort per (tier, stage) stream, O(events log events)):
+-- 1. each event of an open case emits +1 at its ts and -1 at the next event's ts (LEAD)
+-- 2. deltas are summed per distinct ts, then a running SUM gives the level after every change point
+-- 3. per hour: open_at_hour_end = last level in the hour; peak_open_in_hour = max(level entering
+--    the hour, every level reached inside it). Hours without events carry the level forward.
+-- Timestamps use the same session-local TIMESTAMP cast as the business-minute spine.
+-- MATERIALIZED CTEs: the event pass and hourly rollup are referenced several times and would
+-- otherwise be re-evaluated per reference.
+
+CREATE OR REPLACE TABLE ${mart}.backlog_hourly AS
+WITH ev AS (
+  SELECT
+    case_id,
+    status,
+    CAST(event_ts_canonical AS TIMESTAMP) AS ts,
+    CAST(LEAD(event_ts_canonical) OVER w AS TIMESTAMP) AS next_ts,
+    -- lifecycle: latest open marker vs latest close marker at/before this event
+    -- (one shared window spec so all three share a single sort)
+    MAX(CASE WHEN status IN ('INTAKE', 'REOPENED') THEN event_ts_canonical END) OVER w AS last_open_ts,
+    MAX(CASE WHEN status IN ('RESOLVED', 'CANCELLED') THEN event_ts_canonical END) OVER w AS last_close_ts
+  FROM ${staging}.events_clean
+  WHERE event_ts_canonical IS NOT NULL
+  WINDOW w AS (PARTITION BY case_id ORDER BY event_ts_canonical, event_id)
+),
+open_intervals AS MATERIALIZED (
+  -- [ts, next_ts) spans during which the case is open, labelled with its current stage
+  SELECT c.tier, ev.status AS stage, ev.ts AS open_ts, ev.next_ts AS close_ts
+  FROM ev
+  JOIN ${raw}.cases c USING(case_id)
+  WHERE ev.last_open_ts IS NOT NULL
+    AND (ev.last_close_ts IS NULL OR ev.last_open_ts > ev.last_close_ts)
+    AND (ev.next_ts IS NULL OR ev.next_ts > ev.ts)
+),
+deltas AS (
+  SELECT tier, stage, open_ts AS ts, 1 AS d FROM open_intervals
+  UNION ALL
+  SELECT tier, stage, close_ts, -1 FROM open_intervals WHERE close_ts IS NOT NULL
+  UNION ALL
+  SELECT tier, 'ALL', open_ts, 1 FROM open_intervals
+  UNION ALL
+  SELECT tier, 'ALL', close_ts, -1 FROM open_intervals WHERE close_ts IS NOT NULL
+),
+change_points AS (
+  SELECT tier, stage, ts, SUM(d) AS d
+  FROM deltas
+  GROUP BY 1,2,3
+),
+levels AS (
+  SELECT
+    tier,
+    stage,
+    ts,
+    date_trunc('hour', ts) AS hour_ts,
+    SUM(d) OVER (PARTITION BY tier, stage ORDER BY ts ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS open_after
+  FROM change_points
+),
+hourly_points AS MATERIALIZED (
+  SELECT
+    tier,
+    stage,
+    hour_ts,
+    arg_max(open_after, ts) AS open_at_hour_end,
+    MAX(open_after) AS max_inside_hour,
+    COUNT(*) AS change_points
+  FROM levels
+  GROUP BY 1,2,3
+),
+hours AS (
+  SELECT UNNEST(range(MIN(hour_ts), MAX(hour_ts) + INTERVAL '1 hour', INTERVAL '1 hour')) AS hour_ts
+  FROM hourly_points
+),
+streams AS (
+  SELECT DISTINCT tier, stage FROM hourly_points
+),
+grid AS (
+  SELECT
+    s.tier,
+    s.stage,
+    h.hour_ts,
+    p.open_at_hour_end,
+    p.max_inside_hour,
+    COALESCE(p.change_points, 0) AS change_points,
+    -- level at the end of the latest hour with activity (carried through quiet hours)
+    COALESCE(
+      LAST_VALUE(p.open_at_hour_end IGNORE NULLS) OVER (
+        PARTITION BY s.tier, s.stage ORDER BY h.hour_ts
+        ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+      ), 0) AS open_carried
+  FROM streams s
+  CROSS JOIN hours h
+  LEFT JOIN hourly_points p
+    ON p.tier = s.tier AND p.stage = s.stage AND p.hour_ts = h.hour_ts
+),
+with_start AS (
+  SELECT
+    *,
+    COALESCE(LAG(open_carried) OVER (PARTITION BY tier, stage ORDER BY hour_ts), 0) AS open_at_hour_start
+  FROM grid
+)
+SELECT
+  hour_ts,
+  CAST(hour_ts AS DATE) AS cal_date,
+  tier,
+  stage,
+  CAST(open_at_hour_start AS BIGINT) AS open_at_hour_start,
+  CAST(open_carried AS BIGINT) AS open_at_hour_end,
+  CAST(GREATEST(open_at_hour_start, COALESCE(max_inside_hour, open_at_hour_start)) AS BIGINT) AS peak_open_in_hour,
+  change_points
+FROM with_start
+ORDER BY tier, stage, hour_ts;
@@ -3,13 +3,13 @@
 -- - Add flow-aligned index: intake_cases per effective agent
 -- - Add backlog change (delta) to represent accumulating work
 
-CREATE OR REPLACE TABLE mart.congestion_daily_v2 AS
+CREATE OR REPLACE TABLE ${mart}.congestion_daily_v2 AS
 WITH cal AS (
   SELECT
     cal_date,
     is_weekend,
     is_holiday
-  FROM raw.calendar_dim
+  FROM ${raw}.calendar_dim
 ),
 base AS (
   SELECT
@@ -19,8 +19,8 @@ base AS (
     b.terminal_cases,
     b.open_backlog_proxy,
     s.effective_agents_total
-  FROM mart.backlog_daily_proxy b
-  LEFT JOIN mart.staffing_daily s
+  FROM ${mart}.backlog_daily_proxy b
+  LEFT JOIN ${mart}.staffing_daily s
     ON s.cal_date = b.cal_date
   JOIN cal c
     ON c.cal_date = b.cal_date
@@ -1,8 +1,10 @@
 -- Step 7.2 (fixed v3) — Congestion exposure buckets vs breach rates
 -- Grain: decile + tier
--- Uses case-level avg congestion during intake->resolved window (cap 10 biz days).
+-- Uses case-level avg congestion during intake->resolved window (cap ${exposure_cap_biz_days} biz days).
+-- Deciles come from the shared bucketing stage (${staging}.case_driver_buckets), not a per-mart NTILE sort.
+-- Cases with no congestion exposure value are kept as congestion_decile NULL rather than folded into decile 10.
 
-CREATE OR REPLACE TABLE mart.driver_congestion_buckets AS
+CREATE OR REPLACE TABLE ${mart}.driver_congestion_buckets AS
 WITH base AS (
   SELECT
     s.case_id,
@@ -11,15 +13,11 @@ WITH base AS (
     s.sla_b_breached,
     s.sla_a_breached_including_cw,
     s.sla_a_breached_paused_cw,
-    e.avg_congestion_flow_index AS congestion_exposure
-  FROM staging.case_sla_metrics s
-  JOIN staging.case_congestion_exposure e USING(case_id)
-),
-bucketed AS (
-  SELECT
-    *,
-    NTILE(10) OVER (ORDER BY congestion_exposure) AS congestion_decile
-  FROM base
+    b.driver_value AS congestion_exposure,
+    b.bucket AS congestion_decile
+  FROM ${staging}.case_sla_metrics s
+  JOIN ${staging}.case_driver_buckets b USING(case_id)
+  WHERE b.driver = 'congestion_exposure'
 )
 SELECT
   congestion_decile,
@@ -29,6 +27,6 @@ SELECT
   ROUND(100.0 * AVG(CASE WHEN sla_a_breached_including_cw THEN 1 ELSE 0 END), 3) AS sla_a_breach_pct_inc_cw,
   ROUND(100.0 * AVG(CASE WHEN sla_a_breached_paused_cw THEN 1 ELSE 0 END), 3) AS sla_a_breach_pct_pause_cw,
   ROUND(AVG(congestion_exposure), 4) AS avg_congestion_exposure
-FROM bucketed
+FROM base
 GROUP BY 1,2
 ORDER BY 1,2;
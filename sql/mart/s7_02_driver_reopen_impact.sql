@@ -1,14 +1,14 @@
 -- Step 7.3 — Reopen impact on cycle time (business hours)
 -- Grain: tier + reopened_flag
 
-CREATE OR REPLACE TABLE mart.driver_reopen_impact AS
+CREATE OR REPLACE TABLE ${mart}.driver_reopen_impact AS
 WITH reopened AS (
   SELECT
     case_id,
     tier,
     case_type,
     CASE WHEN reopened_first_ts IS NOT NULL THEN TRUE ELSE FALSE END AS is_reopened
-  FROM staging.case_milestones
+  FROM ${staging}.case_milestones
 ),
 joined AS (
   SELECT
@@ -18,7 +18,7 @@ joined AS (
     s.first_resolution_business_hours_including_cw AS fr_hours_inc_cw,
     s.first_resolution_business_hours_paused_cw AS fr_hours_pause_cw
   FROM reopened r
-  JOIN staging.case_sla_metrics s USING(case_id)
+  JOIN ${staging}.case_sla_metrics s USING(case_id)
   WHERE s.resolved_ts IS NOT NULL
 )
 SELECT
@@ -1,7 +1,7 @@
 -- Step 7.4 — Stage bottleneck ranking (minutes)
 -- Grain: tier (p50/p90/p95 per stage)
 
-CREATE OR REPLACE TABLE mart.driver_stage_durations AS
+CREATE OR REPLACE TABLE ${mart}.driver_stage_durations AS
 SELECT
   tier,
 
@@ -29,7 +29,7 @@ SELECT
   quantile_cont(mins_intake_to_resolved, 0.90) AS p90_total,
   quantile_cont(mins_intake_to_resolved, 0.95) AS p95_total
 
-FROM staging.case_stage_durations
+FROM ${staging}.case_stage_durations
 WHERE mins_intake_to_resolved IS NOT NULL
 GROUP BY 1
 ORDER BY 1;
@@ -1,22 +1,17 @@
 -- Step 7.5 (final) — Headline driver summary
 -- Congestion exposure is expected to affect SLA B (first touch), not necessarily SLA A (first resolution).
+-- Deciles come from the shared bucketing stage; the picks are one conditional aggregation pass.
 
-CREATE OR REPLACE TABLE mart.driver_summary AS
+CREATE OR REPLACE TABLE ${mart}.driver_summary AS
 WITH base AS (
   SELECT
     s.case_id,
     s.sla_b_breached,
     s.sla_a_breached_including_cw,
-    e.avg_congestion_flow_index AS congestion_exposure
-  FROM staging.case_sla_metrics s
-  JOIN staging.case_congestion_exposure e USING(case_id)
-  WHERE e.avg_congestion_flow_index IS NOT NULL
-),
-bucketed AS (
-  SELECT
-    *,
-    NTILE(10) OVER (ORDER BY congestion_exposure) AS congestion_decile
-  FROM base
+    b.bucket AS congestion_decile
+  FROM ${staging}.case_sla_metrics s
+  JOIN ${staging}.case_driver_buckets b USING(case_id)
+  WHERE b.driver = 'congestion_exposure'
 ),
 decile_rates AS (
   SELECT
@@ -24,18 +19,19 @@ decile_rates AS (
     COUNT(*) AS cases,
     ROUND(100.0 * AVG(CASE WHEN sla_b_breached THEN 1 ELSE 0 END), 3) AS sla_b_breach_pct,
     ROUND(100.0 * AVG(CASE WHEN sla_a_breached_including_cw THEN 1 ELSE 0 END), 3) AS sla_a_breach_pct_inc_cw
-  FROM bucketed
+  FROM base
   GROUP BY 1
 ),
 pick AS (
   SELECT
-    (SELECT sla_b_breach_pct FROM decile_rates WHERE congestion_decile = 5) AS sla_b_breach_p50_cong,
-    (SELECT sla_b_breach_pct FROM decile_rates WHERE congestion_decile = 9) AS sla_b_breach_p90_cong,
-    (SELECT sla_b_breach_pct FROM decile_rates WHERE congestion_decile = 10) AS sla_b_breach_p95plus_cong,
+    MAX(sla_b_breach_pct) FILTER (WHERE congestion_decile = 5) AS sla_b_breach_p50_cong,
+    MAX(sla_b_breach_pct) FILTER (WHERE congestion_decile = 9) AS sla_b_breach_p90_cong,
+    MAX(sla_b_breach_pct) FILTER (WHERE congestion_decile = 10) AS sla_b_breach_p95plus_cong,
 
-    (SELECT sla_a_breach_pct_inc_cw FROM decile_rates WHERE congestion_decile = 5) AS sla_a_breach_p50_cong,
-    (SELECT sla_a_breach_pct_inc_cw FROM decile_rates WHERE congestion_decile = 9) AS sla_a_breach_p90_cong,
-    (SELECT sla_a_breach_pct_inc_cw FROM decile_rates WHERE congestion_decile = 10) AS sla_a_breach_p95plus_cong
+    MAX(sla_a_breach_pct_inc_cw) FILTER (WHERE congestion_decile = 5) AS sla_a_breach_p50_cong,
+    MAX(sla_a_breach_pct_inc_cw) FILTER (WHERE congestion_decile = 9) AS sla_a_breach_p90_cong,
+    MAX(sla_a_breach_pct_inc_cw) FILTER (WHERE congestion_decile = 10) AS sla_a_breach_p95plus_cong
+  FROM decile_rates
 )
 SELECT
   sla_b_breach_p50_cong,
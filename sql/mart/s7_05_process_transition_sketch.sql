@@ -0,0 +1,62 @@
+-- Mart 7.5 — Directly-follows graph, day grain: transition counts and duration sketches per edge
+-- Grain: intake_date + tier + (prev_status, status)
+--
+-- Same log-bucket sketch as s6_06 (bucket_key = CEIL(LN(x) / LN(gamma)), zero durations counted
+-- in zero_count), so day cells merge exactly by summing bucket counts. The (start) edge has no
+-- duration: transitions counts every edge, timed_transitions only those with business_minutes.
+-- src/process_mining.py replaces the rows of recent intake dates for incremental refreshes.
+
+CREATE OR REPLACE TABLE ${mart}.process_transition_sketch AS
+WITH params AS (
+  SELECT 0.01 AS relative_accuracy
+),
+keyed AS (
+  SELECT
+    e.intake_date,
+    e.tier,
+    COALESCE(e.prev_status, '(start)') AS prev_status,
+    e.status,
+    e.is_allowed,
+    e.business_minutes::DOUBLE AS business_minutes,
+    CASE
+      WHEN e.business_minutes > 0
+      THEN CAST(CEIL(LN(e.business_minutes) / LN((1 + p.relative_accuracy) / (1 - p.relative_accuracy))) AS INTEGER)
+    END AS bucket_key
+  FROM ${staging}.process_events e
+  CROSS JOIN params p
+),
+buckets AS (
+  SELECT
+    intake_date,
+    tier,
+    prev_status,
+    status,
+    is_allowed,
+    bucket_key,
+    COUNT(*) AS bucket_count,
+    COUNT(business_minutes) AS timed_count,
+    SUM(business_minutes) AS sum_business_minutes,
+    MIN(business_minutes) AS min_value,
+    MAX(business_minutes) AS max_value
+  FROM keyed
+  GROUP BY 1,2,3,4,5,6
+)
+SELECT
+  b.intake_date,
+  b.tier,
+  b.prev_status,
+  b.status,
+  b.is_allowed,
+  SUM(b.bucket_count) AS transitions,
+  SUM(b.timed_count) AS timed_transitions,
+  COALESCE(SUM(b.timed_count) FILTER (WHERE b.bucket_key IS NULL), 0) AS zero_count,
+  COALESCE(SUM(b.sum_business_minutes), 0) AS sum_business_minutes,
+  MIN(b.min_value) AS min_value,
+  MAX(b.max_value) AS max_value,
+  COALESCE(list(b.bucket_key ORDER BY b.bucket_key) FILTER (WHERE b.bucket_key IS NOT NULL), []) AS bucket_keys,
+  COALESCE(list(b.bucket_count ORDER BY b.bucket_key) FILTER (WHERE b.bucket_key IS NOT NULL), []) AS bucket_counts,
+  p.relative_accuracy
+FROM buckets b
+CROSS JOIN params p
+GROUP BY b.intake_date, b.tier, b.prev_status, b.status, b.is_allowed, p.relative_accuracy
+ORDER BY 1,2,3,4;
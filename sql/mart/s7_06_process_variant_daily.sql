@@ -0,0 +1,33 @@
+-- Mart 7.6 — Process variants, day grain: how many cases followed each exact status path
+-- Grain: intake_date + tier + variant
+--
+-- variant: the case's statuses in transition order, joined with ' > '. is_valid_path is TRUE when
+-- every transition on the path is in the allowed matrix (it depends on the path only).
+-- Counts and sums only, so day cells merge by addition.
+-- src/process_mining.py replaces the rows of recent intake dates for incremental refreshes.
+
+CREATE OR REPLACE TABLE ${mart}.process_variant_daily AS
+WITH paths AS (
+  SELECT
+    case_id,
+    ANY_VALUE(intake_date) AS intake_date,
+    ANY_VALUE(tier) AS tier,
+    string_agg(status, ' > ' ORDER BY transition_seq) AS variant,
+    COUNT(*) AS steps,
+    BOOL_AND(is_allowed) AS is_valid_path,
+    SUM(business_minutes) AS path_business_minutes
+  FROM ${staging}.process_events
+  GROUP BY case_id
+)
+SELECT
+  intake_date,
+  tier,
+  variant,
+  ANY_VALUE(steps) AS steps,
+  ANY_VALUE(is_valid_path) AS is_valid_path,
+  COUNT(*) AS cases,
+  COUNT(path_business_minutes) AS timed_cases,
+  COALESCE(SUM(path_business_minutes), 0) AS sum_path_business_minutes
+FROM paths
+GROUP BY intake_date, tier, variant
+ORDER BY 1,2,6 DESC;
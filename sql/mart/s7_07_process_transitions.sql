@@ -0,0 +1,112 @@
+-- Mart 7.7 — Directly-follows graph for the dashboard (merged from process_transition_sketch)
+-- Grain: tier (plus 'ALL') + (prev_status, status)
+--
+-- Day sketches are merged by summing bucket counts. Quantiles use the rank convention of
+-- quantile_disc (the ceil(q * n)-th smallest duration, zero_count first), not the q * (n - 1)
+-- rank of MergedSketch.quantile in src/sla_sketch.py, so they estimate the same order statistic
+-- as an exact quantile_disc over staging.process_events. The estimate is the bucket
+-- representative 2 * gamma^k / (gamma + 1) clamped to the observed range, within
+-- relative_accuracy of that order statistic before the 2-decimal rounding below (zero
+-- durations are exact).
+
+CREATE OR REPLACE TABLE ${mart}.process_transitions AS
+WITH quantile_levels(q) AS (
+  VALUES (0.50), (0.90), (0.95)
+),
+cells AS (
+  SELECT
+    COALESCE(tier, 'ALL') AS tier,
+    prev_status,
+    status,
+    BOOL_AND(is_allowed) AS is_allowed,
+    SUM(transitions) AS transitions,
+    SUM(timed_transitions) AS timed_transitions,
+    SUM(zero_count) AS zero_count,
+    SUM(sum_business_minutes) AS sum_business_minutes,
+    MIN(min_value) AS min_value,
+    MAX(max_value) AS max_value,
+    MAX(relative_accuracy) AS relative_accuracy
+  FROM ${mart}.process_transition_sketch
+  GROUP BY GROUPING SETS ((tier, prev_status, status), (prev_status, status))
+),
+buckets AS (
+  SELECT
+    COALESCE(tier, 'ALL') AS tier,
+    prev_status,
+    status,
+    bucket_key,
+    SUM(bucket_count) AS bucket_count
+  FROM (
+    SELECT tier, prev_status, status, UNNEST(bucket_keys) AS bucket_key, UNNEST(bucket_counts) AS bucket_count
+    FROM ${mart}.process_transition_sketch
+  ) u
+  GROUP BY GROUPING SETS ((tier, prev_status, status, bucket_key), (prev_status, status, bucket_key))
+),
+cumulative AS (
+  SELECT
+    tier,
+    prev_status,
+    status,
+    bucket_key,
+    SUM(bucket_count) OVER (PARTITION BY tier, prev_status, status ORDER BY bucket_key) AS cum_count
+  FROM buckets
+),
+-- first bucket whose cumulative count (after the zeros) reaches the rank ceil(q * n)
+picked AS (
+  SELECT
+    c.tier,
+    c.prev_status,
+    c.status,
+    ql.q,
+    MIN(b.bucket_key) AS bucket_key
+  FROM cells c
+  CROSS JOIN quantile_levels ql
+  LEFT JOIN cumulative b
+    ON b.tier = c.tier
+   AND b.prev_status = c.prev_status
+   AND b.status = c.status
+   AND c.zero_count + b.cum_count >= ql.q * c.timed_transitions
+  GROUP BY 1,2,3,4
+),
+quantiles AS (
+  SELECT
+    c.tier,
+    c.prev_status,
+    c.status,
+    p.q,
+    CASE
+      WHEN c.timed_transitions = 0 THEN NULL
+      WHEN p.q * c.timed_transitions <= c.zero_count THEN 0.0
+      WHEN p.bucket_key IS NULL THEN c.max_value
+      ELSE LEAST(GREATEST(
+        2 * pow((1 + c.relative_accuracy) / (1 - c.relative_accuracy), p.bucket_key)
+          / ((1 + c.relative_accuracy) / (1 - c.relative_accuracy) + 1),
+        c.min_value), c.max_value)
+    END AS business_minutes
+  FROM picked p
+  JOIN cells c
+    ON c.tier = p.tier
+   AND c.prev_status = p.prev_status
+   AND c.status = p.status
+)
+SELECT
+  c.tier,
+  c.prev_status,
+  c.status,
+  c.is_allowed,
+  c.transitions,
+  ROUND(100.0 * c.transitions / SUM(c.transitions) OVER (PARTITION BY c.tier, c.prev_status), 4) AS pct_of_transitions_from_prev,
+  c.timed_transitions,
+  ROUND(c.sum_business_minutes / NULLIF(c.timed_transitions, 0), 2) AS mean_business_minutes,
+  ROUND(MAX(q.business_minutes) FILTER (WHERE q.q = 0.50), 2) AS p50_business_minutes,
+  ROUND(MAX(q.business_minutes) FILTER (WHERE q.q = 0.90), 2) AS p90_business_minutes,
+  ROUND(MAX(q.business_minutes) FILTER (WHERE q.q = 0.95), 2) AS p95_business_minutes,
+  c.relative_accuracy
+FROM cells c
+JOIN quantiles q
+  ON q.tier = c.tier
+ AND q.prev_status = c.prev_status
+ AND q.status = c.status
+GROUP BY c.tier, c.prev_status, c.status, c.is_allowed, c.transitions, c.timed_transitions,
+         c.sum_business_minutes, c.relative_accuracy
+ORDER BY c.tier, c.transitions DESC;
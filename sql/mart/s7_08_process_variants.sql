@@ -0,0 +1,37 @@
+-- Mart 7.8 — Process variant frequencies for the dashboard (merged from process_variant_daily)
+-- Grain: tier (plus 'ALL') + variant
+-- variant_rank 1 is the most frequent path; cumulative_pct_of_cases is the share of the tier's
+-- cases covered by this and every more frequent variant.
+
+CREATE OR REPLACE TABLE ${mart}.process_variants AS
+WITH merged AS (
+  SELECT
+    COALESCE(tier, 'ALL') AS tier,
+    variant,
+    ANY_VALUE(steps) AS steps,
+    ANY_VALUE(is_valid_path) AS is_valid_path,
+    SUM(cases) AS cases,
+    SUM(timed_cases) AS timed_cases,
+    SUM(sum_path_business_minutes) AS sum_path_business_minutes
+  FROM ${mart}.process_variant_daily
+  GROUP BY GROUPING SETS ((tier, variant), (variant))
+),
+ranked AS (
+  SELECT
+    *,
+    ROW_NUMBER() OVER (PARTITION BY tier ORDER BY cases DESC, variant) AS variant_rank,
+    SUM(cases) OVER (PARTITION BY tier) AS tier_cases
+  FROM merged
+)
+SELECT
+  tier,
+  variant_rank,
+  variant,
+  steps,
+  is_valid_path,
+  cases,
+  ROUND(100.0 * cases / tier_cases, 4) AS pct_of_cases,
+  ROUND(100.0 * SUM(cases) OVER (PARTITION BY tier ORDER BY variant_rank) / tier_cases, 4) AS cumulative_pct_of_cases,
+  ROUND(sum_path_business_minutes / NULLIF(timed_cases, 0), 2) AS mean_path_business_minutes
+FROM ranked
+ORDER BY tier, variant_rank;
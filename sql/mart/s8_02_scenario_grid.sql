@@ -0,0 +1,119 @@
+-- Step 8.3 — Scenario grid (declarative what-if levers, evaluated in one pass)
+-- Output: ${mart}.scenario_grid (one row per stage lever × reopen level)
+--
+-- Grid axes (edit the VALUES lists; 'ALL' is a wildcard):
+--   stage            -> any stage_name in ${staging}.case_stage_durations_long
+--   tier, case_type  -> cohort the stage reduction applies to
+--   reduction_pct    -> share of that stage's business minutes removed
+--   reopen_pct       -> share of estimated reopen rework removed (${staging}.reopen_penalty, all tiers)
+-- Every stage lever is crossed with every reopen level.
+--
+-- Same counterfactual as scenario_results: resolution minutes shrink by reduction_pct × stage minutes
+-- (floored at 0) and the case is re-tested against SLA A; reopen savings are hours only.
+-- S1 = (investigation_to_reviewqa, TIER_3, ALL, 0.20, 0.00); S3 = same lever with reopen_pct 0.25.
+--
+-- Method: each (case, stage) row joins only the levers whose stage / tier / case_type match it,
+-- then one GROUP BY over lever ids aggregates every scenario at once.
+
+CREATE OR REPLACE TABLE ${mart}.scenario_grid AS
+WITH params AS (
+  SELECT ${sla_a_minutes} AS sla_a_minutes
+),
+stages(stage_name) AS (
+  VALUES
+    ('intake_to_triage'),
+    ('triage_to_assignment'),
+    ('assignment_to_investigation'),
+    ('investigation_to_reviewqa'),
+    ('reviewqa_to_resolved')
+),
+tiers(tier) AS (
+  VALUES ('ALL'), ('TIER_1'), ('TIER_2'), ('TIER_3')
+),
+case_types(case_type) AS (
+  VALUES ('ALL'), ('ACCESS_REVIEW'), ('POLICY_EXCEPTION'), ('VENDOR_ASSESSMENT')
+),
+reduction_levels(reduction_pct) AS (
+  VALUES (0.10::DECIMAL(4,2)), (0.20::DECIMAL(4,2)), (0.30::DECIMAL(4,2)), (0.50::DECIMAL(4,2))
+),
+reopen_levels(reopen_pct) AS (
+  VALUES (0.00::DECIMAL(4,2)), (0.10::DECIMAL(4,2)), (0.25::DECIMAL(4,2)), (0.50::DECIMAL(4,2))
+),
+levers AS (
+  SELECT
+    ROW_NUMBER() OVER (ORDER BY s.stage_name, t.tier, c.case_type, r.reduction_pct) AS lever_id,
+    s.stage_name,
+    t.tier,
+    c.case_type,
+    r.reduction_pct
+  FROM stages s
+  CROSS JOIN tiers t
+  CROSS JOIN case_types c
+  CROSS JOIN reduction_levels r
+),
+base AS (
+  SELECT
+    s.case_id,
+    s.tier,
+    s.case_type,
+    s.first_resolution_business_minutes_including_cw AS fr_min_inc,
+    s.sla_a_breached_including_cw AS breach_inc
+  FROM ${staging}.case_sla_metrics s
+  WHERE s.resolved_ts IS NOT NULL
+),
+case_stages AS (
+  SELECT
+    b.*,
+    d.stage_name,
+    d.mins
+  FROM base b
+  JOIN ${staging}.case_stage_durations_long d USING(case_id)
+  WHERE d.mins IS NOT NULL
+),
+lever_results AS (
+  SELECT
+    l.lever_id,
+    COUNT(*) AS eligible_cases,
+    ROUND(100.0 * AVG(CASE WHEN cs.breach_inc THEN 1 ELSE 0 END), 3) AS baseline_breach_pct_inc,
+    ROUND(100.0 * AVG(CASE WHEN (GREATEST(0, cs.fr_min_inc - l.reduction_pct * cs.mins) > p.sla_a_minutes) THEN 1 ELSE 0 END), 3) AS scenario_breach_pct_inc,
+
+    SUM(CASE WHEN cs.breach_inc THEN 1 ELSE 0 END) AS baseline_breaches_inc,
+    SUM(CASE WHEN (GREATEST(0, cs.fr_min_inc - l.reduction_pct * cs.mins) > p.sla_a_minutes) THEN 1 ELSE 0 END) AS scenario_breaches_inc,
+
+    ROUND(SUM(l.reduction_pct * cs.mins) / 60.0, 2) AS resolution_hours_saved
+  FROM case_stages cs
+  JOIN levers l
+    ON l.stage_name = cs.stage_name
+   AND (l.tier = 'ALL' OR l.tier = cs.tier)
+   AND (l.case_type = 'ALL' OR l.case_type = cs.case_type)
+  CROSS JOIN params p
+  GROUP BY 1
+),
+reopen_minutes AS (
+  SELECT SUM(reopen_penalty_business_minutes) AS total_reopen_penalty_minutes
+  FROM ${staging}.reopen_penalty
+  WHERE reopen_penalty_business_minutes IS NOT NULL
+)
+SELECT
+  l.stage_name || '|' || l.tier || '|' || l.case_type || '|' || l.reduction_pct || '|reopen_' || ro.reopen_pct AS scenario_id,
+  l.stage_name,
+  l.tier,
+  l.case_type,
+  l.reduction_pct,
+  ro.reopen_pct,
+
+  COALESCE(r.eligible_cases, 0) AS eligible_cases,
+  r.baseline_breach_pct_inc,
+  r.scenario_breach_pct_inc,
+  CAST(r.baseline_breaches_inc AS BIGINT) AS baseline_breaches_inc,
+  CAST(r.scenario_breaches_inc AS BIGINT) AS scenario_breaches_inc,
+  CAST(r.baseline_breaches_inc - r.scenario_breaches_inc AS BIGINT) AS breaches_avoided_inc,
+
+  COALESCE(r.resolution_hours_saved, 0.0) AS resolution_hours_saved,
+  ROUND(ro.reopen_pct * rm.total_reopen_penalty_minutes / 60.0, 2) AS reopen_hours_saved,
+  ROUND(COALESCE(r.resolution_hours_saved, 0.0) + ROUND(ro.reopen_pct * rm.total_reopen_penalty_minutes / 60.0, 2), 2) AS total_hours_saved
+FROM levers l
+LEFT JOIN lever_results r USING(lever_id)
+CROSS JOIN reopen_levels ro
+CROSS JOIN reopen_minutes rm
+ORDER BY l.stage_name, l.tier, l.case_type, l.reduction_pct, ro.reopen_pct;
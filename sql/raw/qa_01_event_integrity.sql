@@ -6,7 +6,7 @@ SELECT
   ROUND(100.0 * AVG(CASE WHEN is_duplicate THEN 1 ELSE 0 END), 3) AS pct_duplicate_flag,
   ROUND(100.0 * AVG(CASE WHEN is_late_arriving THEN 1 ELSE 0 END), 3) AS pct_late_arriving_flag,
   ROUND(100.0 * AVG(CASE WHEN event_tz = 'INCONSISTENT' THEN 1 ELSE 0 END), 3) AS pct_tz_inconsistent
-FROM raw.events_log;
+FROM ${raw}.events_log;
 
 -- Duplicate candidates by (case_id, status, event_ts) ignoring event_id
 -- This catches "retry logging" patterns beyond explicit flags.
@@ -15,7 +15,7 @@ SELECT
   SUM(cnt - 1) AS duplicate_extra_rows
 FROM (
   SELECT case_id, status, event_ts, COUNT(*) AS cnt
-  FROM raw.events_log
+  FROM ${raw}.events_log
   WHERE event_ts IS NOT NULL
   GROUP BY 1,2,3
   HAVING COUNT(*) > 1
@@ -24,4 +24,4 @@ FROM (
 -- Ingestion after event sanity (should almost always be >=, but missing event_ts allowed)
 SELECT
   ROUND(100.0 * AVG(CASE WHEN event_ts IS NOT NULL AND ingestion_ts < event_ts THEN 1 ELSE 0 END), 3) AS pct_ingestion_before_event_ts
-FROM raw.events_log;
+FROM ${raw}.events_log;
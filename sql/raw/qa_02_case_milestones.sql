@@ -10,7 +10,7 @@ WITH flags AS (
     MAX(CASE WHEN status='REOPENED' THEN 1 ELSE 0 END) AS has_reopened,
     MAX(CASE WHEN status='ESCALATED' THEN 1 ELSE 0 END) AS has_escalated,
     MAX(CASE WHEN status='CUSTOMER_WAIT' THEN 1 ELSE 0 END) AS has_customer_wait
-  FROM raw.events_log
+  FROM ${raw}.events_log
   GROUP BY 1
 )
 SELECT
@@ -29,7 +29,7 @@ WITH t AS (
     case_id,
     MIN(CASE WHEN status='INTAKE' THEN event_ts END) AS intake_ts,
     MIN(CASE WHEN status='TRIAGE' THEN event_ts END) AS triage_ts
-  FROM raw.events_log
+  FROM ${raw}.events_log
   GROUP BY 1
 )
 SELECT
@@ -44,7 +44,7 @@ WITH f AS (
     case_id,
     MAX(CASE WHEN status='CANCELLED' THEN 1 ELSE 0 END) AS cancelled,
     MAX(CASE WHEN status='RESOLVED' THEN 1 ELSE 0 END) AS resolved
-  FROM raw.events_log
+  FROM ${raw}.events_log
   GROUP BY 1
 )
 SELECT
@@ -3,33 +3,23 @@
 -- - Define canonical timestamp: COALESCE(event_ts, ingestion_ts)
 -- - Deduplicate on (case_id, status, event_ts_canonical) because retries often replay same logical event
 -- - Prefer rows with non-null event_ts; then earliest ingestion_ts; then stable event_id ordering
+-- Implementation: one hash aggregate per dedup key keeps arg_min(rowid) under that preference,
+-- encoded as a single sort key (event_id is unique, so there are no ties); the kept rows are then
+-- read back by rowid. No window sort over all events.
 
-CREATE OR REPLACE TABLE staging.events_deduped AS
-WITH base AS (
+CREATE OR REPLACE TABLE ${staging}.events_deduped AS
+WITH kept AS (
   SELECT
-    event_id,
-    case_id,
-    status,
-    event_ts,
-    ingestion_ts,
-    COALESCE(event_ts, ingestion_ts) AS event_ts_canonical,
-    event_tz,
-    CAST(is_duplicate AS BOOLEAN) AS is_duplicate,
-    CAST(is_late_arriving AS BOOLEAN) AS is_late_arriving,
-    intake_date
-  FROM raw.events_log
-),
-ranked AS (
-  SELECT
-    *,
-    ROW_NUMBER() OVER (
-      PARTITION BY case_id, status, event_ts_canonical
-      ORDER BY
-        CASE WHEN event_ts IS NOT NULL THEN 0 ELSE 1 END,
-        ingestion_ts ASC,
-        event_id ASC
-    ) AS rn
-  FROM base
+    arg_min(
+      rowid,
+      create_sort_key(
+        event_ts IS NULL, 'ASC NULLS LAST',
+        ingestion_ts, 'ASC NULLS LAST',
+        event_id, 'ASC NULLS LAST'
+      )
+    ) AS kept_rowid
+  FROM ${raw}.events_log
+  GROUP BY case_id, status, COALESCE(event_ts, ingestion_ts)
 )
 SELECT
   event_id,
@@ -37,10 +27,10 @@ SELECT
   status,
   event_ts,
   ingestion_ts,
-  event_ts_canonical,
+  COALESCE(event_ts, ingestion_ts) AS event_ts_canonical,
   event_tz,
-  is_duplicate,
-  is_late_arriving,
+  CAST(is_duplicate AS BOOLEAN) AS is_duplicate,
+  CAST(is_late_arriving AS BOOLEAN) AS is_late_arriving,
   intake_date
-FROM ranked
-WHERE rn = 1;
+FROM ${raw}.events_log e
+SEMI JOIN kept k ON e.rowid = k.kept_rowid;
@@ -3,7 +3,7 @@
 -- - Keep raw timestamps for audit, but standardize analysis on event_ts_canonical.
 -- - Add anomaly flags (ingestion < event_ts, tz inconsistent marker).
 
-CREATE OR REPLACE TABLE staging.events_clean AS
+CREATE OR REPLACE TABLE ${staging}.events_clean AS
 SELECT
   event_id,
   case_id,
@@ -36,4 +36,4 @@ SELECT
 
   intake_date
 
-FROM staging.events_deduped;
+FROM ${staging}.events_deduped;
@@ -1,10 +1,10 @@
--- Step 4.3 — Case-level milestones using authoritative intake_ts from raw.cases.
+-- Step 4.3 — Case-level milestones using authoritative intake_ts from ${raw}.cases.
 -- Key rule:
 -- - TRIAGE timestamp should be the first TRIAGE event at/after intake_ts when available
 --   else fall back to earliest TRIAGE.
 -- Same rule will be used later for other lead-time milestones.
 
-CREATE OR REPLACE TABLE staging.case_milestones AS
+CREATE OR REPLACE TABLE ${staging}.case_milestones AS
 WITH c AS (
   SELECT
     case_id,
@@ -13,14 +13,14 @@ WITH c AS (
     tier,
     team_tz,
     intake_date
-  FROM raw.cases
+  FROM ${raw}.cases
 ),
 e AS (
   SELECT
     case_id,
     status,
     event_ts_canonical
-  FROM staging.events_clean
+  FROM ${staging}.events_clean
 ),
 agg AS (
   SELECT
@@ -53,7 +53,7 @@ triage_valid AS (
     -- triage at/after intake if exists
     (
       SELECT MIN(e2.event_ts_canonical)
-      FROM staging.events_clean e2
+      FROM ${staging}.events_clean e2
       WHERE e2.case_id = a.case_id
         AND e2.status = 'TRIAGE'
         AND e2.event_ts_canonical >= a.intake_ts
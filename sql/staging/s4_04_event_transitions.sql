@@ -0,0 +1,51 @@
+-- Step 4.4 — Status transitions per case, validated against the workflow.
+-- One ordered pass over each case's deduped events (same ordering as the case timeline):
+-- LAG gives the (prev_status, status) pair of every event; the first event has prev_status NULL.
+-- Allowed pairs come from CONFIG.states.allowed_transitions() (src/config.py), rendered as VALUES.
+-- violation: NULL when allowed, else
+--   INVALID_START    first event is not INTAKE
+--   REPEATED_STATUS  same status twice in a row
+--   AFTER_TERMINAL   leaves a terminal state other than RESOLVED -> REOPENED
+--   NOT_ALLOWED      any other pair outside the matrix
+
+CREATE OR REPLACE TABLE ${staging}.event_transitions AS
+WITH ordered AS (
+  SELECT
+    case_id,
+    event_id,
+    status,
+    event_ts_canonical,
+    ROW_NUMBER() OVER w AS transition_seq,
+    LAG(event_id) OVER w AS prev_event_id,
+    LAG(status) OVER w AS prev_status,
+    LAG(event_ts_canonical) OVER w AS prev_event_ts
+  FROM ${staging}.events_clean
+  WINDOW w AS (PARTITION BY case_id ORDER BY event_ts_canonical, event_id)
+),
+allowed AS (
+  SELECT prev_status, status
+  FROM (VALUES
+  ${allowed_transitions}
+  ) AS a(prev_status, status)
+)
+SELECT
+  o.case_id,
+  o.transition_seq,
+  o.prev_event_id,
+  o.event_id,
+  o.prev_status,
+  o.status,
+  o.prev_event_ts,
+  o.event_ts_canonical,
+  a.status IS NOT NULL AS is_allowed,
+  CASE
+    WHEN a.status IS NOT NULL THEN NULL
+    WHEN o.prev_status IS NULL THEN 'INVALID_START'
+    WHEN o.prev_status = o.status THEN 'REPEATED_STATUS'
+    WHEN o.prev_status IN (${terminal_states}) THEN 'AFTER_TERMINAL'
+    ELSE 'NOT_ALLOWED'
+  END AS violation
+FROM ordered o
+LEFT JOIN allowed a
+  ON o.prev_status IS NOT DISTINCT FROM a.prev_status
+ AND o.status = a.status;
@@ -0,0 +1,46 @@
+-- Step 4.5 — Invalid transitions and violation rates (from ${staging}.event_transitions).
+-- invalid_transitions: one row per event whose (prev_status, status) pair is not allowed.
+-- transition_violation_rates: one row per observed pair, with its share of all transitions out of
+-- prev_status and the violation rate of that from-state overall.
+
+CREATE OR REPLACE TABLE ${staging}.invalid_transitions AS
+SELECT
+  case_id,
+  transition_seq,
+  prev_event_id,
+  event_id,
+  prev_status,
+  status,
+  prev_event_ts,
+  event_ts_canonical,
+  violation
+FROM ${staging}.event_transitions
+WHERE NOT is_allowed;
+
+CREATE OR REPLACE TABLE ${staging}.transition_violation_rates AS
+WITH pairs AS (
+  SELECT
+    prev_status,
+    status,
+    is_allowed,
+    ANY_VALUE(violation) AS violation,
+    COUNT(*) AS transitions,
+    COUNT(DISTINCT case_id) AS cases
+  FROM ${staging}.event_transitions
+  GROUP BY prev_status, status, is_allowed
+)
+SELECT
+  COALESCE(prev_status, '(start)') AS prev_status,
+  status,
+  is_allowed,
+  violation,
+  transitions,
+  cases,
+  ROUND(100.0 * transitions / SUM(transitions) OVER (PARTITION BY prev_status), 4) AS pct_of_transitions_from_prev,
+  ROUND(
+    100.0 * SUM(CASE WHEN is_allowed THEN 0 ELSE transitions END) OVER (PARTITION BY prev_status)
+      / SUM(transitions) OVER (PARTITION BY prev_status),
+    4
+  ) AS from_status_violation_pct
+FROM pairs
+ORDER BY prev_status, transitions DESC;
@@ -9,7 +9,7 @@
 -- Then business_minutes_between(start, end) = end_idx - start_idx
 -- where idx is the first business minute at/after timestamp (implemented via last<=ts + correction).
 
-CREATE OR REPLACE TABLE staging.case_sla_metrics AS
+CREATE OR REPLACE TABLE ${staging}.case_sla_metrics AS
 WITH base_cases AS (
   SELECT
     case_id,
@@ -22,7 +22,7 @@ WITH base_cases AS (
     tier,
     team_tz,
     intake_date
-  FROM staging.case_milestones
+  FROM ${staging}.case_milestones
 ),
 -- Resolve "first RESOLVED at/after intake" (to avoid negative cycles due to tz inconsistency)
 resolved_fix AS (
@@ -30,7 +30,7 @@ resolved_fix AS (
     b.*,
     (
       SELECT MIN(e.event_ts_canonical)
-      FROM staging.events_clean e
+      FROM ${staging}.events_clean e
       WHERE e.case_id = b.case_id
         AND e.status = 'RESOLVED'
         AND e.event_ts_canonical >= b.intake_ts
@@ -42,7 +42,7 @@ triage_fix AS (
     r.*,
     (
       SELECT MIN(e.event_ts_canonical)
-      FROM staging.events_clean e
+      FROM ${staging}.events_clean e
       WHERE e.case_id = r.case_id
         AND e.status = 'TRIAGE'
         AND e.event_ts_canonical >= r.intake_ts
@@ -71,11 +71,11 @@ cw_intervals AS (
     e.event_ts_canonical AS cw_start_ts,
     (
       SELECT MIN(e2.event_ts_canonical)
-      FROM staging.events_clean e2
+      FROM ${staging}.events_clean e2
       WHERE e2.case_id = e.case_id
         AND e2.event_ts_canonical > e.event_ts_canonical
     ) AS cw_end_ts
-  FROM staging.events_clean e
+  FROM ${staging}.events_clean e
   WHERE e.status = 'CUSTOMER_WAIT'
 ),
 -- Map CW intervals to business-minute indices and sum
@@ -106,9 +106,9 @@ cw_minutes AS (
 
     FROM cw_intervals ci
     -- ASOF: match last minute_ts <= timestamp
-    ASOF JOIN staging.business_minutes_dim b1
+    ASOF JOIN ${staging}.business_minutes_dim b1
       ON ci.cw_start_ts >= b1.minute_ts
-    ASOF JOIN staging.business_minutes_dim b2
+    ASOF JOIN ${staging}.business_minutes_dim b2
       ON ci.cw_end_ts >= b2.minute_ts
   ) ci
   GROUP BY 1
@@ -138,11 +138,11 @@ idxs AS (
     END AS resolved_idx
 
   FROM inputs i
-  ASOF JOIN staging.business_minutes_dim bi
+  ASOF JOIN ${staging}.business_minutes_dim bi
     ON i.intake_ts >= bi.minute_ts
-  ASOF JOIN staging.business_minutes_dim bt
+  ASOF JOIN ${staging}.business_minutes_dim bt
     ON i.triage_ts_final >= bt.minute_ts
-  ASOF JOIN staging.business_minutes_dim br
+  ASOF JOIN ${staging}.business_minutes_dim br
     ON i.resolved_ts_final >= br.minute_ts
 ),
 calc AS (
@@ -202,17 +202,17 @@ final AS (
     -- SLA thresholds (locked): B=2 business hours, A=24 business hours
     CASE
       WHEN c.first_touch_business_minutes IS NULL THEN NULL
-      ELSE (c.first_touch_business_minutes > 120)
+      ELSE (c.first_touch_business_minutes > ${sla_b_minutes})
     END AS sla_b_breached,
 
     CASE
       WHEN c.first_resolution_business_minutes_including_cw IS NULL THEN NULL
-      ELSE (c.first_resolution_business_minutes_including_cw > 1440)
+      ELSE (c.first_resolution_business_minutes_including_cw > ${sla_a_minutes})
     END AS sla_a_breached_including_cw,
 
     CASE
       WHEN c.first_resolution_business_minutes_including_cw IS NULL THEN NULL
-      ELSE (GREATEST(0, c.first_resolution_business_minutes_including_cw - COALESCE(w.customer_wait_business_minutes, 0)) > 1440)
+      ELSE (GREATEST(0, c.first_resolution_business_minutes_including_cw - COALESCE(w.customer_wait_business_minutes, 0)) > ${sla_a_minutes})
     END AS sla_a_breached_paused_cw,
 
     -- Data-quality tracking flags
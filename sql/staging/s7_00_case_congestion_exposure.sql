@@ -1,63 +1,120 @@
--- Step 7 Fix v3 — Case-level congestion exposure
--- Compute avg congestion_flow_index across business days from intake_date to resolved_date (cap to 10 biz days)
+-- Step 7 Fix v4 — Case-level congestion exposure (prefix sums, no case × day expansion)
+-- Compute avg congestion_flow_index across business days from intake_date to resolved_date (cap to N biz days)
 -- This aligns driver signal to the actual window that determines SLA A.
+--
+-- Method:
+-- - Index business days 1..D and build running sums of congestion_flow_index over that index
+--   (days with a NULL index contribute nothing and are not counted, as before).
+-- - Each case maps to [start_idx, end_idx] with two ASOF lookups (first biz day >= intake_date,
+--   last biz day <= resolved_date), end_idx capped at start_idx + cap - 1.
+-- - Window totals are prefix[end] - prefix[start - 1]: O(1) per case regardless of cap.
+-- Weighting (CONFIG.drivers.congestion_exposure_weighting):
+-- - 'uniform'      : plain average (same window and day set as the previous range-join version;
+--                    sums are exact, so 4dp rounding ties no longer depend on float summation order)
+-- - 'linear_decay' : day k of the window (k = 1..cap) weighs (cap - k + 1), front-loading early days
 
-CREATE OR REPLACE TABLE staging.case_congestion_exposure AS
-WITH resolved_cases AS (
+CREATE OR REPLACE TABLE ${staging}.case_congestion_exposure AS
+WITH params AS (
+  SELECT
+    ${exposure_cap_biz_days} AS cap_biz_days,
+    '${exposure_weighting}' AS weighting
+),
+resolved_cases AS (
   SELECT
     case_id,
     tier,
     case_type,
     intake_date,
     CAST(resolved_ts AS DATE) AS resolved_date
-  FROM staging.case_sla_metrics
+  FROM ${staging}.case_sla_metrics
   WHERE resolved_ts IS NOT NULL
 ),
 biz_days AS (
-  SELECT cal_date
-  FROM raw.calendar_dim
+  SELECT
+    cal_date,
+    ROW_NUMBER() OVER (ORDER BY cal_date) AS biz_idx
+  FROM ${raw}.calendar_dim
   WHERE NOT is_weekend
     AND NOT is_holiday
 ),
-expanded AS (
+daily AS (
+  SELECT
+    d.biz_idx,
+    d.cal_date,
+    -- index values are rounded to 4dp upstream, so DECIMAL sums are exact
+    CAST(c.congestion_flow_index AS DECIMAL(18,4)) AS x
+  FROM biz_days d
+  LEFT JOIN ${mart}.congestion_daily_v2 c
+    ON c.cal_date = d.cal_date
+),
+prefix AS (
+  SELECT
+    biz_idx,
+    cal_date,
+    SUM(CASE WHEN x IS NOT NULL THEN 1 ELSE 0 END) OVER w AS cum_n,
+    SUM(CASE WHEN x IS NOT NULL THEN biz_idx ELSE 0 END) OVER w AS cum_i,
+    COALESCE(SUM(x) OVER w, 0) AS cum_x,
+    COALESCE(SUM(biz_idx * x) OVER w, 0) AS cum_ix
+  FROM daily
+  WINDOW w AS (ORDER BY biz_idx ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+
+  UNION ALL
+  -- prefix[0] so that windows starting at the first business day can subtract it
+  SELECT 0, NULL, 0, 0, 0, 0
+),
+spans AS (
   SELECT
     r.case_id,
     r.tier,
     r.case_type,
     r.intake_date,
     r.resolved_date,
-    d.cal_date,
-    ROW_NUMBER() OVER (PARTITION BY r.case_id ORDER BY d.cal_date) AS biz_day_n
+    s.biz_idx AS start_idx,
+    LEAST(e.biz_idx, s.biz_idx + p.cap_biz_days - 1) AS end_idx
   FROM resolved_cases r
-  JOIN biz_days d
-    ON d.cal_date BETWEEN r.intake_date AND r.resolved_date
-),
-windowed AS (
-  SELECT *
-  FROM expanded
-  WHERE biz_day_n <= 10
+  CROSS JOIN params p
+  -- first business day at/after intake_date
+  ASOF JOIN biz_days s
+    ON r.intake_date <= s.cal_date
+  -- last business day at/before resolved_date
+  ASOF JOIN biz_days e
+    ON r.resolved_date >= e.cal_date
 ),
-joined AS (
+window_sums AS (
   SELECT
-    w.case_id,
-    w.tier,
-    w.case_type,
-    w.intake_date,
-    w.resolved_date,
-    w.biz_day_n,
-    c.congestion_flow_index
-  FROM windowed w
-  LEFT JOIN mart.congestion_daily_v2 c
-    ON c.cal_date = w.cal_date
+    sp.case_id,
+    sp.tier,
+    sp.case_type,
+    sp.intake_date,
+    sp.resolved_date,
+    sp.start_idx,
+    pe.cum_n - ps.cum_n AS n,
+    pe.cum_i - ps.cum_i AS sum_i,
+    pe.cum_x - ps.cum_x AS sum_x,
+    pe.cum_ix - ps.cum_ix AS sum_ix
+  FROM spans sp
+  JOIN prefix pe
+    ON pe.biz_idx = sp.end_idx
+  JOIN prefix ps
+    ON ps.biz_idx = sp.start_idx - 1
+  WHERE sp.end_idx >= sp.start_idx
 )
 SELECT
-  case_id,
-  tier,
-  case_type,
-  intake_date,
-  resolved_date,
-  COUNT(*) AS biz_days_in_window,
-  ROUND(AVG(congestion_flow_index), 4) AS avg_congestion_flow_index
-FROM joined
-WHERE congestion_flow_index IS NOT NULL
-GROUP BY 1,2,3,4,5;
+  w.case_id,
+  w.tier,
+  w.case_type,
+  w.intake_date,
+  w.resolved_date,
+  CAST(w.n AS BIGINT) AS biz_days_in_window,
+  ROUND(
+    CASE p.weighting
+      WHEN 'linear_decay' THEN
+        -- weight(day) = cap + start_idx - biz_idx
+        ((p.cap_biz_days + w.start_idx) * w.sum_x - w.sum_ix)::DOUBLE
+          / ((p.cap_biz_days + w.start_idx) * w.n - w.sum_i)
+      ELSE w.sum_x::DOUBLE / w.n
+    END
+  , 4) AS avg_congestion_flow_index
+FROM window_sums w
+CROSS JOIN params p
+WHERE w.n > 0;
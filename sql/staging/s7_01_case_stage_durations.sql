@@ -1,80 +1,176 @@
 -- Step 7.1 — Stage durations in business minutes (case-level)
 -- We compute business minutes between key milestones using the business-minute index method.
+--
+-- Generic builder (one index lookup pass regardless of how many stages are declared):
+-- 1. unpivot milestone columns to (case_id, milestone, milestone_ts)
+-- 2. map every timestamp to its business-minute index with a vectorized lookup keyed on epoch minute
+--    (same result as the ASOF "last minute <= ts, +1 if strictly before" rule, without a sort
+--    and without a per-row timezone cast)
+-- 3. pivot indices back per case and evaluate every declared stage pair
+-- Adding a stage = one row in stage_pairs (any two milestones, consecutive or not), plus its
+-- mins_<stage_name> column in the case_stage_durations select list.
+--
+-- Outputs:
+-- - ${staging}.case_stage_durations_long : (case_id, stage_name, mins) for every declared pair
+-- - ${staging}.case_stage_durations      : one mins_<stage_name> column per pair (existing consumers)
+--
+-- Cohort: cases with every milestone observed and mapped to the business-minute spine.
+-- This is the cohort the previous per-column ASOF joins produced (an ASOF join drops rows with a
+-- NULL or unmatched key, including customer_wait_first_ts), kept so downstream marts and step 8
+-- scenario numbers are unchanged. Set require_all_milestones = FALSE to keep partial cases.
 
-CREATE OR REPLACE TABLE staging.case_stage_durations AS
-WITH m AS (
+CREATE OR REPLACE TABLE ${staging}.case_stage_durations_long AS
+WITH params AS (
+  SELECT TRUE AS require_all_milestones
+),
+stage_pairs(stage_name, from_milestone, to_milestone) AS (
+  VALUES
+    ('intake_to_triage',            'intake',        'triage'),
+    ('triage_to_assignment',        'triage',        'assignment'),
+    ('assignment_to_investigation', 'assignment',    'investigation'),
+    ('investigation_to_reviewqa',   'investigation', 'review_qa'),
+    ('reviewqa_to_resolved',        'review_qa',     'resolved'),
+    ('intake_to_resolved',          'intake',        'resolved')
+),
+m AS (
   SELECT
     case_id,
-    intake_date,
-    tier,
-    case_type,
-    team_tz,
     intake_ts,
     triage_ts,
     assignment_ts,
     investigation_ts,
     customer_wait_first_ts,
     review_qa_ts,
-    resolved_ts,
-    cancelled_ts
-  FROM staging.case_milestones
+    resolved_ts
+  FROM ${staging}.case_milestones
+),
+-- unpivot (UNION ALL is a plain scan per column; UNNEST-based UNPIVOT is much slower here)
+milestones AS (
+  SELECT case_id, 'intake' AS milestone, intake_ts AS milestone_ts FROM m
+  UNION ALL SELECT case_id, 'triage', triage_ts FROM m
+  UNION ALL SELECT case_id, 'assignment', assignment_ts FROM m
+  UNION ALL SELECT case_id, 'investigation', investigation_ts FROM m
+  UNION ALL SELECT case_id, 'customer_wait', customer_wait_first_ts FROM m
+  UNION ALL SELECT case_id, 'review_qa', review_qa_ts FROM m
+  UNION ALL SELECT case_id, 'resolved', resolved_ts FROM m
+),
+spine_bounds AS (
+  SELECT
+    epoch(CAST(MIN(minute_ts) AS TIMESTAMPTZ))::BIGINT // 60 AS first_epoch_minute,
+    epoch(CAST(MAX(minute_ts) AS TIMESTAMPTZ))::BIGINT // 60 AS last_epoch_minute,
+    COUNT(*) AS spine_minutes
+  FROM ${staging}.business_minutes_dim
+),
+-- every wall-clock minute across the spine: index of the first business minute at/after its start
+minute_lookup AS (
+  SELECT
+    em.epoch_minute,
+    b.minute_idx IS NOT NULL AS is_business_minute,
+    COALESCE(
+      MIN(b.minute_idx) OVER (ORDER BY em.epoch_minute ROWS BETWEEN CURRENT ROW AND UNBOUNDED FOLLOWING),
+      (SELECT spine_minutes FROM spine_bounds)
+    ) AS idx_at_start
+  FROM (
+    SELECT UNNEST(range(first_epoch_minute, last_epoch_minute + 1)) AS epoch_minute
+    FROM spine_bounds
+  ) em
+  LEFT JOIN ${staging}.business_minutes_dim b
+    ON b.minute_ts = CAST(to_timestamp(em.epoch_minute * 60) AS TIMESTAMP)
 ),
--- helper: map timestamps to business-minute indices (asof join to last<=ts, then +1 if needed)
 idx AS (
   SELECT
-    m.*,
-
-    (COALESCE(bi.minute_idx, -1) + CASE WHEN COALESCE(bi.minute_ts, TIMESTAMP '1900-01-01') < m.intake_ts THEN 1 ELSE 0 END) AS intake_idx,
-
-    CASE WHEN m.triage_ts IS NULL THEN NULL ELSE
-      (COALESCE(bt.minute_idx, -1) + CASE WHEN COALESCE(bt.minute_ts, TIMESTAMP '1900-01-01') < m.triage_ts THEN 1 ELSE 0 END)
-    END AS triage_idx,
-
-    CASE WHEN m.assignment_ts IS NULL THEN NULL ELSE
-      (COALESCE(ba.minute_idx, -1) + CASE WHEN COALESCE(ba.minute_ts, TIMESTAMP '1900-01-01') < m.assignment_ts THEN 1 ELSE 0 END)
-    END AS assignment_idx,
-
-    CASE WHEN m.investigation_ts IS NULL THEN NULL ELSE
-      (COALESCE(binv.minute_idx, -1) + CASE WHEN COALESCE(binv.minute_ts, TIMESTAMP '1900-01-01') < m.investigation_ts THEN 1 ELSE 0 END)
-    END AS investigation_idx,
-
-    CASE WHEN m.customer_wait_first_ts IS NULL THEN NULL ELSE
-      (COALESCE(bcw.minute_idx, -1) + CASE WHEN COALESCE(bcw.minute_ts, TIMESTAMP '1900-01-01') < m.customer_wait_first_ts THEN 1 ELSE 0 END)
-    END AS customer_wait_idx,
-
-    CASE WHEN m.review_qa_ts IS NULL THEN NULL ELSE
-      (COALESCE(bqa.minute_idx, -1) + CASE WHEN COALESCE(bqa.minute_ts, TIMESTAMP '1900-01-01') < m.review_qa_ts THEN 1 ELSE 0 END)
-    END AS review_qa_idx,
-
-    CASE WHEN m.resolved_ts IS NULL THEN NULL ELSE
-      (COALESCE(br.minute_idx, -1) + CASE WHEN COALESCE(br.minute_ts, TIMESTAMP '1900-01-01') < m.resolved_ts THEN 1 ELSE 0 END)
-    END AS resolved_idx
-
-  FROM m
-  ASOF JOIN staging.business_minutes_dim bi   ON m.intake_ts >= bi.minute_ts
-  ASOF JOIN staging.business_minutes_dim bt   ON m.triage_ts >= bt.minute_ts
-  ASOF JOIN staging.business_minutes_dim ba   ON m.assignment_ts >= ba.minute_ts
-  ASOF JOIN staging.business_minutes_dim binv ON m.investigation_ts >= binv.minute_ts
-  ASOF JOIN staging.business_minutes_dim bcw  ON m.customer_wait_first_ts >= bcw.minute_ts
-  ASOF JOIN staging.business_minutes_dim bqa  ON m.review_qa_ts >= bqa.minute_ts
-  ASOF JOIN staging.business_minutes_dim br   ON m.resolved_ts >= br.minute_ts
+    ms.case_id,
+    ms.milestone,
+    CASE
+      -- after the last business minute: one past the end of the spine
+      WHEN ml.epoch_minute IS NULL THEN sb.spine_minutes
+      -- exactly on a minute boundary: that minute (or the next business one)
+      WHEN epoch_us(ms.milestone_ts) % 60000000 = 0 THEN ml.idx_at_start
+      -- inside a minute: the first business minute strictly after its start
+      ELSE ml.idx_at_start + CASE WHEN ml.is_business_minute THEN 1 ELSE 0 END
+    END AS biz_idx
+  FROM milestones ms
+  CROSS JOIN spine_bounds sb
+  LEFT JOIN minute_lookup ml
+    ON ml.epoch_minute = epoch_us(ms.milestone_ts) // 60000000
+  -- before the first business minute there is nothing at/before ts (the ASOF join dropped these)
+  WHERE ms.milestone_ts IS NOT NULL
+    AND epoch_us(ms.milestone_ts) >= sb.first_epoch_minute * 60000000
 ),
-calc AS (
+-- pivot back: one row per case with every milestone index
+per_case AS (
   SELECT
     case_id,
-    intake_date,
-    tier,
-    case_type,
-    team_tz,
-
-    -- stage-to-stage durations (business minutes)
-    CASE WHEN triage_idx IS NULL THEN NULL ELSE GREATEST(0, triage_idx - intake_idx) END AS mins_intake_to_triage,
-    CASE WHEN assignment_idx IS NULL OR triage_idx IS NULL THEN NULL ELSE GREATEST(0, assignment_idx - triage_idx) END AS mins_triage_to_assignment,
-    CASE WHEN investigation_idx IS NULL OR assignment_idx IS NULL THEN NULL ELSE GREATEST(0, investigation_idx - assignment_idx) END AS mins_assignment_to_investigation,
-    CASE WHEN review_qa_idx IS NULL OR investigation_idx IS NULL THEN NULL ELSE GREATEST(0, review_qa_idx - investigation_idx) END AS mins_investigation_to_reviewqa,
-    CASE WHEN resolved_idx IS NULL OR review_qa_idx IS NULL THEN NULL ELSE GREATEST(0, resolved_idx - review_qa_idx) END AS mins_reviewqa_to_resolved,
-
-    CASE WHEN resolved_idx IS NULL THEN NULL ELSE GREATEST(0, resolved_idx - intake_idx) END AS mins_intake_to_resolved
+    COUNT(*) AS milestones_mapped,
+    MAX(biz_idx) FILTER (WHERE milestone = 'intake') AS intake_idx,
+    MAX(biz_idx) FILTER (WHERE milestone = 'triage') AS triage_idx,
+    MAX(biz_idx) FILTER (WHERE milestone = 'assignment') AS assignment_idx,
+    MAX(biz_idx) FILTER (WHERE milestone = 'investigation') AS investigation_idx,
+    MAX(biz_idx) FILTER (WHERE milestone = 'customer_wait') AS customer_wait_idx,
+    MAX(biz_idx) FILTER (WHERE milestone = 'review_qa') AS review_qa_idx,
+    MAX(biz_idx) FILTER (WHERE milestone = 'resolved') AS resolved_idx
   FROM idx
+  GROUP BY 1
+),
+cohort AS (
+  SELECT pc.*
+  FROM per_case pc
+  CROSS JOIN params p
+  WHERE NOT p.require_all_milestones
+     OR pc.milestones_mapped = 7  -- intake, triage, assignment, investigation, customer_wait, review_qa, resolved
 )
-SELECT * FROM calc;
+-- stage pairs evaluated against the pivoted indices; NULL when either milestone is missing
+SELECT
+  c.case_id,
+  sp.stage_name,
+  GREATEST(0,
+    CASE sp.to_milestone
+      WHEN 'intake' THEN c.intake_idx
+      WHEN 'triage' THEN c.triage_idx
+      WHEN 'assignment' THEN c.assignment_idx
+      WHEN 'investigation' THEN c.investigation_idx
+      WHEN 'customer_wait' THEN c.customer_wait_idx
+      WHEN 'review_qa' THEN c.review_qa_idx
+      WHEN 'resolved' THEN c.resolved_idx
+    END
+    -
+    CASE sp.from_milestone
+      WHEN 'intake' THEN c.intake_idx
+      WHEN 'triage' THEN c.triage_idx
+      WHEN 'assignment' THEN c.assignment_idx
+      WHEN 'investigation' THEN c.investigation_idx
+      WHEN 'customer_wait' THEN c.customer_wait_idx
+      WHEN 'review_qa' THEN c.review_qa_idx
+      WHEN 'resolved' THEN c.resolved_idx
+    END
+  ) AS mins
+FROM cohort c
+CROSS JOIN stage_pairs sp;
+
+CREATE OR REPLACE TABLE ${staging}.case_stage_durations AS
+WITH wide AS (
+  PIVOT (
+    SELECT case_id, 'mins_' || stage_name AS stage_col, mins
+    FROM ${staging}.case_stage_durations_long
+  )
+  ON stage_col
+  USING FIRST(mins)
+  GROUP BY case_id
+)
+SELECT
+  m.case_id,
+  m.intake_date,
+  m.tier,
+  m.case_type,
+  m.team_tz,
+
+  -- stage-to-stage durations (business minutes), one column per declared stage pair.
+  -- Listed explicitly in stage_pairs order: PIVOT emits its columns alphabetically.
+  w.mins_intake_to_triage,
+  w.mins_triage_to_assignment,
+  w.mins_assignment_to_investigation,
+  w.mins_investigation_to_reviewqa,
+  w.mins_reviewqa_to_resolved,
+  w.mins_intake_to_resolved
+FROM ${staging}.case_milestones m
+JOIN wide w USING(case_id);
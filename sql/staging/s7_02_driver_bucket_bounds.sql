@@ -0,0 +1,82 @@
+-- Step 7.2a — Shared quantile bucketing for driver marts
+-- Boundaries are computed once per driver (selection-based quantiles, no global sort) and persisted;
+-- every driver mart joins ${staging}.case_driver_buckets instead of running its own NTILE(10) sort.
+--
+-- Outputs:
+-- - ${staging}.driver_values        : (driver, case_id, driver_value), one branch per bucketed driver
+-- - ${staging}.driver_bucket_bounds : (driver, bucket, lower_bound, upper_bound, method)
+--     bucket k covers lower_bound < value <= upper_bound (bucket 1 open below, bucket 10 open above)
+-- - ${staging}.case_driver_buckets  : (case_id, driver, driver_value, bucket) via ASOF range lookup;
+--     cases with a NULL driver_value keep a row with bucket NULL (the old NTILE sort put them in
+--     decile 10 via NULLS LAST; cut points are computed over non-NULL values only)
+--
+-- Method (params):
+-- - 'exact'  : quantile_disc cut points
+-- - 'approx' : approx_quantile (t-digest) cut points, one streaming pass for very large case counts
+-- Ties: every case with the same value lands in the same bucket (NTILE split tied values across
+-- deciles arbitrarily), so bucket sizes are only approximately equal when values are heavily tied.
+-- Adding a driver = one more UNION ALL branch in ${staging}.driver_values.
+
+CREATE OR REPLACE TABLE ${staging}.driver_values AS
+SELECT
+  'congestion_exposure' AS driver,
+  s.case_id,
+  e.avg_congestion_flow_index AS driver_value
+FROM ${staging}.case_sla_metrics s
+JOIN ${staging}.case_congestion_exposure e USING(case_id);
+
+CREATE OR REPLACE TABLE ${staging}.driver_bucket_bounds AS
+WITH params AS (
+  SELECT 'exact' AS method
+),
+cuts AS (
+  -- only the selected method sees rows; the other aggregate returns NULL
+  SELECT
+    v.driver,
+    p.method,
+    COALESCE(
+      quantile_disc(v.driver_value, [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]) FILTER (WHERE p.method = 'exact'),
+      approx_quantile(v.driver_value, [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]) FILTER (WHERE p.method = 'approx')
+    ) AS cut_points
+  FROM ${staging}.driver_values v
+  CROSS JOIN params p
+  GROUP BY 1,2
+),
+bounds AS (
+  SELECT
+    driver,
+    method,
+    UNNEST(range(1, 11)) AS bucket,
+    cut_points
+  FROM cuts
+)
+SELECT
+  driver,
+  CAST(bucket AS INTEGER) AS bucket,
+  CASE WHEN bucket = 1 THEN CAST('-infinity' AS DOUBLE) ELSE cut_points[bucket - 1] END AS lower_bound,
+  CASE WHEN bucket = 10 THEN CAST('infinity' AS DOUBLE) ELSE cut_points[bucket] END AS upper_bound,
+  method
+FROM bounds
+ORDER BY 1,2;
+
+CREATE OR REPLACE TABLE ${staging}.case_driver_buckets AS
+SELECT
+  v.case_id,
+  v.driver,
+  v.driver_value,
+  b.bucket
+FROM ${staging}.driver_values v
+-- greatest lower_bound strictly below the value
+ASOF JOIN ${staging}.driver_bucket_bounds b
+  ON v.driver = b.driver
+ AND v.driver_value > b.lower_bound
+WHERE v.driver_value IS NOT NULL
+UNION ALL
+-- kept out of the ASOF join, which would match NULL against the highest bound
+SELECT
+  case_id,
+  driver,
+  driver_value,
+  CAST(NULL AS INTEGER) AS bucket
+FROM ${staging}.driver_values
+WHERE driver_value IS NULL;
@@ -0,0 +1,71 @@
+-- Step 7.3 — Process-mining event grain: every status transition with its business-minute duration.
+-- Reads ${staging}.event_transitions (already one ordered pass over each case's events, with the
+-- previous event's timestamp), so no second sort is needed here.
+-- business_minutes: business minutes from the previous event to this one, mapped with the same
+-- epoch-minute index lookup as s7_01; NULL for the first event of a case or when either timestamp
+-- falls before the business-minute spine.
+-- Case-keyed: src/process_mining.py refreshes it per case for incremental runs.
+
+CREATE OR REPLACE TABLE ${staging}.process_events AS
+WITH spine_bounds AS (
+  SELECT
+    epoch(CAST(MIN(minute_ts) AS TIMESTAMPTZ))::BIGINT // 60 AS first_epoch_minute,
+    epoch(CAST(MAX(minute_ts) AS TIMESTAMPTZ))::BIGINT // 60 AS last_epoch_minute,
+    COUNT(*) AS spine_minutes
+  FROM ${staging}.business_minutes_dim
+),
+-- every wall-clock minute across the spine: index of the first business minute at/after its start
+minute_lookup AS (
+  SELECT
+    em.epoch_minute,
+    b.minute_idx IS NOT NULL AS is_business_minute,
+    COALESCE(
+      MIN(b.minute_idx) OVER (ORDER BY em.epoch_minute ROWS BETWEEN CURRENT ROW AND UNBOUNDED FOLLOWING),
+      (SELECT spine_minutes FROM spine_bounds)
+    ) AS idx_at_start
+  FROM (
+    SELECT UNNEST(range(first_epoch_minute, last_epoch_minute + 1)) AS epoch_minute
+    FROM spine_bounds
+  ) em
+  LEFT JOIN ${staging}.business_minutes_dim b
+    ON b.minute_ts = CAST(to_timestamp(em.epoch_minute * 60) AS TIMESTAMP)
+),
+idx AS (
+  SELECT
+    t.case_id,
+    t.transition_seq,
+    t.prev_status,
+    t.status,
+    t.is_allowed,
+    CASE
+      WHEN t.prev_event_ts IS NULL OR epoch_us(t.prev_event_ts) < sb.first_epoch_minute * 60000000 THEN NULL
+      WHEN lp.epoch_minute IS NULL THEN sb.spine_minutes
+      WHEN epoch_us(t.prev_event_ts) % 60000000 = 0 THEN lp.idx_at_start
+      ELSE lp.idx_at_start + CASE WHEN lp.is_business_minute THEN 1 ELSE 0 END
+    END AS prev_idx,
+    CASE
+      WHEN epoch_us(t.event_ts_canonical) < sb.first_epoch_minute * 60000000 THEN NULL
+      WHEN lc.epoch_minute IS NULL THEN sb.spine_minutes
+      WHEN epoch_us(t.event_ts_canonical) % 60000000 = 0 THEN lc.idx_at_start
+      ELSE lc.idx_at_start + CASE WHEN lc.is_business_minute THEN 1 ELSE 0 END
+    END AS event_idx
+  FROM ${staging}.event_transitions t
+  CROSS JOIN spine_bounds sb
+  LEFT JOIN minute_lookup lp
+    ON lp.epoch_minute = epoch_us(t.prev_event_ts) // 60000000
+  LEFT JOIN minute_lookup lc
+    ON lc.epoch_minute = epoch_us(t.event_ts_canonical) // 60000000
+)
+SELECT
+  i.case_id,
+  m.intake_date,
+  m.tier,
+  i.transition_seq,
+  i.prev_status,
+  i.status,
+  i.is_allowed,
+  -- GREATEST ignores NULLs, so an unmapped side must stay NULL explicitly
+  CASE WHEN i.prev_idx IS NOT NULL AND i.event_idx IS NOT NULL THEN GREATEST(0, i.event_idx - i.prev_idx) END AS business_minutes
+FROM idx i
+JOIN ${staging}.case_milestones m
+  ON m.case_id = i.case_id;
@@ -8,19 +8,19 @@
 --
 -- Output: one row per reopened case with estimated rework minutes.
 
-CREATE OR REPLACE TABLE staging.reopen_penalty AS
+CREATE OR REPLACE TABLE ${staging}.reopen_penalty AS
 WITH tier_penalty AS (
   SELECT
     tier,
     quantile_cont(mins_investigation_to_reviewqa, 0.50) AS est_reopen_penalty_business_minutes
-  FROM staging.case_stage_durations
+  FROM ${staging}.case_stage_durations
   WHERE mins_investigation_to_reviewqa IS NOT NULL
   GROUP BY 1
 ),
 reopened_cases AS (
   SELECT DISTINCT
     e.case_id
-  FROM staging.events_clean e
+  FROM ${staging}.events_clean e
   WHERE e.status = 'REOPENED'
 ),
 case_dim AS (
@@ -28,7 +28,7 @@ case_dim AS (
     s.case_id,
     s.tier,
     s.case_type
-  FROM staging.case_sla_metrics s
+  FROM ${staging}.case_sla_metrics s
 )
 SELECT
   r.case_id,
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from src.config import CONFIG, Config
+from src.sql_template import render, scenario_names, sql_params
+
+# written to the caller's ${mart} schema
+SCENARIO_CI_TABLE = "scenario_results_ci"
+DRIVER_CI_TABLE = "driver_summary_ci"
+
+DEFAULT_REPLICATES = 1000
+DEFAULT_CI_LEVEL = 0.95
+# Replicates are drawn in fixed-size chunks, each with its own spawned seed, so results do not
+# depend on how many worker processes share the chunks.
+CHUNK_REPLICATES = 50
+
+# Scenario levers: the S1 cohort and cut are rendered into CASE_MATRIX_SQL with the same parameters
+# as sql/mart/s8_01_scenario_results.sql; the S2 reopen cut is applied to the weighted sums.
+S2_REOPEN_REDUCTION = CONFIG.scenarios.s2_reopen_reduction_pct
+SCENARIO_NAMES = scenario_names(CONFIG)
+
+# Decile picks, mirroring sql/mart/s7_04_driver_summary.sql
+DRIVER_DECILES: Tuple[Tuple[str, int], ...] = (("p50", 5), ("p90", 9), ("p95plus", 10))
+
+# Per-case design matrix: every headline metric is a ratio or difference of weighted column sums,
+# so one replicate is a single weights @ matrix product.
+CASE_COLUMNS: Tuple[str, ...] = (
+    "s1_eligible",
+    "s1_baseline_breach",
+    "s1_scenario_breach",
+    "s1_saved_minutes",
+    "s2_reopen_penalty_minutes",
+) + tuple(
+    f"{label}_{col}"
+    for label, _ in DRIVER_DECILES
+    for col in ("cases", "sla_b_breach", "sla_a_breach")
+)
+
+# Rendered with src/sql_template.py like the step 8 SQL files, plus the decile columns below.
+CASE_MATRIX_SQL = """
+WITH s1 AS (
+  SELECT
+    s.case_id,
+    s.sla_a_breached_including_cw AS breach_inc,
+    GREATEST(0, s.first_resolution_business_minutes_including_cw - ${s1_reduction_pct} * d.mins_investigation_to_reviewqa) > ${sla_a_minutes} AS scenario_breach,
+    ${s1_reduction_pct} * d.mins_investigation_to_reviewqa AS saved_minutes
+  FROM ${staging}.case_sla_metrics s
+  JOIN ${staging}.case_stage_durations d USING(case_id)
+  WHERE s.resolved_ts IS NOT NULL
+    AND s.tier = '${s1_tier}'
+    AND d.mins_investigation_to_reviewqa IS NOT NULL
+),
+reopen AS (
+  SELECT case_id, reopen_penalty_business_minutes
+  FROM ${staging}.reopen_penalty
+  WHERE reopen_penalty_business_minutes IS NOT NULL
+),
+decile AS (
+  SELECT
+    s.case_id,
+    b.bucket,
+    s.sla_b_breached,
+    s.sla_a_breached_including_cw
+  FROM ${staging}.case_sla_metrics s
+  JOIN ${staging}.case_driver_buckets b USING(case_id)
+  WHERE b.driver = 'congestion_exposure'
+)
+SELECT
+  CASE WHEN s1.case_id IS NOT NULL THEN 1 ELSE 0 END,
+  CASE WHEN s1.breach_inc THEN 1 ELSE 0 END,
+  CASE WHEN s1.scenario_breach THEN 1 ELSE 0 END,
+  COALESCE(s1.saved_minutes, 0),
+  COALESCE(r.reopen_penalty_business_minutes, 0),
+  ${decile_columns}
+FROM ${staging}.case_sla_metrics c
+LEFT JOIN s1 USING(case_id)
+LEFT JOIN reopen r USING(case_id)
+LEFT JOIN decile d USING(case_id)
+WHERE s1.case_id IS NOT NULL
+   OR r.case_id IS NOT NULL
+   OR d.bucket IN (${decile_buckets})
+-- fixed row order, so a seed reproduces the same replicate weights per case
+ORDER BY c.case_id
+"""
+DECILE_PARAMS = {
+    "decile_columns": ",\n  ".join(
+        f"CASE WHEN d.bucket = {bucket} THEN 1 ELSE 0 END, "
+        f"CASE WHEN d.bucket = {bucket} AND d.sla_b_breached THEN 1 ELSE 0 END, "
+        f"CASE WHEN d.bucket = {bucket} AND d.sla_a_breached_including_cw THEN 1 ELSE 0 END"
+        for _, bucket in DRIVER_DECILES
+    ),
+    "decile_buckets": ", ".join(str(b) for _, b in DRIVER_DECILES),
+}
+
+_WORKER_MATRIX: Optional[np.ndarray] = None
+
+
+def load_case_matrix(
+    con: duckdb.DuckDBPyConnection,
+    config: Config = CONFIG,
+    schemas: Optional[Dict[str, str]] = None,
+) -> np.ndarray:
+    """
+    One row per case that contributes to any headline metric, columns as in CASE_COLUMNS.
+    Cases outside every cohort carry all-zero rows and are left out (their weights never matter).
+    """
+    sql = render(CASE_MATRIX_SQL, {**sql_params(config, schemas), **DECILE_PARAMS})
+    rows = con.execute(sql).fetchnumpy()
+    return np.column_stack([np.asarray(v, dtype=np.float64) for v in rows.values()])
+
+
+def _init_worker(matrix: np.ndarray) -> None:
+    global _WORKER_MATRIX
+    _WORKER_MATRIX = matrix
+
+
+def _chunk_sums(task: Tuple[np.random.SeedSequence, int]) -> np.ndarray:
+    """
+    Weighted column sums for one chunk of replicates. Poisson(1) weights per case stand in for
+    multinomial resampling, so rows are never copied.
+    """
+    seed_seq, replicates = task
+    rng = np.random.default_rng(seed_seq)
+    weights = rng.poisson(1.0, size=(replicates, _WORKER_MATRIX.shape[0])).astype(np.float64)
+    return weights @ _WORKER_MATRIX
+
+
+def replicate_sums(
+    matrix: np.ndarray,
+    replicates: int = DEFAULT_REPLICATES,
+    seed: int = CONFIG.output.random_seed,
+    workers: Optional[int] = None,
+) -> np.ndarray:
+    """
+    (replicates × columns) weighted sums, computed chunk-wise across a process pool.
+    """
+    sizes = [CHUNK_REPLICATES] * (replicates // CHUNK_REPLICATES)
+    if replicates % CHUNK_REPLICATES:
+        sizes.append(replicates % CHUNK_REPLICATES)
+    tasks = list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(matrix)
+        return np.vstack([_chunk_sums(t) for t in tasks])
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(matrix,)) as pool:
+        return np.vstack(list(pool.map(_chunk_sums, tasks)))
+
+
+def _col(sums: np.ndarray, name: str) -> np.ndarray:
+    return sums[..., CASE_COLUMNS.index(name)]
+
+
+def _pct(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, 100.0 * num / den, np.nan)
+
+
+def scenario_metrics(sums: np.ndarray) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Headline scenario metrics from weighted sums (works for one row or a replicate matrix).
+    Names follow mart.scenario_results.
+    """
+    eligible = _col(sums, "s1_eligible")
+    baseline = _col(sums, "s1_baseline_breach")
+    scenario = _col(sums, "s1_scenario_breach")
+    resolution_hours = _col(sums, "s1_saved_minutes") / 60.0
+    reopen_hours = S2_REOPEN_REDUCTION * _col(sums, "s2_reopen_penalty_minutes") / 60.0
+
+    s1 = {
+        "baseline_breach_pct_inc": _pct(baseline, eligible),
+        "scenario_breach_pct_inc": _pct(scenario, eligible),
+        "breaches_avoided_inc": baseline - scenario,
+        "resolution_hours_saved": resolution_hours,
+        "total_hours_saved": resolution_hours,
+    }
+    return {
+        SCENARIO_NAMES["s1"]: s1,
+        SCENARIO_NAMES["s2"]: {
+            "reopen_hours_saved": reopen_hours,
+            "total_hours_saved": reopen_hours,
+        },
+        SCENARIO_NAMES["s3"]: {
+            "breaches_avoided_inc": s1["breaches_avoided_inc"],
+            "total_hours_saved": resolution_hours + reopen_hours,
+        },
+    }
+
+
+def driver_metrics(sums: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Congestion-decile breach rates and lifts, names follow mart.driver_summary.
+    Decile bounds are held at their full-sample values (staging.driver_bucket_bounds).
+    """
+    out: Dict[str, np.ndarray] = {}
+    for sla, col in (("sla_b", "sla_b_breach"), ("sla_a", "sla_a_breach")):
+        for label, _ in DRIVER_DECILES:
+            out[f"{sla}_breach_{label}_cong"] = _pct(_col(sums, f"{label}_{col}"), _col(sums, f"{label}_cases"))
+        out[f"{sla}_breach_lift_p90_vs_p50"] = out[f"{sla}_breach_p90_cong"] - out[f"{sla}_breach_p50_cong"]
+        out[f"{sla}_breach_lift_p95_vs_p50"] = out[f"{sla}_breach_p95plus_cong"] - out[f"{sla}_breach_p50_cong"]
+    return out
+
+
+def _interval_row(point: float, draws: np.ndarray, ci_level: float) -> Dict:
+    alpha = (1.0 - ci_level) / 2.0
+    lo, hi = np.nanquantile(draws, [alpha, 1.0 - alpha])
+    return {
+        "point_estimate": round(float(point), 4),
+        "ci_lower": round(float(lo), 4),
+        "ci_upper": round(float(hi), 4),
+        "std_error": round(float(np.nanstd(draws, ddof=1)), 4),
+    }
+
+
+def run_bootstrap(
+    con: duckdb.DuckDBPyConnection,
+    replicates: int = DEFAULT_REPLICATES,
+    ci_level: float = DEFAULT_CI_LEVEL,
+    seed: int = CONFIG.output.random_seed,
+    workers: Optional[int] = None,
+    config: Config = CONFIG,
+    schemas: Optional[Dict[str, str]] = None,
+) -> Dict:
+    """
+    Percentile bootstrap intervals for the step 8 scenario headlines and the step 7 driver summary.
+    Reads ${staging} and writes ${mart}.scenario_results_ci / driver_summary_ci of the given schema
+    map (default: staging / mart); returns a run summary.
+    """
+    t0 = time.perf_counter()
+    mart = sql_params(config, schemas)["mart"]
+    matrix = load_case_matrix(con, config, schemas)
+    t1 = time.perf_counter()
+    sums = replicate_sums(matrix, replicates=replicates, seed=seed, workers=workers)
+    t2 = time.perf_counter()
+
+    point = matrix.sum(axis=0)
+    meta = {"replicates": replicates, "ci_level": ci_level, "method": "poisson_bootstrap_percentile"}
+
+    scenario_rows: List[Dict] = []
+    point_s, draws_s = scenario_metrics(point), scenario_metrics(sums)
+    for scenario_name, metrics in point_s.items():
+        for metric, value in metrics.items():
+            scenario_rows.append({
+                "scenario_name": scenario_name,
+                "metric": metric,
+                **_interval_row(value, draws_s[scenario_name][metric], ci_level),
+                **meta,
+            })
+
+    driver_rows: List[Dict] = []
+    point_d, draws_d = driver_metrics(point), driver_metrics(sums)
+    for metric, value in point_d.items():
+        driver_rows.append({"metric": metric, **_interval_row(value, draws_d[metric], ci_level), **meta})
+
+    scenario_df = pd.DataFrame(scenario_rows)
+    driver_df = pd.DataFrame(driver_rows)
+    con.execute(f"CREATE OR REPLACE TABLE {mart}.{SCENARIO_CI_TABLE} AS SELECT * FROM scenario_df")
+    con.execute(f"CREATE OR REPLACE TABLE {mart}.{DRIVER_CI_TABLE} AS SELECT * FROM driver_df")
+    t3 = time.perf_counter()
+
+    return {
+        "replicates": replicates,
+        "ci_level": ci_level,
+        "cases_in_matrix": int(matrix.shape[0]),
+        "runtime_seconds": {
+            "load_matrix": round(t1 - t0, 3),
+            "replicates": round(t2 - t1, 3),
+            "write_tables": round(t3 - t2, 3),
+        },
+        "scenario_ci_rows": len(scenario_rows),
+        "driver_ci_rows": len(driver_rows),
+    }
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from src.config import CONFIG
+
+
+class BusinessClock:
+    """
+    Business-minute index over epoch seconds, the in-memory twin of staging.business_minutes_dim.
+
+    index(ts) is the number of business minutes starting strictly before ts, i.e. the index of the
+    first business minute at/after ts (the ASOF "last minute <= ts, +1 if strictly before" rule in
+    sql/staging/s5_02_case_sla_metrics.sql). Business minutes between a and b = index(b) - index(a).
+    """
+
+    def __init__(self, minute_starts: np.ndarray, last_date: Optional[date] = None):
+        # epoch seconds (UTC) of every business minute start, ascending
+        self.minute_starts = np.asarray(minute_starts, dtype=np.int64)
+        # last calendar day the spine accounts for (business or not); extend_through appends after it
+        self.last_date = last_date
+
+    @classmethod
+    def from_dates(
+        cls,
+        business_dates: Iterable[date],
+        tz: str = CONFIG.teams.primary_tz,
+        start_hour: int = CONFIG.business_hours.start_hour,
+        end_hour: int = CONFIG.business_hours.end_hour,
+    ) -> "BusinessClock":
+        days = pd.DatetimeIndex(sorted(pd.Timestamp(d) for d in business_dates))
+        # local opening time per day, localized so DST shifts land on the right UTC instant
+        opens = (days + pd.Timedelta(hours=start_hour)).tz_localize(tz)
+        open_epoch = opens.asi8 // 1_000_000_000
+        offsets = np.arange((end_hour - start_hour) * 60, dtype=np.int64) * 60
+        last_date = days[-1].date() if len(days) else None
+        return cls((open_epoch[:, None] + offsets[None, :]).ravel(), last_date)
+
+    @classmethod
+    def from_warehouse(cls, con: duckdb.DuckDBPyConnection, tz: str = CONFIG.teams.primary_tz) -> "BusinessClock":
+        """Business days from raw.calendar_dim (weekends and holidays excluded)."""
+        rows = con.execute("""
+            SELECT cal_date::DATE
+            FROM raw.calendar_dim
+            WHERE NOT is_weekend
+              AND NOT is_holiday
+            ORDER BY 1
+        """).fetchall()
+        clock = cls.from_dates([r[0] for r in rows], tz)
+        clock.last_date = con.execute("SELECT MAX(cal_date)::DATE FROM raw.calendar_dim").fetchone()[0]
+        return clock
+
+    def extend_through(
+        self,
+        last_date: date,
+        tz: str = CONFIG.teams.primary_tz,
+        start_hour: int = CONFIG.business_hours.start_hour,
+        end_hour: int = CONFIG.business_hours.end_hour,
+        workdays: Iterable[int] = CONFIG.business_hours.workdays,
+    ) -> None:
+        """
+        Append business minutes for the days after the spine through last_date, from the config's
+        workdays and hours. raw.calendar_dim stops at the end of the generated window, so there are
+        no holidays to exclude past it. Existing indexes do not change.
+        """
+        if self.last_date is not None and last_date <= self.last_date:
+            return
+        first = self.last_date + timedelta(days=1) if self.last_date is not None else last_date
+        workdays = set(workdays)
+        days = [d.date() for d in pd.date_range(first, last_date, freq="D") if d.weekday() in workdays]
+        extra = BusinessClock.from_dates(days, tz, start_hour, end_hour).minute_starts
+        self.minute_starts = np.concatenate([self.minute_starts, extra])
+        self.last_date = last_date
+
+    def index(self, epoch_seconds: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self.minute_starts, np.asarray(epoch_seconds, dtype=np.float64), side="left")
+
+    def minutes_between(self, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        return np.maximum(0, self.index(end) - self.index(start))
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import re
+from typing import List, Sequence, Tuple
+
+import duckdb
+
+from src.sql_template import render_sql_file
+
+# Case-scoped rebuilds of case-keyed staging tables, shared by the stream ingestor (cases touched
+# by a micro-batch) and the incremental step 4 (cases with events past the ingestion watermark).
+# Callers fill BATCH_CASES with the case_ids to rebuild, then run refresh_batch_cases.
+BATCH_CASES = "refresh_batch_cases"
+# Case-keyed inputs of the refresh files. Each is swapped for a temp slice holding only the batch's
+# cases, so the batch queries (including their correlated subqueries) never scan full tables.
+CASE_KEYED_SOURCES = ("raw.cases", "raw.events_log")
+
+_CREATE_TABLE = re.compile(r"CREATE OR REPLACE TABLE\s+([\w.]+)\s+AS\s+(.*?);?\s*$", re.S | re.I)
+
+
+# The BETWEEN bounds (min/max batch case_id, bound as parameters) let zone maps skip row groups;
+# new cases carry the highest ids, so most of each table is never read.
+_BATCH_FILTER = f"case_id BETWEEN ? AND ? AND case_id IN (SELECT case_id FROM {BATCH_CASES})"
+
+# (sql, needs_bounds): needs_bounds marks the statements that embed _BATCH_FILTER and take [lo, hi]
+Statement = Tuple[str, bool]
+
+
+def _slice_name(table: str) -> str:
+    return "batch_slice_" + table.replace(".", "_")
+
+
+def split_create_table(sql: str) -> Tuple[str, str]:
+    """(target, query) of a file holding a single `CREATE OR REPLACE TABLE <target> AS <query>`."""
+    m = _CREATE_TABLE.search(sql)
+    if m is None:
+        raise ValueError("Expected a single CREATE OR REPLACE TABLE ... AS statement")
+    return m.group(1), m.group(2)
+
+
+def scoped_refresh_sql(sql: str, sliced: List[str]) -> List[Statement]:
+    """
+    Statements that rebuild only the batch's cases of a `CREATE OR REPLACE TABLE <target> AS <query>`
+    file: the query runs over the batch slices of its case-keyed inputs into a slice of the target,
+    which then replaces the target's rows for those cases. Every refreshed table is keyed by case_id
+    and its rows depend only on the same case's rows upstream, so this equals a full rebuild.
+    `sliced` lists tables already available as slices; the target is appended to it.
+    """
+    target, query = split_create_table(sql)
+    for table in sliced:
+        query = re.sub(rf"\b{re.escape(table)}\b", _slice_name(table), query)
+    sliced.append(target)
+    return [
+        (f"CREATE OR REPLACE TEMP TABLE {_slice_name(target)} AS\n{query}", False),
+        (f"DELETE FROM {target} WHERE {_BATCH_FILTER}", True),
+        (f"INSERT INTO {target} SELECT * FROM {_slice_name(target)}", False),
+    ]
+
+
+def refresh_statements(sql_files: List[str], sources: Sequence[str] = CASE_KEYED_SOURCES) -> List[Statement]:
+    """
+    Scoped refresh statements for SQL files in pipeline order (each may read earlier targets).
+    `sources` are the case-keyed tables the first file reads; they are sliced to the batch.
+    """
+    sliced = list(sources)
+    return [stmt for f in sql_files for stmt in scoped_refresh_sql(render_sql_file(f), sliced)]
+
+
+def refresh_batch_cases(
+    con: duckdb.DuckDBPyConnection,
+    statements: List[Statement],
+    sources: Sequence[str] = CASE_KEYED_SOURCES,
+) -> int:
+    """
+    Rebuild the cases listed in BATCH_CASES with `statements` (from refresh_statements, with the
+    same `sources`) and return how many cases that was. Runs in the caller's transaction.
+    """
+    affected, lo, hi = con.execute(f"SELECT COUNT(*), MIN(case_id), MAX(case_id) FROM {BATCH_CASES}").fetchone()
+    if not affected:
+        return 0
+    for table in sources:
+        con.execute(f"CREATE OR REPLACE TEMP TABLE {_slice_name(table)} AS SELECT * FROM {table} WHERE {_BATCH_FILTER}", [lo, hi])
+    for stmt, needs_bounds in statements:
+        con.execute(stmt, [lo, hi] if needs_bounds else None)
+    return int(affected)
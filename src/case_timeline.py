@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from src.warehouse import current_path
+
+# None = follow the published warehouse snapshot (src/warehouse.py CURRENT pointer)
+DB_PATH: Optional[str] = None
+STORE_DIR = Path("data/timeline")
+OUT_PATH = Path("reports/run_summaries/case_timeline_summary.json")
+
+EVENTS_FILE = "events.arrow"
+EVENTS_INDEX_FILE = "events_index.arrow"
+CASES_FILE = "cases.arrow"
+BATCH_ROWS = 1_000_000
+BENCHMARK_LOOKUPS = 1000
+
+# Deduped events clustered by case (ties broken like the step 4 dedup ordering).
+EVENTS_SQL = """
+SELECT *
+FROM staging.events_clean
+ORDER BY case_id, event_ts_canonical, event_id
+"""
+
+# Row range per case in EVENTS_SQL order: start = running count of earlier cases.
+EVENTS_INDEX_SQL = """
+SELECT
+  case_id,
+  -- the frame is empty (NULL) for the first case
+  CAST(COALESCE(SUM(COUNT(*)) OVER (ORDER BY case_id ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0) AS BIGINT) AS row_start,
+  CAST(COUNT(*) AS BIGINT) AS row_count
+FROM staging.events_clean
+GROUP BY case_id
+ORDER BY case_id
+"""
+
+# One row per case: milestones plus SLA metrics (NULL for cases without a terminal milestone).
+CASES_SQL = """
+SELECT
+  m.*,
+  s.first_touch_business_minutes,
+  s.first_resolution_business_minutes_including_cw,
+  s.customer_wait_business_minutes,
+  s.first_resolution_business_minutes_paused_cw,
+  s.sla_b_breached,
+  s.sla_a_breached_including_cw,
+  s.sla_a_breached_paused_cw
+FROM staging.case_milestones m
+LEFT JOIN staging.case_sla_metrics s USING(case_id)
+ORDER BY m.case_id
+"""
+
+
+def _write_arrow(con: duckdb.DuckDBPyConnection, sql: str, path: Path) -> int:
+    """Stream a query into an Arrow IPC file batch by batch (never the whole result in memory)."""
+    reader = con.execute(sql).fetch_record_batch(BATCH_ROWS)
+    rows = 0
+    with ipc.new_file(path, reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def build_store(con: duckdb.DuckDBPyConnection, store_dir: Path = STORE_DIR) -> Dict[str, int]:
+    store_dir.mkdir(parents=True, exist_ok=True)
+    return {
+        "events": _write_arrow(con, EVENTS_SQL, store_dir / EVENTS_FILE),
+        "events_index": _write_arrow(con, EVENTS_INDEX_SQL, store_dir / EVENTS_INDEX_FILE),
+        "cases": _write_arrow(con, CASES_SQL, store_dir / CASES_FILE),
+    }
+
+
+def _open_mapped(path: Path) -> pa.Table:
+    # memory-mapped IPC: columns are zero-copy views of the file, pages load on first touch
+    return ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+
+def _sorted_keys(table: pa.Table) -> np.ndarray:
+    return np.asarray(table.column("case_id").to_numpy(zero_copy_only=False), dtype=str)
+
+
+class CaseTimelineStore:
+    """
+    Read side of the timeline store. Case lookups are a binary search over the sorted case keys of
+    the index files, then a zero-copy slice of the mapped events / cases tables.
+    """
+
+    def __init__(self, store_dir: Path = STORE_DIR):
+        self.events = _open_mapped(store_dir / EVENTS_FILE)
+        index = _open_mapped(store_dir / EVENTS_INDEX_FILE)
+        self.cases = _open_mapped(store_dir / CASES_FILE)
+
+        self._event_keys = _sorted_keys(index)
+        self._row_start = index.column("row_start").to_numpy()
+        self._row_count = index.column("row_count").to_numpy()
+        self._case_keys = _sorted_keys(self.cases)
+
+    @staticmethod
+    def _find(keys: np.ndarray, case_id: str) -> Optional[int]:
+        i = int(np.searchsorted(keys, case_id))
+        return i if i < len(keys) and keys[i] == case_id else None
+
+    def events_for(self, case_id: str) -> List[Dict]:
+        i = self._find(self._event_keys, case_id)
+        if i is None:
+            return []
+        return self.events.slice(int(self._row_start[i]), int(self._row_count[i])).to_pylist()
+
+    def case_for(self, case_id: str) -> Optional[Dict]:
+        i = self._find(self._case_keys, case_id)
+        return None if i is None else self.cases.slice(i, 1).to_pylist()[0]
+
+    def timeline(self, case_id: str) -> Dict:
+        """Ordered deduped events, milestones and SLA metrics for one case."""
+        return {"case_id": case_id, "case": self.case_for(case_id), "events": self.events_for(case_id)}
+
+
+def run(store_dir: Path = STORE_DIR, lookups: int = BENCHMARK_LOOKUPS) -> Dict:
+    t0 = time.perf_counter()
+    con = duckdb.connect(DB_PATH or str(current_path()), read_only=True)
+    counts = build_store(con, store_dir)
+    con.close()
+    t_build = time.perf_counter()
+
+    store = CaseTimelineStore(store_dir)
+    t_open = time.perf_counter()
+
+    rng = np.random.default_rng(0)
+    sample = rng.choice(store._case_keys, size=min(lookups, len(store._case_keys)), replace=False)
+    # the first and last keys sit on the edges of the row ranges, which random samples rarely hit
+    sample = np.concatenate([store._case_keys[[0, -1]], sample])
+    latencies = []
+    for case_id in sample:
+        t1 = time.perf_counter()
+        store.timeline(str(case_id))
+        latencies.append(1000 * (time.perf_counter() - t1))
+    latencies_ms = np.asarray(latencies)
+
+    out = {
+        "step": "case_timeline",
+        "runtime_seconds": {
+            "build": round(t_build - t0, 3),
+            "open": round(t_open - t_build, 3),
+        },
+        "counts": counts,
+        "bytes": {f.name: f.stat().st_size for f in sorted(store_dir.glob("*.arrow"))},
+        "lookup_ms": {
+            "lookups": int(len(latencies_ms)),
+            "p50": round(float(np.percentile(latencies_ms, 50)), 3),
+            "p99": round(float(np.percentile(latencies_ms, 99)), 3),
+            "max": round(float(latencies_ms.max()), 3),
+        },
+    }
+
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    OUT_PATH.write_text(json.dumps(out, indent=2), encoding="utf-8")
+    print(json.dumps(out, indent=2))
+    print(f"\nWrote: {OUT_PATH}")
+    return out
+
+
+if __name__ == "__main__":
+    run()
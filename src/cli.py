@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import time
+
+_T_START = time.perf_counter()
+
+import argparse
+import importlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Nothing heavy is imported at module level: duckdb is imported when a command opens the
+# warehouse, and each step module (with its pandas / numpy / pyarrow imports) only when it runs.
+
+# None = follow the published warehouse snapshot (src/warehouse.py CURRENT pointer)
+DB_PATH: Optional[str] = None
+OUT_PATH = Path("reports/run_summaries/cli_run_summary.json")
+
+# Pipeline step number -> module; step 2 takes the generation mode, the rest expose run().
+STEPS: Dict[int, str] = {
+    2: "src.s2_generate_and_load",
+    3: "src.s3_raw_qa",
+    4: "src.s4_build_staging",
+    5: "src.s5_build_sla_engine",
+    6: "src.s6_build_marts",
+    7: "src.s7_driver_analysis",
+    8: "src.s8_scenario_modeling",
+    9: "src.s9_export_for_tableau",
+}
+DEFAULT_STEPS = "2-9"
+
+
+def parse_steps(spec: str) -> List[int]:
+    """'3-9' or '2,4-6' -> step numbers in pipeline order."""
+    steps = set()
+    for part in spec.split(","):
+        lo, _, hi = part.strip().partition("-")
+        steps.update(range(int(lo), int(hi or lo) + 1))
+    unknown = sorted(steps - set(STEPS))
+    if unknown:
+        raise ValueError(f"Unknown step(s): {', '.join(map(str, unknown))} (valid: {min(STEPS)}-{max(STEPS)})")
+    return sorted(steps)
+
+
+def run_steps(
+    steps: List[int],
+    db_path: Optional[str] = DB_PATH,
+    mode: str = "dev",
+    step_kwargs: Optional[Dict[int, Dict]] = None,
+) -> Dict:
+    """
+    Run steps in one process against db_path (default: the published snapshot, updated in place;
+    --snapshot builds a new one instead). The warehouse is opened once up front and held
+    open: each step's own duckdb.connect() of the same file then attaches to that database
+    instance (warm catalog and buffer pool) instead of reopening the file.
+    """
+    step_kwargs = step_kwargs or {}
+    t0 = time.perf_counter()
+    import duckdb
+
+    from src.warehouse import current_path, run_step
+
+    db_path = db_path or str(current_path())
+    shared = duckdb.connect(db_path)
+    t_connect = time.perf_counter()
+
+    import_seconds: Dict[str, float] = {}
+    run_seconds: Dict[str, float] = {}
+    try:
+        for step in steps:
+            name = STEPS[step]
+            t1 = time.perf_counter()
+            importlib.import_module(name)
+            t2 = time.perf_counter()
+            run_step(name, db_path, mode=mode, **step_kwargs.get(step, {}))
+            import_seconds[name] = round(t2 - t1, 3)
+            run_seconds[name] = round(time.perf_counter() - t2, 3)
+    finally:
+        shared.close()
+
+    return {
+        "steps": steps,
+        "db_path": db_path,
+        "runtime_seconds": {
+            # this module imported -> first command dispatched
+            "cli_startup": round(t0 - _T_START, 3),
+            "duckdb_import_and_connect": round(t_connect - t0, 3),
+            "imports_by_step": import_seconds,
+            "by_step": run_seconds,
+            "end_to_end": round(time.perf_counter() - _T_START, 3),
+        },
+    }
+
+
+def _write(out: Dict) -> Dict:
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    OUT_PATH.write_text(json.dumps(out, indent=2), encoding="utf-8")
+    print(json.dumps(out, indent=2))
+    print(f"\nWrote: {OUT_PATH}")
+    return out
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="opsla", description="Ops SLA warehouse pipeline.")
+    parser.add_argument("--db", default=DB_PATH, help="warehouse database file (default: published snapshot)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="run pipeline steps in one process")
+    run_p.add_argument("--steps", default=DEFAULT_STEPS, help="step numbers, e.g. 3-9 or 2,4-6")
+    run_p.add_argument("--mode", choices=["dev", "full"], default="dev", help="generation mode for step 2")
+    run_p.add_argument("--snapshot", action="store_true", help="build into a new warehouse snapshot and publish it (src/warehouse.py)")
+
+    gen_p = sub.add_parser("generate", help="step 2: generate synthetic data and load raw tables")
+    gen_p.add_argument("--mode", choices=["dev", "full"], default="dev")
+
+    export_p = sub.add_parser("export", help="step 9: incremental Tableau exports")
+    export_p.add_argument("--force", action="store_true", help="rewrite every export file")
+    export_p.add_argument("--workers", type=int, default=None)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    args = build_parser().parse_args(argv)
+
+    if args.command == "run" and args.snapshot:
+        from src.warehouse import run_pipeline
+
+        steps = parse_steps(args.steps)
+        return _write(run_pipeline([STEPS[s] for s in steps], mode=args.mode))
+    if args.command == "run":
+        return _write(run_steps(parse_steps(args.steps), args.db, args.mode))
+    if args.command == "generate":
+        return _write(run_steps([2], args.db, args.mode))
+
+    export_kwargs = {"force": args.force}
+    if args.workers is not None:
+        export_kwargs["max_workers"] = args.workers
+    return _write(run_steps([9], args.db, step_kwargs={9: export_kwargs}))
+
+
+if __name__ == "__main__":
+    main()
@@ -48,6 +48,37 @@ class States:
     )
     side_states: Tuple[str, ...] = ("REOPENED", "ESCALATED", "CANCELLED")
 
+    # Transition rules (validated in step 4 against staging.events_clean)
+    optional_stages: Tuple[str, ...] = ("CUSTOMER_WAIT",)  # may be skipped; returns to the stage before it
+    terminal_states: Tuple[str, ...] = ("RESOLVED", "CANCELLED")
+
+    def allowed_transitions(self) -> List[Tuple[Optional[str], str]]:
+        """
+        (from, to) status pairs a case may take; from = None is the first event of a case.
+        - cases start at INTAKE and move one main-flow stage at a time
+        - an optional stage may be skipped, and returns to the stage before it (CW -> INVESTIGATION)
+        - ESCALATED is entered from any in-progress stage (ASSIGNMENT .. REVIEW_QA) and exits to
+          any in-progress stage or RESOLVED
+        - CANCELLED ends any open case; RESOLVED may only be REOPENED, which re-enters progress
+        """
+        reopened, escalated, cancelled = self.side_states
+        flow = list(self.main_flow)
+        start, resolved = flow[0], flow[-1]
+        in_progress = flow[2:-1]
+
+        pairs = {(None, start)}
+        pairs.update(zip(flow, flow[1:]))
+        for stage in self.optional_stages:
+            i = flow.index(stage)
+            pairs.add((flow[i - 1], flow[i + 1]))
+            pairs.add((stage, flow[i - 1]))
+        pairs.update((s, escalated) for s in in_progress)
+        pairs.update((escalated, s) for s in in_progress + [resolved])
+        pairs.update((s, cancelled) for s in flow[:-1] + [escalated])
+        pairs.add((resolved, reopened))
+        pairs.update((reopened, s) for s in in_progress)
+        return sorted(pairs, key=lambda p: (p[0] or "", p[1]))
+
 
 @dataclass(frozen=True)
 class BusinessHours:
@@ -266,6 +297,33 @@ class MessyDataRates:
         )
 
 
+# Day weightings sql/staging/s7_00_case_congestion_exposure.sql implements
+CONGESTION_EXPOSURE_WEIGHTINGS: Tuple[str, ...] = ("uniform", "linear_decay")
+
+
+@dataclass(frozen=True)
+class DriverAnalysis:
+    # Step 7 congestion exposure window: intake -> resolved, capped at N business days
+    congestion_exposure_cap_biz_days: int = 10
+    # 'uniform' averages the window's days; 'linear_decay' front-loads the early days
+    congestion_exposure_weighting: str = "uniform"
+
+    def __post_init__(self):
+        if self.congestion_exposure_weighting not in CONGESTION_EXPOSURE_WEIGHTINGS:
+            raise ValueError(
+                f"congestion_exposure_weighting must be one of {CONGESTION_EXPOSURE_WEIGHTINGS}, "
+                f"got {self.congestion_exposure_weighting!r}"
+            )
+
+
+@dataclass(frozen=True)
+class ScenarioLevers:
+    # Step 8 counterfactuals (mart.scenario_results and its bootstrap intervals)
+    s1_tier: str = "TIER_3"
+    s1_stage_reduction_pct: float = 0.20   # share of investigation -> review QA time removed
+    s2_reopen_reduction_pct: float = 0.25  # share of estimated reopen rework removed
+
+
 @dataclass(frozen=True)
 class OutputControls:
     # We will generate files in partitions to avoid memory spikes.
@@ -290,6 +348,8 @@ class Config:
     congestion: CongestionEffects = CongestionEffects()
     stage_times: StageTimeDistributions = StageTimeDistributions()
     messy: MessyDataRates = MessyDataRates()
+    drivers: DriverAnalysis = DriverAnalysis()
+    scenarios: ScenarioLevers = ScenarioLevers()
     output: OutputControls = OutputControls()
 
 
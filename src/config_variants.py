@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, List, Set
+
+import duckdb
+
+from src.config import CONFIG, Config
+from src.sample_pipeline import SQL_FILES
+from src.sql_template import DEFAULT_SCHEMAS, render_sql_file, variant_schemas
+from src.telemetry import StepTelemetry, sql_tables
+
+DB_PATH = "ops_warehouse.duckdb"
+OUT_PATH = Path("reports/run_summaries/config_variants_summary.json")
+COMPARISON_TABLE = "mart.config_variant_comparison"
+
+# Alternative metric definitions, each built into staging_<name> / mart_<name> from the shared
+# raw layer. The baseline is the regular pipeline build (CONFIG into staging / mart).
+VARIANTS: Dict[str, Config] = {
+    "v2": replace(CONFIG, sla=replace(CONFIG.sla, first_resolution_hours=20.0, first_touch_hours=1.5)),
+    "v3": replace(
+        CONFIG,
+        business_hours=replace(CONFIG.business_hours, start_hour=7, end_hour=19),
+        drivers=replace(CONFIG.drivers, congestion_exposure_cap_biz_days=5),
+        scenarios=replace(CONFIG.scenarios, s1_stage_reduction_pct=0.30, s2_reopen_reduction_pct=0.40),
+    ),
+}
+
+# Headline metrics compared per variant: (metric, SQL over a {staging} / {mart} schema pair).
+# Scenario rows are keyed by their S1 / S2 / S3 prefix, since the names carry the lever values.
+HEADLINE_SQL = """
+SELECT 'sla_b_breach_pct' AS metric,
+       ROUND(100.0 * AVG(CAST(sla_b_breached AS INT)), 4) AS value
+FROM {staging}.case_sla_metrics WHERE resolved_ts IS NOT NULL
+UNION ALL
+SELECT 'sla_a_breach_pct_including_cw',
+       ROUND(100.0 * AVG(CAST(sla_a_breached_including_cw AS INT)), 4)
+FROM {staging}.case_sla_metrics WHERE resolved_ts IS NOT NULL
+UNION ALL
+SELECT 'sla_a_breach_pct_paused_cw',
+       ROUND(100.0 * AVG(CAST(sla_a_breached_paused_cw AS INT)), 4)
+FROM {staging}.case_sla_metrics WHERE resolved_ts IS NOT NULL
+UNION ALL
+SELECT 'median_first_resolution_business_minutes_including_cw',
+       CAST(MEDIAN(first_resolution_business_minutes_including_cw) AS DOUBLE)
+FROM {staging}.case_sla_metrics WHERE resolved_ts IS NOT NULL
+UNION ALL
+SELECT split_part(scenario_name, '_', 1) || '_scenario_breach_pct_inc', CAST(scenario_breach_pct_inc AS DOUBLE)
+FROM {mart}.scenario_results WHERE scenario_breach_pct_inc IS NOT NULL
+UNION ALL
+SELECT split_part(scenario_name, '_', 1) || '_total_hours_saved', CAST(total_hours_saved AS DOUBLE)
+FROM {mart}.scenario_results
+"""
+
+COMPARISON_DDL = f"""
+CREATE TABLE IF NOT EXISTS {COMPARISON_TABLE} (
+  variant VARCHAR,
+  metric VARCHAR,
+  baseline_value DOUBLE,
+  variant_value DOUBLE,
+  delta DOUBLE,
+  computed_at TIMESTAMP
+)
+"""
+
+
+def _qualify(table: str, schemas: Dict[str, str]) -> str:
+    layer, name = table.split(".")
+    return f"{schemas[layer]}.{name}"
+
+
+def build_variant(con: duckdb.DuckDBPyConnection, name: str, config: Config) -> Dict:
+    """
+    Run the steps 4-8 SQL chain for one variant into its own schemas. A file whose SQL renders
+    the same under the variant config as under CONFIG, and whose staging / mart inputs were
+    themselves reused, would rebuild identical tables: its outputs become views over the
+    baseline tables instead.
+    """
+    schemas = variant_schemas(name)
+    for layer in ("staging", "mart"):
+        con.execute(f"CREATE SCHEMA IF NOT EXISTS {schemas[layer]}")
+
+    reused: Set[str] = set()
+    by_file: Dict[str, Dict] = {}
+    for f in SQL_FILES:
+        t0 = time.perf_counter()
+        at_base = render_sql_file(f, config, DEFAULT_SCHEMAS)
+        tables = sql_tables(at_base)
+        derived_inputs = [t for t in tables["in"] if not t.startswith("raw.")]
+        if at_base == render_sql_file(f) and all(t in reused for t in derived_inputs):
+            for table in tables["out"]:
+                con.execute(f"CREATE OR REPLACE VIEW {_qualify(table, schemas)} AS SELECT * FROM {table}")
+            reused.update(tables["out"])
+            mode = "view"
+        else:
+            # a view left by an earlier run must go before the table of the same name is created
+            for table in tables["out"]:
+                con.execute(f"DROP VIEW IF EXISTS {_qualify(table, schemas)}")
+            con.execute(render_sql_file(f, config, schemas))
+            mode = "built"
+        by_file[f] = {"mode": mode, "wall_seconds": round(time.perf_counter() - t0, 3)}
+
+    return {"schemas": schemas, "by_file": by_file}
+
+
+def headlines(con: duckdb.DuckDBPyConnection, schemas: Dict[str, str]) -> Dict[str, float]:
+    return dict(con.execute(HEADLINE_SQL.format(**schemas)).fetchall())
+
+
+def write_comparison(con: duckdb.DuckDBPyConnection, names: List[str]) -> List[Dict]:
+    """Replace each variant's rows in the comparison mart with its deltas against the baseline."""
+    baseline = headlines(con, DEFAULT_SCHEMAS)
+    rows = []
+    for name in names:
+        variant = headlines(con, variant_schemas(name))
+        for metric, base_value in baseline.items():
+            value = variant.get(metric)
+            delta = None if value is None or base_value is None else round(value - base_value, 4)
+            rows.append({"variant": name, "metric": metric, "baseline_value": base_value, "variant_value": value, "delta": delta})
+
+    con.execute(COMPARISON_DDL)
+    con.execute(f"DELETE FROM {COMPARISON_TABLE} WHERE variant IN ({', '.join('?' for _ in names)})", names)
+    con.executemany(
+        f"INSERT INTO {COMPARISON_TABLE} VALUES (?, ?, ?, ?, ?, current_timestamp)",
+        [[r["variant"], r["metric"], r["baseline_value"], r["variant_value"], r["delta"]] for r in rows],
+    )
+    return rows
+
+
+def run(names: List[str] = None) -> Dict:
+    names = names or list(VARIANTS)
+    unknown = sorted(set(names) - set(VARIANTS))
+    if unknown:
+        raise ValueError(f"Unknown variant(s): {', '.join(unknown)} (defined: {', '.join(VARIANTS)})")
+
+    t0 = time.perf_counter()
+    con = duckdb.connect(DB_PATH)
+    telemetry = StepTelemetry("config_variants")
+
+    # One cursor (its own DuckDB connection to the shared database) per variant; variants write
+    # disjoint schemas, so their chains run concurrently on DuckDB's thread pool.
+    def build(name: str) -> Dict:
+        cursor = con.cursor()
+        t1 = time.perf_counter()
+        try:
+            result = build_variant(cursor, name, VARIANTS[name])
+        finally:
+            cursor.close()
+        telemetry.record(f"variant {name}", wall_seconds=round(time.perf_counter() - t1, 3))
+        return result
+
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        variants = dict(zip(names, pool.map(build, names)))
+    t_build = time.perf_counter()
+
+    comparison = write_comparison(con, names)
+    step_usage = telemetry.finish(con)
+    con.close()
+    t_end = time.perf_counter()
+
+    out = {
+        "step": "config_variants",
+        "runtime_seconds": {
+            "variants_concurrent": round(t_build - t0, 3),
+            "comparison": round(t_end - t_build, 3),
+            "end_to_end": round(t_end - t0, 3),
+        },
+        "telemetry": step_usage,
+        "variants": variants,
+        "comparison_table": COMPARISON_TABLE,
+        "comparison": comparison,
+    }
+
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    OUT_PATH.write_text(json.dumps(out, indent=2, default=str), encoding="utf-8")
+    print(json.dumps(out, indent=2, default=str))
+    print(f"\nWrote: {OUT_PATH}")
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build config variants into staging_<v> / mart_<v> and compare headlines.")
+    parser.add_argument("--variants", nargs="+", default=None, help=f"variants to build (default: all of {', '.join(VARIANTS)})")
+    args = parser.parse_args()
+
+    run(args.variants)
@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import duckdb
+
+from src.warehouse import current_path
+
+# None = follow the published warehouse snapshot (src/warehouse.py CURRENT pointer)
+DB_PATH: Optional[str] = None
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+POOL_SIZE = 4
+CACHE_ENTRIES = 512
+MAX_ROWS = 50_000
+IDLE_RELEASE_SECONDS = 2.0
+
+# Served marts (name in the URL -> table). Only these tables are reachable.
+MARTS: Dict[str, str] = {
+    "sla_daily": "mart.sla_daily",
+    "sla_by_tier_case_type": "mart.sla_by_tier_case_type",
+    "sla_cube": "mart.sla_cube",
+    "driver_stage_durations": "mart.driver_stage_durations",
+    "driver_reopen_impact": "mart.driver_reopen_impact",
+    "driver_congestion_buckets": "mart.driver_congestion_buckets",
+    "driver_summary": "mart.driver_summary",
+    "scenario_results": "mart.scenario_results",
+}
+
+# Query-string filters -> column; a filter is accepted only by marts that have the column.
+DATE_COLUMN = "intake_date"
+EQUALITY_FILTERS: Tuple[str, ...] = ("tier", "case_type", "grain")
+
+
+def resolve_db_path(db_path: Optional[str] = DB_PATH) -> str:
+    return db_path or str(current_path())
+
+
+def run_id(db_path: Optional[str] = DB_PATH) -> str:
+    """
+    Identity of the warehouse contents: file name, size and mtime of the database (and its WAL).
+    Publishing a new snapshot or any completed in-place write changes it, invalidating cached results.
+    """
+    db_path = resolve_db_path(db_path)
+    parts = []
+    for path in (Path(db_path), Path(f"{db_path}.wal")):
+        if path.exists():
+            st = path.stat()
+            parts.append(f"{path.name}:{st.st_size}:{st.st_mtime_ns}")
+    return "|".join(parts)
+
+
+class ConnectionPool:
+    """
+    Fixed pool of cursors on one read-only connection, opened on demand. Handlers borrow a cursor
+    per uncached query. The connection is reopened when the run id changes (so readers see the new
+    build) and released after IDLE_RELEASE_SECONDS without queries, so an idle service does not
+    hold the file lock while the pipeline writes; cached slices are still served meanwhile.
+    """
+
+    def __init__(self, db_path: Optional[str] = DB_PATH, size: int = POOL_SIZE, idle_release_seconds: float = IDLE_RELEASE_SECONDS):
+        self.db_path = db_path
+        self.size = size
+        self.idle_release_seconds = idle_release_seconds
+        self._lock = threading.Lock()
+        self._con: Optional[duckdb.DuckDBPyConnection] = None
+        self._cursors: "queue.Queue[duckdb.DuckDBPyConnection]" = queue.Queue()
+        self._last_used = time.monotonic()
+        self.run_id = ""
+
+    def _close(self) -> None:
+        if self._con is not None:
+            # wait for in-flight queries to hand their cursors back, then drop the instance
+            for _ in range(self.size):
+                self._cursors.get()
+            self._con.close()
+            self._con = None
+
+    def refresh(self) -> str:
+        """Open (or reopen on a new run id) the connection; returns the run id it reads."""
+        current = run_id(self.db_path)
+        if self._con is None or current != self.run_id:
+            with self._lock:
+                if self._con is None or current != self.run_id:
+                    self._close()
+                    self._con = duckdb.connect(resolve_db_path(self.db_path), read_only=True)
+                    self._cursors = queue.Queue()
+                    for _ in range(self.size):
+                        self._cursors.put(self._con.cursor())
+                    self.run_id = current
+        return self.run_id
+
+    @contextmanager
+    def cursor(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        while True:
+            # re-check on timeout: a refresh or idle release may have drained the queue we waited on
+            if self._con is None:
+                self.refresh()
+            cursors = self._cursors
+            try:
+                cur = cursors.get(timeout=0.05)
+                break
+            except queue.Empty:
+                continue
+        try:
+            yield cur
+        finally:
+            self._last_used = time.monotonic()
+            cursors.put(cur)
+
+    def release_if_idle(self) -> bool:
+        with self._lock:
+            idle = time.monotonic() - self._last_used > self.idle_release_seconds
+            if self._con is None or not idle or self._cursors.qsize() < self.size:
+                return False
+            self._close()
+            return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+
+class ResultCache:
+    """LRU of encoded responses keyed by (run id, query); a new run id empties it."""
+
+    def __init__(self, max_entries: int = CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._run_id = ""
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, current_run_id: str, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            if current_run_id != self._run_id:
+                self._entries.clear()
+                self._run_id = current_run_id
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, current_run_id: str, key: Tuple, body: bytes) -> None:
+        with self._lock:
+            if current_run_id != self._run_id:
+                return
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class MartService:
+    def __init__(self, db_path: Optional[str] = DB_PATH, pool_size: int = POOL_SIZE, cache_entries: int = CACHE_ENTRIES):
+        self.pool = ConnectionPool(db_path, pool_size)
+        self.cache = ResultCache(cache_entries)
+        self._columns: Dict[Tuple[str, str], List[str]] = {}
+
+    def columns(self, table: str) -> List[str]:
+        key = (self.pool.run_id, table)
+        if key not in self._columns:
+            with self.pool.cursor() as cur:
+                self._columns[key] = [r[0] for r in cur.execute(f"DESCRIBE {table}").fetchall()]
+        return self._columns[key]
+
+    def build_query(self, mart: str, params: Dict[str, str]) -> Tuple[str, List]:
+        if mart not in MARTS:
+            raise KeyError(f"Unknown mart: {mart}")
+        table = MARTS[mart]
+        columns = self.columns(table)
+
+        where: List[str] = []
+        args: List = []
+        for name, op in (("start", ">="), ("end", "<=")):
+            if name in params:
+                if DATE_COLUMN not in columns:
+                    raise ValueError(f"{mart} has no {DATE_COLUMN} column to filter by {name}")
+                where.append(f"{DATE_COLUMN} {op} CAST(? AS DATE)")
+                args.append(params[name])
+        for name in EQUALITY_FILTERS:
+            if name in params:
+                if name not in columns:
+                    raise ValueError(f"{mart} has no {name} column")
+                values = params[name].split(",")
+                where.append(f"{name} IN ({', '.join('?' for _ in values)})")
+                args.extend(values)
+        unknown = set(params) - {"start", "end", "limit", *EQUALITY_FILTERS}
+        if unknown:
+            raise ValueError(f"Unknown filter(s): {', '.join(sorted(unknown))}")
+
+        limit = min(int(params.get("limit", MAX_ROWS)), MAX_ROWS)
+        sql = f"SELECT * FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if DATE_COLUMN in columns:
+            sql += f" ORDER BY {DATE_COLUMN}"
+        return f"{sql} LIMIT {limit}", args
+
+    def query(self, mart: str, params: Dict[str, str]) -> Tuple[bytes, bool]:
+        """Encoded JSON body for one slice, and whether it came from the cache."""
+        key = (mart, tuple(sorted(params.items())))
+        body = self.cache.get(run_id(self.pool.db_path), key)
+        if body is not None:
+            return body, True
+
+        current = self.pool.refresh()
+        sql, args = self.build_query(mart, params)
+        with self.pool.cursor() as cur:
+            cur.execute(sql, args)
+            names = [d[0] for d in cur.description]
+            rows = cur.fetchall()
+        body = json.dumps(
+            {"mart": mart, "run_id": current, "rows": len(rows), "columns": names, "data": rows},
+            default=str,
+        ).encode("utf-8")
+        self.cache.put(current, key, body)
+        return body, False
+
+
+def make_handler(service: MartService):
+    class Handler(BaseHTTPRequestHandler):
+        """
+        GET /health
+        GET /marts
+        GET /marts/<name>?start=YYYY-MM-DD&end=YYYY-MM-DD&tier=TIER_1,TIER_2&case_type=...&limit=N
+        """
+
+        def _send(self, status: int, body: bytes, cache: str = "") -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if cache:
+                self.send_header("X-Cache", cache)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, status: int, message: str) -> None:
+            self._send(status, json.dumps({"error": message}).encode("utf-8"))
+
+        def do_GET(self) -> None:  # noqa: N802 (http.server naming)
+            url = urlparse(self.path)
+            parts = [p for p in url.path.split("/") if p]
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                if parts == ["health"]:
+                    body = {"run_id": run_id(service.pool.db_path), "cache": service.cache.stats()}
+                    self._send(200, json.dumps(body).encode("utf-8"))
+                elif parts == ["marts"]:
+                    self._send(200, json.dumps(sorted(MARTS)).encode("utf-8"))
+                elif len(parts) == 2 and parts[0] == "marts":
+                    t0 = time.perf_counter()
+                    body, hit = service.query(parts[1], params)
+                    self._send(200, body, cache=f"{'HIT' if hit else 'MISS'} {1000 * (time.perf_counter() - t0):.2f}ms")
+                else:
+                    self._error(404, f"Not found: {url.path}")
+            except KeyError as e:
+                self._error(404, str(e.args[0]))
+            except (ValueError, duckdb.Error) as e:
+                self._error(400, str(e))
+
+        def log_message(self, format: str, *args) -> None:  # keep the console quiet
+            pass
+
+    return Handler
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, db_path: Optional[str] = DB_PATH, pool_size: int = POOL_SIZE) -> None:
+    service = MartService(db_path, pool_size)
+    stop = threading.Event()
+
+    def release_idle() -> None:
+        while not stop.wait(0.5):
+            service.pool.release_if_idle()
+
+    threading.Thread(target=release_idle, daemon=True).start()
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    source = os.path.abspath(db_path) if db_path else "the published warehouse snapshot"
+    print(f"Serving {len(MARTS)} marts from {source} on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        service.pool.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Read-only HTTP/JSON service over the mart layer.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--db", default=DB_PATH, help="database file (default: published snapshot)")
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE)
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.db, args.pool_size)
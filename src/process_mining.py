@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import json
+import re
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, Optional
+
+import duckdb
+
+from src.case_refresh import BATCH_CASES, refresh_batch_cases, refresh_statements, split_create_table
+from src.sql_template import render_sql_file
+from src.telemetry import StepTelemetry
+from src.warehouse import current_path
+
+# None = follow the published warehouse snapshot (src/warehouse.py CURRENT pointer)
+DB_PATH: Optional[str] = None
+OUT_PATH = Path("reports/run_summaries/process_mining_summary.json")
+
+# Process-mining marts (also built in full by step 7). Layers:
+# - case-keyed event grain: staging.process_events (one row per status transition, with duration)
+# - day grain (intake_date x tier): mergeable edge sketches and variant counts
+# - rollups read only the day-grain tables, so they are cheap to rebuild after any refresh
+PROCESS_EVENTS_FILE = "sql/staging/s7_03_process_events.sql"
+DAY_GRAIN_FILES = [
+    "sql/mart/s7_05_process_transition_sketch.sql",
+    "sql/mart/s7_06_process_variant_daily.sql",
+]
+ROLLUP_FILES = [
+    "sql/mart/s7_07_process_transitions.sql",
+    "sql/mart/s7_08_process_variants.sql",
+]
+PROCESS_FILES = [PROCESS_EVENTS_FILE] + DAY_GRAIN_FILES + ROLLUP_FILES
+
+# Case-keyed inputs of staging.process_events, sliced to the refreshed cases.
+PROCESS_SOURCES = ("staging.event_transitions", "staging.case_milestones")
+RECENT_EVENTS = "recent_process_events"
+
+
+def refresh_since(con: duckdb.DuckDBPyConnection, since: date) -> Dict:
+    """
+    Rebuild the process-mining marts for cases with intake_date >= since, in one transaction:
+    staging.process_events is refreshed per case, the day-grain rows of those intake dates are
+    replaced, and the rollups are rebuilt from the day grain. Equals a full rebuild as long as no
+    case with an earlier intake_date changed since the last build.
+    """
+    con.execute("BEGIN TRANSACTION")
+    try:
+        con.execute(
+            f"CREATE OR REPLACE TEMP TABLE {BATCH_CASES} AS "
+            "SELECT case_id FROM staging.case_milestones WHERE intake_date >= ?",
+            [since],
+        )
+        cases = refresh_batch_cases(con, refresh_statements([PROCESS_EVENTS_FILE], PROCESS_SOURCES), PROCESS_SOURCES)
+        con.execute(
+            f"CREATE OR REPLACE TEMP TABLE {RECENT_EVENTS} AS "
+            "SELECT * FROM staging.process_events WHERE intake_date >= ?",
+            [since],
+        )
+        for f in DAY_GRAIN_FILES:
+            target, query = split_create_table(render_sql_file(f))
+            query = re.sub(r"\bstaging\.process_events\b", RECENT_EVENTS, query)
+            con.execute(f"DELETE FROM {target} WHERE intake_date >= ?", [since])
+            con.execute(f"INSERT INTO {target}\n{query}")
+        for f in ROLLUP_FILES:
+            con.execute(render_sql_file(f))
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return {"since": since.isoformat(), "cases_refreshed": cases}
+
+
+def _marts_exist(con: duckdb.DuckDBPyConnection) -> bool:
+    n = con.execute("""
+      SELECT COUNT(*)
+      FROM information_schema.tables
+      WHERE (table_schema = 'staging' AND table_name = 'process_events')
+         OR (table_schema = 'mart' AND table_name IN ('process_transition_sketch', 'process_variant_daily'))
+    """).fetchone()[0]
+    return n == 3
+
+
+def run(since: Optional[date] = None) -> Dict:
+    t0 = time.perf_counter()
+    con = duckdb.connect(DB_PATH or str(current_path()))
+    telemetry = StepTelemetry("process_mining")
+
+    file_timings = {}
+    refresh = None
+    if since is not None and _marts_exist(con):
+        with telemetry.track("incremental refresh") as usage:
+            refresh = refresh_since(con, since)
+        file_timings["incremental refresh"] = usage["wall_seconds"]
+    else:
+        # no earlier build to refresh: build everything
+        for f in PROCESS_FILES:
+            sql = render_sql_file(f)
+            with telemetry.track(f, con, sql) as usage:
+                con.execute(sql)
+            file_timings[f] = usage["wall_seconds"]
+
+    counts = {
+        t: con.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+        for t in (
+            "staging.process_events",
+            "mart.process_transition_sketch",
+            "mart.process_variant_daily",
+            "mart.process_transitions",
+            "mart.process_variants",
+        )
+    }
+
+    # slowest allowed edges by p95 (all tiers), and how concentrated the paths are
+    slowest_edges = con.execute("""
+      SELECT prev_status, status, transitions, p50_business_minutes, p95_business_minutes
+      FROM mart.process_transitions
+      WHERE tier = 'ALL' AND is_allowed AND timed_transitions > 0
+      ORDER BY p95_business_minutes DESC
+      LIMIT 5
+    """).fetchdf().to_dict(orient="records")
+    top_variants = con.execute("""
+      SELECT variant_rank, variant, cases, pct_of_cases, cumulative_pct_of_cases
+      FROM mart.process_variants
+      WHERE tier = 'ALL' AND variant_rank <= 5
+      ORDER BY variant_rank
+    """).fetchdf().to_dict(orient="records")
+    invalid_path_pct = con.execute("""
+      SELECT ROUND(100.0 * SUM(cases) FILTER (WHERE NOT is_valid_path) / SUM(cases), 4)
+      FROM mart.process_variants
+      WHERE tier = 'ALL'
+    """).fetchone()[0]
+
+    step_usage = telemetry.finish(con)
+    con.close()
+    t_end = time.perf_counter()
+
+    out = {
+        "step": "process_mining",
+        "incremental": refresh,
+        "runtime_seconds": {"by_file": file_timings, "end_to_end": round(t_end - t0, 3)},
+        "telemetry": step_usage,
+        "counts": counts,
+        "slowest_edges_p95": slowest_edges,
+        "top_variants": top_variants,
+        "invalid_path_pct_of_cases": invalid_path_pct,
+    }
+
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    OUT_PATH.write_text(json.dumps(out, indent=2, default=str), encoding="utf-8")
+    print(json.dumps(out, indent=2, default=str))
+    print(f"\nWrote: {OUT_PATH}")
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or incrementally refresh the process-mining marts.")
+    parser.add_argument(
+        "--since",
+        type=date.fromisoformat,
+        default=None,
+        help="Only rebuild cases with intake_date >= this date (YYYY-MM-DD); default is a full build",
+    )
+    args = parser.parse_args()
+    run(since=args.since)
@@ -14,6 +14,7 @@ import pyarrow as pa
 import pyarrow.parquet as pq
 
 from src.config import CONFIG
+from src.telemetry import StepTelemetry
 
 
 # ---------------------------------------------------------------------
@@ -27,15 +28,25 @@ OUT_CASES = OUT_BASE / "cases"
 OUT_EVENTS = OUT_BASE / "events_log"
 OUT_STAFF = OUT_BASE / "staffing_schedule"
 OUT_CAL = OUT_BASE / "calendar_dim"
+# Common random numbers (standardized per-case draws) for counterfactual re-simulation
+OUT_CRN = OUT_BASE / "crn"
 
 RUN_SUMMARY_PATH = REPO_ROOT / "reports" / "run_summaries" / "step2_summary.json"
 
+# Stage-time constants that are not part of CONFIG; src/s8_resimulate.py re-simulates with these.
+ASSIGN_MEDIAN_MIN, ASSIGN_SIGMA = 25.0, 0.8
+RESOLVE_LAG_MEDIAN_MIN, RESOLVE_LAG_SIGMA = 20.0, 0.7
+CANCEL_LAG_MEDIAN_MIN, CANCEL_LAG_SIGMA = 45.0, 0.8
+CANCEL_RATE = 0.012
+# CUSTOMER_WAIT splits investigation: it starts after this share and the rest runs after it
+CW_START_FRACTION, CW_RESUME_FRACTION = 0.45, 0.55
+
 
 # ---------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------
 def _ensure_dirs() -> None:
-    for p in [OUT_CASES, OUT_EVENTS, OUT_STAFF, OUT_CAL, RUN_SUMMARY_PATH.parent]:
+    for p in [OUT_CASES, OUT_EVENTS, OUT_STAFF, OUT_CAL, OUT_CRN, RUN_SUMMARY_PATH.parent]:
         p.mkdir(parents=True, exist_ok=True)
 
 
@@ -218,6 +229,15 @@ def _lognormal_minutes(rng: np.random.Generator, median_min: float, sigma: float
     return vals
 
 
+def _standardize_lognormal(vals: np.ndarray, median_min, sigma: float) -> np.ndarray:
+    """
+    Recover the standard-normal draw behind each lognormal value: z = (ln x - ln median) / sigma.
+    Costs no extra RNG draws, so generated data is unchanged by caching it.
+    """
+    mu = np.log(np.maximum(1e-6, np.asarray(median_min, dtype=float)))
+    return ((np.log(vals) - mu) / sigma).astype(np.float32)
+
+
 def _inject_messiness(
     rng: np.random.Generator,
     events: pd.DataFrame,
@@ -278,9 +298,11 @@ def _build_events_for_cases(
     intake_ts: pd.DatetimeIndex,
     case_type: np.ndarray,
     tier: np.ndarray,
-) -> pd.DataFrame:
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Generate an event stream per case reflecting the locked workflow.
+    Also returns the per-case common random numbers (standardized stage-time draws and the
+    uniforms behind CUSTOMER_WAIT / cancellation) used by src/s8_resimulate.py.
     """
     n = len(case_ids)
     primary_tz = CONFIG.teams.primary_tz
@@ -294,7 +316,7 @@ def _build_events_for_cases(
     ])
 
     # ASSIGNMENT delay after triage (small)
-    assign_min = _lognormal_minutes(rng, median_min=25.0, sigma=0.8, size=n)
+    assign_min = _lognormal_minutes(rng, median_min=ASSIGN_MEDIAN_MIN, sigma=ASSIGN_SIGMA, size=n)
 
     # INVESTIGATION duration
     resolve_medians = np.vectorize(CONFIG.stage_times.resolve_median_by_tier_min.get)(tier).astype(float)
@@ -308,17 +330,18 @@ def _build_events_for_cases(
 
     # CUSTOMER_WAIT occurrence + duration
     cw_rate = CONFIG.stage_times.customer_wait_rate
-    has_cw = rng.random(n) < cw_rate
-    cw_min = _lognormal_minutes(rng, median_min=CONFIG.stage_times.customer_wait_median_min, sigma=CONFIG.stage_times.customer_wait_sigma, size=n)
-    cw_min = np.where(has_cw, cw_min, 0.0)
+    cw_u = rng.random(n)
+    has_cw = cw_u < cw_rate
+    cw_draw = _lognormal_minutes(rng, median_min=CONFIG.stage_times.customer_wait_median_min, sigma=CONFIG.stage_times.customer_wait_sigma, size=n)
+    cw_min = np.where(has_cw, cw_draw, 0.0)
 
     # ESCALATION occurrence
     esc_rate = CONFIG.messy.escalation_rate
     has_esc = rng.random(n) < esc_rate
 
     # CANCELLATION (small subset, more likely earlier)
-    cancel_rate = 0.012
-    is_cancelled = rng.random(n) < cancel_rate
+    cancel_u = rng.random(n)
+    is_cancelled = cancel_u < CANCEL_RATE
 
     # Build base timestamps
     intake = pd.DatetimeIndex(intake_ts).tz_convert(primary_tz)
@@ -328,17 +351,38 @@ def _build_events_for_cases(
 
     # Insert CUSTOMER_WAIT mid-investigation when present
     # Simplified: CUSTOMER_WAIT starts halfway through investigation
-    cw_start_ts = assign_ts + pd.to_timedelta(inv_min * 0.45, unit="m")
+    cw_start_ts = assign_ts + pd.to_timedelta(inv_min * CW_START_FRACTION, unit="m")
     cw_end_ts = cw_start_ts + pd.to_timedelta(cw_min, unit="m")
     # Resume investigation after CW if present
-    inv_end_ts = np.where(has_cw, cw_end_ts + pd.to_timedelta(inv_min * 0.55, unit="m"), inv_ts)
+    inv_end_ts = np.where(has_cw, cw_end_ts + pd.to_timedelta(inv_min * CW_RESUME_FRACTION, unit="m"), inv_ts)
     inv_end_ts = pd.DatetimeIndex(inv_end_ts).tz_convert(primary_tz)
 
     review_ts = inv_end_ts + pd.to_timedelta(review_min, unit="m")
-    resolved_ts = review_ts + pd.to_timedelta(_lognormal_minutes(rng, median_min=20.0, sigma=0.7, size=n), unit="m")
+    resolve_lag_min = _lognormal_minutes(rng, median_min=RESOLVE_LAG_MEDIAN_MIN, sigma=RESOLVE_LAG_SIGMA, size=n)
+    resolved_ts = review_ts + pd.to_timedelta(resolve_lag_min, unit="m")
 
     # If cancelled: cancel around triage/assignment area and do not resolve
-    cancel_ts = triage_ts + pd.to_timedelta(_lognormal_minutes(rng, median_min=45.0, sigma=0.8, size=n), unit="m")
+    cancel_lag_min = _lognormal_minutes(rng, median_min=CANCEL_LAG_MEDIAN_MIN, sigma=CANCEL_LAG_SIGMA, size=n)
+    cancel_ts = triage_ts + pd.to_timedelta(cancel_lag_min, unit="m")
+
+    st = CONFIG.stage_times
+    crn = pd.DataFrame(
+        {
+            "case_id": case_ids,
+            "tier": tier,
+            "intake_ts": intake,
+            "z_triage": _standardize_lognormal(triage_min, triage_medians, st.triage_sigma),
+            "z_assignment": _standardize_lognormal(assign_min, ASSIGN_MEDIAN_MIN, ASSIGN_SIGMA),
+            "z_investigation": _standardize_lognormal(inv_min, resolve_medians, st.resolve_sigma),
+            "z_review_qa": _standardize_lognormal(review_min, st.review_qa_median_min, st.review_qa_sigma),
+            # uniforms stay float64: s8_resimulate compares them with the same rates as here
+            "u_customer_wait": cw_u,
+            "z_customer_wait": _standardize_lognormal(cw_draw, st.customer_wait_median_min, st.customer_wait_sigma),
+            "u_cancel": cancel_u,
+            "z_resolve_lag": _standardize_lognormal(resolve_lag_min, RESOLVE_LAG_MEDIAN_MIN, RESOLVE_LAG_SIGMA),
+            "z_cancel_lag": _standardize_lognormal(cancel_lag_min, CANCEL_LAG_MEDIAN_MIN, CANCEL_LAG_SIGMA),
+        }
+    )
 
     # Event assembly
     rows: List[Dict] = []
@@ -497,7 +541,7 @@ def _build_events_for_cases(
             keep_mask = ~events.apply(lambda r: (r["case_id"] in drop_map) and (r["status"] == drop_map[r["case_id"]]), axis=1)
             events = events.loc[keep_mask].copy()
 
-    return events
+    return events, crn
 
 
 def generate_and_load(mode: str = "dev") -> Dict:
@@ -521,6 +565,7 @@ def generate_and_load(mode: str = "dev") -> Dict:
     _ensure_dirs()
 
     t0 = time.perf_counter()
+    telemetry = StepTelemetry("s2_generate_and_load")
     rng = _rng(CONFIG.output.random_seed)
 
     tz = CONFIG.teams.primary_tz
@@ -592,7 +637,7 @@ def generate_and_load(mode: str = "dev") -> Dict:
             }
         )
 
-        events_df = _build_events_for_cases(rng, case_ids, intake_ts, case_type, tier)
+        events_df, crn_df = _build_events_for_cases(rng, case_ids, intake_ts, case_type, tier)
 
         # Write partitioned parquet by intake_date
         _write_partitioned_parquet(
@@ -614,6 +659,15 @@ def generate_and_load(mode: str = "dev") -> Dict:
         )
         event_files += 1
 
+        # Common random numbers, one file per day so reruns overwrite in place
+        _write_partitioned_parquet(
+            crn_df,
+            base_dir=OUT_CRN,
+            part_col="intake_date",
+            part_value=day_str,
+            filename=f"crn_{day_str}",
+        )
+
         case_rows_total += len(cases_df)
         event_rows_total += len(events_df)
 
@@ -622,21 +676,25 @@ def generate_and_load(mode: str = "dev") -> Dict:
     # Load into DuckDB raw schema
     con = duckdb.connect(str(DB_PATH))
 
-    # Calendar + staffing
-    con.execute("CREATE OR REPLACE TABLE raw.calendar_dim AS SELECT * FROM read_parquet(?);", [str(OUT_CAL / "calendar_dim.parquet")])
-    con.execute("CREATE OR REPLACE TABLE raw.staffing_schedule AS SELECT * FROM read_parquet(?);", [str(OUT_STAFF / "staffing_schedule.parquet")])
-
-    # Partitioned datasets (hive_partitioning picks up intake_date)
-    con.execute(
-        "CREATE OR REPLACE TABLE raw.cases AS "
-        "SELECT * FROM read_parquet(?, hive_partitioning=1);",
-        [str(OUT_CASES / "**" / "*.parquet")],
-    )
-    con.execute(
-        "CREATE OR REPLACE TABLE raw.events_log AS "
-        "SELECT * FROM read_parquet(?, hive_partitioning=1);",
-        [str(OUT_EVENTS / "**" / "*.parquet")],
-    )
+    loads = [
+        # Calendar + staffing
+        ("CREATE OR REPLACE TABLE raw.calendar_dim AS SELECT * FROM read_parquet(?);", str(OUT_CAL / "calendar_dim.parquet")),
+        ("CREATE OR REPLACE TABLE raw.staffing_schedule AS SELECT * FROM read_parquet(?);", str(OUT_STAFF / "staffing_schedule.parquet")),
+        # Partitioned datasets (hive_partitioning picks up intake_date)
+        (
+            "CREATE OR REPLACE TABLE raw.cases AS "
+            "SELECT * FROM read_parquet(?, hive_partitioning=1);",
+            str(OUT_CASES / "**" / "*.parquet"),
+        ),
+        (
+            "CREATE OR REPLACE TABLE raw.events_log AS "
+            "SELECT * FROM read_parquet(?, hive_partitioning=1);",
+            str(OUT_EVENTS / "**" / "*.parquet"),
+        ),
+    ]
+    for sql, source in loads:
+        with telemetry.track(f"load {source}", con, sql):
+            con.execute(sql, [source])
 
     # Basic stats for summary
     counts = {
@@ -662,6 +720,7 @@ def generate_and_load(mode: str = "dev") -> Dict:
         ).fetchone()[0]),
     }
 
+    step_usage = telemetry.finish(con)
     con.close()
 
     t_load = time.perf_counter()
@@ -689,9 +748,11 @@ def generate_and_load(mode: str = "dev") -> Dict:
             "load_total": round(t_load - t_gen, 3),
             "end_to_end": round(t_load - t0, 3),
         },
+        "telemetry": step_usage,
         "paths": {
             "cases_dir": str(OUT_CASES),
             "events_dir": str(OUT_EVENTS),
+            "crn_dir": str(OUT_CRN),
             "db_path": str(DB_PATH),
         },
     }
@@ -7,6 +7,9 @@ from typing import Dict, List
 
 import duckdb
 
+from src.sql_template import render_sql_file
+from src.telemetry import StepTelemetry
+
 DB_PATH = "ops_warehouse.duckdb"
 OUT_PATH = Path("reports/run_summaries/step3_summary.json")
 
@@ -25,17 +28,17 @@ def _split_sql(sql: str) -> List[str]:
 def run() -> Dict:
     t0 = time.perf_counter()
     con = duckdb.connect(DB_PATH)
+    telemetry = StepTelemetry("s3_raw_qa")
 
     per_file_timings = {}
     # execute files (primarily for reproducibility; results will be recomputed below as structured metrics)
     for f in SQL_FILES:
-        sql = Path(f).read_text(encoding="utf-8")
+        sql = render_sql_file(f)
         stmts = _split_sql(sql)
-        tf0 = time.perf_counter()
-        for st in stmts:
-            con.execute(st)
-        tf1 = time.perf_counter()
-        per_file_timings[f] = round(tf1 - tf0, 3)
+        with telemetry.track(f, con, sql) as usage:
+            for st in stmts:
+                con.execute(st)
+        per_file_timings[f] = usage["wall_seconds"]
 
     # Structured metrics (single-source-of-truth fields for logging)
     counts = {
@@ -143,6 +146,7 @@ def run() -> Dict:
         FROM f;
     """).fetchone()[0]
 
+    step_usage = telemetry.finish(con)
     con.close()
     t1 = time.perf_counter()
 
@@ -152,6 +156,7 @@ def run() -> Dict:
             "by_file": per_file_timings,
             "end_to_end": round(t1 - t0, 3),
         },
+        "telemetry": step_usage,
         "counts": counts,
         "intake_coverage": intake_coverage,
         "events_per_case": events_per_case,
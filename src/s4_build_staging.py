@@ -3,10 +3,14 @@ from __future__ import annotations
 import json
 import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import duckdb
 
+from src.case_refresh import BATCH_CASES, refresh_batch_cases, refresh_statements
+from src.sql_template import render_sql_file
+from src.telemetry import StepTelemetry
+
 DB_PATH = "ops_warehouse.duckdb"
 OUT_PATH = Path("reports/run_summaries/step4_summary.json")
 
@@ -14,20 +18,75 @@ SQL_FILES = [
     "sql/staging/s4_01_events_dedup.sql",
     "sql/staging/s4_02_events_clean.sql",
     "sql/staging/s4_03_case_milestones.sql",
+    "sql/staging/s4_04_event_transitions.sql",
+    "sql/staging/s4_05_transition_checks.sql",
 ]
-
-
-def run() -> Dict:
+# Rebuilt in full after an incremental refresh: they aggregate over every case. The other files
+# build case-keyed tables.
+ALL_CASES_FILES = ["sql/staging/s4_05_transition_checks.sql"]
+
+# Highest raw.events_log ingestion_ts covered by the step 4 tables, written by every run. An
+# incremental run re-deduplicates only cases with events ingested at or after it (the case-keyed
+# step 4 tables are rebuilt in place for those cases; the boundary cases are simply redone). Events
+# landing with an older ingestion_ts, and deletes from raw, need a full run.
+WATERMARK_TABLE = "staging.events_dedup_watermark"
+WATERMARK_SQL = f"""
+CREATE OR REPLACE TABLE {WATERMARK_TABLE} AS
+SELECT MAX(ingestion_ts) AS ingestion_ts_watermark, current_timestamp AS updated_at
+FROM raw.events_log
+"""
+
+
+def read_watermark(con: duckdb.DuckDBPyConnection) -> Optional[object]:
+    """Stored watermark, or None when step 4 has not been built with one yet."""
+    exists = con.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE schema_name = 'staging' "
+        "AND table_name IN ('events_dedup_watermark', 'case_milestones')"
+    ).fetchone()[0]
+    if exists < 2:
+        return None
+    return con.execute(f"SELECT ingestion_ts_watermark FROM {WATERMARK_TABLE}").fetchone()[0]
+
+
+def refresh_incremental(con: duckdb.DuckDBPyConnection, watermark) -> Dict:
+    """Rebuild the step 4 tables for cases with events ingested after `watermark`, in one transaction."""
+    con.execute("BEGIN TRANSACTION")
+    try:
+        con.execute(
+            f"CREATE OR REPLACE TEMP TABLE {BATCH_CASES} AS "
+            "SELECT DISTINCT case_id FROM raw.events_log WHERE ingestion_ts >= ?",
+            [watermark],
+        )
+        cases = refresh_batch_cases(con, refresh_statements([f for f in SQL_FILES if f not in ALL_CASES_FILES]))
+        for f in ALL_CASES_FILES:
+            con.execute(render_sql_file(f))
+        con.execute(WATERMARK_SQL)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return {"watermark_from": str(watermark), "cases_refreshed": cases}
+
+
+def run(incremental: bool = False) -> Dict:
     t0 = time.perf_counter()
     con = duckdb.connect(DB_PATH)
+    telemetry = StepTelemetry("s4_build_staging")
 
     file_timings = {}
-    for f in SQL_FILES:
-        sql = Path(f).read_text(encoding="utf-8")
-        t1 = time.perf_counter()
-        con.execute(sql)
-        t2 = time.perf_counter()
-        file_timings[f] = round(t2 - t1, 3)
+    watermark = read_watermark(con) if incremental else None
+    incremental_run = None
+    if watermark is not None:
+        with telemetry.track("incremental refresh") as usage:
+            incremental_run = refresh_incremental(con, watermark)
+        file_timings["incremental refresh"] = usage["wall_seconds"]
+    else:
+        for f in SQL_FILES:
+            sql = render_sql_file(f)
+            with telemetry.track(f, con, sql) as usage:
+                con.execute(sql)
+            file_timings[f] = usage["wall_seconds"]
+        con.execute(WATERMARK_SQL)
 
     counts = {
         "raw_events_log": con.execute("SELECT COUNT(*) FROM raw.events_log").fetchone()[0],
@@ -69,12 +128,35 @@ def run() -> Dict:
         FROM staging.events_clean;
     """).fetchdf().to_dict(orient="records")[0]
 
+    transitions = con.execute("""
+        SELECT
+          COUNT(*) AS transitions,
+          COUNT(*) FILTER (WHERE NOT is_allowed) AS invalid_transitions,
+          ROUND(100.0 * AVG(CASE WHEN is_allowed THEN 0 ELSE 1 END), 4) AS pct_invalid,
+          COUNT(DISTINCT case_id) FILTER (WHERE NOT is_allowed) AS cases_with_invalid
+        FROM staging.event_transitions;
+    """).fetchdf().to_dict(orient="records")[0]
+    violations_by_type = dict(con.execute("""
+        SELECT violation, COUNT(*) FROM staging.invalid_transitions GROUP BY 1 ORDER BY 2 DESC;
+    """).fetchall())
+    top_invalid_pairs = con.execute("""
+        SELECT prev_status, status, transitions, pct_of_transitions_from_prev
+        FROM staging.transition_violation_rates
+        WHERE NOT is_allowed
+        ORDER BY transitions DESC
+        LIMIT 10;
+    """).fetchdf().to_dict(orient="records")
+
+    step_usage = telemetry.finish(con)
     con.close()
     t_end = time.perf_counter()
 
     summary = {
         "step": 4,
         "runtime_seconds": {"by_file": file_timings, "end_to_end": round(t_end - t0, 3)},
+        "telemetry": step_usage,
+        # None: full rebuild (also the fallback when incremental is asked for without a watermark)
+        "incremental": incremental_run,
         "counts": counts,
         "dedup_removed_rows": int(dedup_removed),
         "triage_before_intake_pct": {
@@ -82,6 +164,11 @@ def run() -> Dict:
             "after_milestone_fix": float(triage_before_intake_fixed),
         },
         "anomaly_rates_pct": anomaly_rates,
+        "transition_validation": {
+            **{k: int(v) if k != "pct_invalid" else float(v) for k, v in transitions.items()},
+            "by_violation": violations_by_type,
+            "top_invalid_pairs": top_invalid_pairs,
+        },
     }
 
     OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -92,4 +179,10 @@ def run() -> Dict:
 
 
 if __name__ == "__main__":
-    run()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Step 4: dedup, clean and milestone staging tables.")
+    parser.add_argument("--incremental", action="store_true", help="only rebuild cases with events ingested since the last run")
+    args = parser.parse_args()
+
+    run(args.incremental)
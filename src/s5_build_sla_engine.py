@@ -7,6 +7,9 @@ from typing import Dict
 
 import duckdb
 
+from src.sql_template import render_sql_file
+from src.telemetry import StepTelemetry
+
 DB_PATH = "ops_warehouse.duckdb"
 OUT_PATH = Path("reports/run_summaries/step5_summary.json")
 
@@ -19,14 +22,14 @@ SQL_FILES = [
 def run() -> Dict:
     t0 = time.perf_counter()
     con = duckdb.connect(DB_PATH)
+    telemetry = StepTelemetry("s5_build_sla_engine")
 
     file_timings = {}
     for f in SQL_FILES:
-        sql = Path(f).read_text(encoding="utf-8")
-        t1 = time.perf_counter()
-        con.execute(sql)
-        t2 = time.perf_counter()
-        file_timings[f] = round(t2 - t1, 3)
+        sql = render_sql_file(f)
+        with telemetry.track(f, con, sql) as usage:
+            con.execute(sql)
+        file_timings[f] = usage["wall_seconds"]
 
     counts = {
         "business_minutes_dim": con.execute("SELECT COUNT(*) FROM staging.business_minutes_dim").fetchone()[0],
@@ -67,12 +70,14 @@ def run() -> Dict:
         WHERE resolved_ts IS NOT NULL;
     """).fetchdf().to_dict(orient="records")[0]
 
+    step_usage = telemetry.finish(con)
     con.close()
     t_end = time.perf_counter()
 
     summary = {
         "step": 5,
         "runtime_seconds": {"by_file": file_timings, "end_to_end": round(t_end - t0, 3)},
+        "telemetry": step_usage,
         "counts": counts,
         "breach_rates_pct": breach_rates,
         "triage_before_intake_pct_for_sla": float(pct_triage_invalid),
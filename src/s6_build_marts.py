@@ -3,40 +3,70 @@ from __future__ import annotations
 import json
 import time
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List
 
 import duckdb
 
+from src.sla_sketch import error_vs_exact
+from src.sql_template import render_sql_file
+from src.telemetry import StepTelemetry
+
 DB_PATH = "ops_warehouse.duckdb"
 OUT_PATH = Path("reports/run_summaries/step6_summary.json")
 
 SQL_FILES = [
+    "sql/mart/s6_00_sla_cube.sql",
     "sql/mart/s6_01_sla_daily.sql",
     "sql/mart/s6_02_sla_by_tier_case_type.sql",
     "sql/mart/s6_03_staffing_daily.sql",
     "sql/mart/s6_04_backlog_daily_proxy.sql",
     "sql/mart/s6_05_congestion_daily.sql",
+    "sql/mart/s6_06_sla_quantile_sketch.sql",
+    "sql/mart/s6_07_backlog_hourly.sql",
+]
+
+# Marts that are now views over mart.sla_cube. Earlier runs left them as tables, and
+# CREATE OR REPLACE VIEW refuses to replace a table, so drop those first.
+CUBE_VIEWS = [
+    "mart.sla_daily",
+    "mart.sla_by_tier_case_type",
 ]
 
 
+def _drop_legacy_tables(con: duckdb.DuckDBPyConnection, names: List[str]) -> None:
+    for name in names:
+        schema, table = name.split(".")
+        is_table = con.execute(
+            "SELECT COUNT(*) FROM information_schema.tables "
+            "WHERE table_catalog = current_database() AND table_schema = ? AND table_name = ? AND table_type = 'BASE TABLE'",
+            [schema, table],
+        ).fetchone()[0]
+        if is_table:
+            con.execute(f"DROP TABLE {name}")
+
+
 def run() -> Dict:
     t0 = time.perf_counter()
     con = duckdb.connect(DB_PATH)
+    telemetry = StepTelemetry("s6_build_marts")
+    _drop_legacy_tables(con, CUBE_VIEWS)
 
     file_timings = {}
     for f in SQL_FILES:
-        sql = Path(f).read_text(encoding="utf-8")
-        t1 = time.perf_counter()
-        con.execute(sql)
-        t2 = time.perf_counter()
-        file_timings[f] = round(t2 - t1, 3)
+        sql = render_sql_file(f)
+        with telemetry.track(f, con, sql) as usage:
+            con.execute(sql)
+        file_timings[f] = usage["wall_seconds"]
 
     counts = {
+        "mart_sla_cube": con.execute("SELECT COUNT(*) FROM mart.sla_cube").fetchone()[0],
         "mart_sla_daily": con.execute("SELECT COUNT(*) FROM mart.sla_daily").fetchone()[0],
         "mart_sla_by_tier_case_type": con.execute("SELECT COUNT(*) FROM mart.sla_by_tier_case_type").fetchone()[0],
         "mart_staffing_daily": con.execute("SELECT COUNT(*) FROM mart.staffing_daily").fetchone()[0],
         "mart_backlog_daily_proxy": con.execute("SELECT COUNT(*) FROM mart.backlog_daily_proxy").fetchone()[0],
         "mart_congestion_daily": con.execute("SELECT COUNT(*) FROM mart.congestion_daily").fetchone()[0],
+        "mart_sla_quantile_sketch": con.execute("SELECT COUNT(*) FROM mart.sla_quantile_sketch").fetchone()[0],
+        "mart_backlog_hourly": con.execute("SELECT COUNT(*) FROM mart.backlog_hourly").fetchone()[0],
     }
 
     # Key headline metrics to log
@@ -59,15 +89,23 @@ def run() -> Dict:
         WHERE congestion_index IS NOT NULL;
     """).fetchdf().to_dict(orient="records")[0]
 
+    # Sketch rollups (per tier, per intake week) vs exact quantile_cont over case rows
+    t_sk = time.perf_counter()
+    sketch_error = error_vs_exact(con)
+    sketch_error_seconds = round(time.perf_counter() - t_sk, 3)
+
+    step_usage = telemetry.finish(con)
     con.close()
     t_end = time.perf_counter()
 
     summary = {
         "step": 6,
         "runtime_seconds": {"by_file": file_timings, "end_to_end": round(t_end - t0, 3)},
+        "telemetry": step_usage,
         "counts": counts,
         "headline_daily_avgs_pct": headline,
         "congestion_summary": {k: (None if v is None else float(v)) for k, v in cong.items()},
+        "quantile_sketch_error_vs_exact": {"by_metric": sketch_error, "seconds": sketch_error_seconds},
     }
 
     OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -7,38 +7,50 @@ from typing import Dict
 
 import duckdb
 
+from src.process_mining import PROCESS_FILES
+from src.sql_template import render_sql_file
+from src.telemetry import StepTelemetry
+
 DB_PATH = "ops_warehouse.duckdb"
 OUT_PATH = Path("reports/run_summaries/step7_summary.json")
 
 SQL_FILES = [
     "sql/staging/s7_01_case_stage_durations.sql",
-    "sql/staging/s7_00_case_congestion_exposure.sql",
+    # congestion_daily_v2 must exist before case-level exposure reads it
     "sql/mart/s7_00_congestion_daily_v2.sql",
+    "sql/staging/s7_00_case_congestion_exposure.sql",
+    # decile bounds computed once; congestion buckets and driver summary both join them
+    "sql/staging/s7_02_driver_bucket_bounds.sql",
     "sql/mart/s7_01_driver_congestion_buckets.sql",
     "sql/mart/s7_02_driver_reopen_impact.sql",
     "sql/mart/s7_03_driver_stage_durations.sql",
     "sql/mart/s7_04_driver_summary.sql",
-]
+    # process-mining marts (directly-follows graph + variants); src.process_mining refreshes them incrementally
+] + PROCESS_FILES
 
 
 def run() -> Dict:
     t0 = time.perf_counter()
     con = duckdb.connect(DB_PATH)
+    telemetry = StepTelemetry("s7_driver_analysis")
 
     file_timings = {}
     for f in SQL_FILES:
-        sql = Path(f).read_text(encoding="utf-8")
-        t1 = time.perf_counter()
-        con.execute(sql)
-        t2 = time.perf_counter()
-        file_timings[f] = round(t2 - t1, 3)
+        sql = render_sql_file(f)
+        with telemetry.track(f, con, sql) as usage:
+            con.execute(sql)
+        file_timings[f] = usage["wall_seconds"]
 
     counts = {
         "staging_case_stage_durations": con.execute("SELECT COUNT(*) FROM staging.case_stage_durations").fetchone()[0],
+        "staging_case_stage_durations_long": con.execute("SELECT COUNT(*) FROM staging.case_stage_durations_long").fetchone()[0],
+        "staging_case_driver_buckets": con.execute("SELECT COUNT(*) FROM staging.case_driver_buckets").fetchone()[0],
         "driver_congestion_buckets": con.execute("SELECT COUNT(*) FROM mart.driver_congestion_buckets").fetchone()[0],
         "driver_reopen_impact": con.execute("SELECT COUNT(*) FROM mart.driver_reopen_impact").fetchone()[0],
         "driver_stage_durations": con.execute("SELECT COUNT(*) FROM mart.driver_stage_durations").fetchone()[0],
         "driver_summary": con.execute("SELECT COUNT(*) FROM mart.driver_summary").fetchone()[0],
+        "process_transitions": con.execute("SELECT COUNT(*) FROM mart.process_transitions").fetchone()[0],
+        "process_variants": con.execute("SELECT COUNT(*) FROM mart.process_variants").fetchone()[0],
     }
 
     # Pull a few headline values for resume bullets
@@ -64,12 +76,14 @@ def run() -> Dict:
         }
         bottleneck = max(stages.items(), key=lambda kv: (kv[1] if kv[1] is not None else -1))
 
+    step_usage = telemetry.finish(con)
     con.close()
     t_end = time.perf_counter()
 
     out = {
         "step": 7,
         "runtime_seconds": {"by_file": file_timings, "end_to_end": round(t_end - t0, 3)},
+        "telemetry": step_usage,
         "counts": counts,
         "driver_summary": summary_row,
         "tier3_p95_bottleneck_stage": (None if not bottleneck else {"stage": bottleneck[0], "p95_minutes": float(bottleneck[1])}),
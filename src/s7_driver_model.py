@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import json
+import math
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import duckdb
+import numpy as np
+
+from src.telemetry import StepTelemetry
+
+DB_PATH = "ops_warehouse.duckdb"
+OUT_PATH = Path("reports/run_summaries/step7_driver_model_summary.json")
+MODEL_TABLE = "mart.driver_model"
+
+# Multivariable breach / duration drivers, so tier, case_type, congestion and customer-wait effects
+# are estimated jointly instead of one decile table at a time (step 7 marts).
+# Fitting is out of core: DuckDB scans the design table once per IRLS iteration and returns only the
+# sufficient statistics X'WX, X'Wz (and the deviance), summed in its parallel aggregate over row
+# chunks; Python holds p x p matrices. Memory does not grow with the number of cases.
+DESIGN_TABLE = "driver_model_design"
+MAX_ITER = 25
+TOLERANCE = 1e-8  # relative deviance change, as in glm()
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    name: str
+    family: str  # 'logistic' (IRLS) or 'linear' (least squares)
+    target: str  # SQL expression over the design table; rows where it is NULL are left out
+
+
+MODELS: List[ModelSpec] = [
+    ModelSpec("sla_a_breach", "logistic", "CAST(sla_a_breached_including_cw AS DOUBLE)"),
+    ModelSpec("sla_b_breach", "logistic", "CAST(sla_b_breached AS DOUBLE)"),
+    # log scale: coefficients read as approximate relative changes in resolution time
+    ModelSpec("log_resolution_minutes", "linear", "LN(1 + first_resolution_business_minutes_including_cw)"),
+]
+
+# Resolved cases with a congestion window (the step 7 driver cohort).
+# Congestion is standardized, so its coefficient is per one standard deviation of exposure.
+DESIGN_SQL = f"""
+CREATE OR REPLACE TEMP TABLE {DESIGN_TABLE} AS
+WITH cohort AS (
+  SELECT
+    m.tier,
+    m.case_type,
+    m.sla_b_breached,
+    m.sla_a_breached_including_cw,
+    m.first_resolution_business_minutes_including_cw,
+    COALESCE(m.customer_wait_business_minutes, 0) > 0 AS has_customer_wait,
+    e.avg_congestion_flow_index
+  FROM staging.case_sla_metrics m
+  JOIN staging.case_congestion_exposure e
+    ON e.case_id = m.case_id
+  WHERE e.avg_congestion_flow_index IS NOT NULL
+)
+SELECT
+  c.* EXCLUDE (avg_congestion_flow_index),
+  (c.avg_congestion_flow_index - s.mean_x) / s.sd_x AS congestion_z
+FROM cohort c
+CROSS JOIN (
+  SELECT AVG(avg_congestion_flow_index) AS mean_x, STDDEV_SAMP(avg_congestion_flow_index) AS sd_x
+  FROM cohort
+) s
+"""
+
+MODEL_DDL = f"""
+CREATE OR REPLACE TABLE {MODEL_TABLE} (
+  model VARCHAR,
+  family VARCHAR,
+  target VARCHAR,
+  term VARCHAR,
+  estimate DOUBLE,
+  std_error DOUBLE,
+  statistic DOUBLE,
+  p_value DOUBLE,
+  exp_estimate DOUBLE,
+  n_obs BIGINT,
+  iterations INTEGER,
+  converged BOOLEAN,
+  deviance DOUBLE,
+  computed_at TIMESTAMP
+)
+"""
+
+Term = Tuple[str, str]  # (term name, SQL expression over the design table)
+
+
+def design_terms(con: duckdb.DuckDBPyConnection) -> List[Term]:
+    """Intercept, treatment-coded tier and case_type (first level is the reference), CW flag, congestion."""
+    terms: List[Term] = [("intercept", "1.0")]
+    for column in ("tier", "case_type"):
+        levels = [r[0] for r in con.execute(f"SELECT DISTINCT {column} FROM {DESIGN_TABLE} ORDER BY 1").fetchall()]
+        terms += [(f"{column}[{level}]", f"CAST({column} = '{level}' AS DOUBLE)") for level in levels[1:]]
+    terms += [
+        ("has_customer_wait", "CAST(has_customer_wait AS DOUBLE)"),
+        ("congestion_z", "congestion_z"),
+    ]
+    return terms
+
+
+def _cross_products(terms: List[Term], weight: str) -> List[str]:
+    """SUM(weight * x_j * x_k) for the upper triangle of X'WX."""
+    p = len(terms)
+    return [f"SUM({weight} * x{j} * x{k})" for j in range(p) for k in range(j, p)]
+
+
+def _from_upper(values: List[float], p: int) -> np.ndarray:
+    m = np.zeros((p, p))
+    m[np.triu_indices(p)] = values
+    return m + np.triu(m, 1).T
+
+
+def _design_select(terms: List[Term], target: str) -> str:
+    cols = ", ".join(f"{expr} AS x{j}" for j, (_, expr) in enumerate(terms))
+    return f"SELECT {cols}, {target} AS y FROM {DESIGN_TABLE} WHERE {target} IS NOT NULL"
+
+
+def irls_pass(
+    con: duckdb.DuckDBPyConnection, terms: List[Term], target: str, beta: np.ndarray
+) -> Tuple[int, np.ndarray, np.ndarray, float]:
+    """
+    One scan at the current coefficients: (n, X'WX, X'Wz, deviance) for the logistic model, with
+    w = mu (1 - mu) and working response z = eta + (y - mu) / w, so X'Wz = sum x (w eta + y - mu).
+    """
+    p = len(terms)
+    eta = " + ".join(f"x{j} * ?" for j in range(p))
+    sql = f"""
+      WITH d AS ({_design_select(terms, target)}),
+      fitted AS (
+        SELECT *, 1 / (1 + exp(-LEAST(GREATEST(eta, -30), 30))) AS mu
+        FROM (SELECT *, {eta} AS eta FROM d)
+      ),
+      weighted AS (SELECT *, mu * (1 - mu) AS w FROM fitted)
+      SELECT
+        COUNT(*),
+        {", ".join(_cross_products(terms, "w"))},
+        {", ".join(f"SUM(x{j} * (w * eta + y - mu))" for j in range(p))},
+        -2 * SUM(y * LN(mu) + (1 - y) * LN(1 - mu))
+      FROM weighted
+    """
+    row = con.execute(sql, [float(b) for b in beta]).fetchone()
+    n_upper = p * (p + 1) // 2
+    xtwx = _from_upper([float(v) for v in row[1:1 + n_upper]], p)
+    xtwz = np.array([float(v) for v in row[1 + n_upper:1 + n_upper + p]])
+    return int(row[0]), xtwx, xtwz, float(row[-1])
+
+
+def fit_logistic(con: duckdb.DuckDBPyConnection, terms: List[Term], target: str) -> Dict:
+    """IRLS from beta = 0; standard errors from (X'WX)^-1 at the converged coefficients."""
+    beta = np.zeros(len(terms))
+    deviance_old = math.inf
+    converged = False
+    for iteration in range(1, MAX_ITER + 1):
+        n, xtwx, xtwz, deviance = irls_pass(con, terms, target, beta)
+        if abs(deviance - deviance_old) < TOLERANCE * (abs(deviance) + 0.1):
+            converged = True
+            break
+        beta = np.linalg.solve(xtwx, xtwz)
+        deviance_old = deviance
+    cov = np.linalg.inv(xtwx)
+    return {"n": n, "beta": beta, "cov": cov, "iterations": iteration, "converged": converged, "deviance": deviance}
+
+
+def fit_linear(con: duckdb.DuckDBPyConnection, terms: List[Term], target: str) -> Dict:
+    """Least squares from X'X and X'y (one scan), residual sum of squares from a second scan."""
+    p = len(terms)
+    sql = f"""
+      WITH d AS ({_design_select(terms, target)})
+      SELECT COUNT(*), {", ".join(_cross_products(terms, "1"))}, {", ".join(f"SUM(x{j} * y)" for j in range(p))}
+      FROM d
+    """
+    row = con.execute(sql).fetchone()
+    n_upper = p * (p + 1) // 2
+    xtx = _from_upper([float(v) for v in row[1:1 + n_upper]], p)
+    xty = np.array([float(v) for v in row[1 + n_upper:]])
+    beta = np.linalg.solve(xtx, xty)
+
+    fitted = " + ".join(f"x{j} * ?" for j in range(p))
+    rss = con.execute(
+        f"WITH d AS ({_design_select(terms, target)}) SELECT SUM(POWER(y - ({fitted}), 2)) FROM d",
+        [float(b) for b in beta],
+    ).fetchone()[0]
+    n = int(row[0])
+    cov = np.linalg.inv(xtx) * (float(rss) / (n - p))
+    return {"n": n, "beta": beta, "cov": cov, "iterations": 1, "converged": True, "deviance": float(rss)}
+
+
+def _p_value(statistic: float) -> float:
+    """Two-sided normal p-value (n is in the hundreds of thousands, so t and z agree)."""
+    return math.erfc(abs(statistic) / math.sqrt(2.0))
+
+
+def model_rows(spec: ModelSpec, terms: List[Term], fit: Dict) -> List[Dict]:
+    rows = []
+    for j, (term, _) in enumerate(terms):
+        estimate = float(fit["beta"][j])
+        std_error = math.sqrt(float(fit["cov"][j, j]))
+        statistic = estimate / std_error
+        rows.append({
+            "model": spec.name,
+            "family": spec.family,
+            "target": spec.target,
+            "term": term,
+            "estimate": round(estimate, 6),
+            "std_error": round(std_error, 6),
+            "statistic": round(statistic, 4),
+            "p_value": _p_value(statistic),
+            # odds ratio for logistic models; relative change factor for the log-duration model
+            "exp_estimate": round(math.exp(estimate), 6),
+            "n_obs": fit["n"],
+            "iterations": fit["iterations"],
+            "converged": fit["converged"],
+            "deviance": round(fit["deviance"], 4),
+        })
+    return rows
+
+
+def run() -> Dict:
+    t0 = time.perf_counter()
+    con = duckdb.connect(DB_PATH)
+    telemetry = StepTelemetry("s7_driver_model")
+
+    with telemetry.track("design", con, DESIGN_SQL) as usage:
+        con.execute(DESIGN_SQL)
+    timings = {"design": usage["wall_seconds"]}
+    terms = design_terms(con)
+
+    rows: List[Dict] = []
+    for spec in MODELS:
+        fit_model = fit_logistic if spec.family == "logistic" else fit_linear
+        with telemetry.track(spec.name) as usage:
+            fit = fit_model(con, terms, spec.target)
+        timings[spec.name] = usage["wall_seconds"]
+        rows += model_rows(spec, terms, fit)
+
+    con.execute(MODEL_DDL)
+    columns = list(rows[0])
+    con.executemany(
+        f"INSERT INTO {MODEL_TABLE} ({', '.join(columns)}, computed_at) "
+        f"VALUES ({', '.join('?' for _ in columns)}, current_timestamp)",
+        [[r[c] for c in columns] for r in rows],
+    )
+
+    step_usage = telemetry.finish(con)
+    con.close()
+    t_end = time.perf_counter()
+
+    out = {
+        "step": "7_driver_model",
+        "runtime_seconds": {"by_model": timings, "end_to_end": round(t_end - t0, 3)},
+        "telemetry": step_usage,
+        "terms": [name for name, _ in terms],
+        "models": {
+            spec.name: {
+                "family": spec.family,
+                "n_obs": next(r["n_obs"] for r in rows if r["model"] == spec.name),
+                "iterations": next(r["iterations"] for r in rows if r["model"] == spec.name),
+                "converged": next(r["converged"] for r in rows if r["model"] == spec.name),
+                "exp_estimate": {r["term"]: r["exp_estimate"] for r in rows if r["model"] == spec.name},
+            }
+            for spec in MODELS
+        },
+        "rows_written": len(rows),
+    }
+
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    OUT_PATH.write_text(json.dumps(out, indent=2, default=str), encoding="utf-8")
+    print(json.dumps(out, indent=2, default=str))
+    print(f"\nWrote: {OUT_PATH}")
+    return out
+
+
+if __name__ == "__main__":
+    run()
@@ -9,6 +9,11 @@ import duckdb
 
 import math
 
+from src.bootstrap import run_bootstrap
+from src.config import CONFIG
+from src.sql_template import render_sql_file
+from src.telemetry import StepTelemetry
+
 
 def _nan_to_none(v):
     if isinstance(v, float) and math.isnan(v):
@@ -21,24 +26,26 @@ OUT_PATH = Path("reports/run_summaries/step8_summary.json")
 SQL_FILES = [
     "sql/staging/s8_01_reopen_penalty.sql",
     "sql/mart/s8_01_scenario_results.sql",
+    "sql/mart/s8_02_scenario_grid.sql",
 ]
 
 
 def run() -> Dict:
     t0 = time.perf_counter()
     con = duckdb.connect(DB_PATH)
+    telemetry = StepTelemetry("s8_scenario_modeling")
 
     file_timings = {}
     for f in SQL_FILES:
-        sql = Path(f).read_text(encoding="utf-8")
-        t1 = time.perf_counter()
-        con.execute(sql)
-        t2 = time.perf_counter()
-        file_timings[f] = round(t2 - t1, 3)
+        sql = render_sql_file(f)
+        with telemetry.track(f, con, sql) as usage:
+            con.execute(sql)
+        file_timings[f] = usage["wall_seconds"]
 
     counts = {
         "reopen_penalty_rows": con.execute("SELECT COUNT(*) FROM staging.reopen_penalty").fetchone()[0],
         "scenario_results_rows": con.execute("SELECT COUNT(*) FROM mart.scenario_results").fetchone()[0],
+        "scenario_grid_rows": con.execute("SELECT COUNT(*) FROM mart.scenario_grid").fetchone()[0],
     }
 
     scenarios = con.execute("""
@@ -47,20 +54,43 @@ def run() -> Dict:
       ORDER BY scenario_name
     """).fetchdf().to_dict(orient="records")
 
+    # Percentile intervals for the scenario and driver headlines (mart.scenario_results_ci, mart.driver_summary_ci)
+    bootstrap = run_bootstrap(con)
+    counts["scenario_results_ci_rows"] = bootstrap["scenario_ci_rows"]
+    counts["driver_summary_ci_rows"] = bootstrap["driver_ci_rows"]
+    scenario_ci = con.execute("""
+      SELECT scenario_name, metric, point_estimate, ci_lower, ci_upper
+      FROM mart.scenario_results_ci
+      ORDER BY scenario_name, metric
+    """).fetchdf().to_dict(orient="records")
+
     # Lightweight headline extraction
     headline = {row["scenario_name"]: {k: _nan_to_none(v) for k, v in row.items()} for row in scenarios}
 
+    # Strongest single-stage levers in the grid (no reopen lever, so breaches drive the ranking)
+    top_levers = con.execute("""
+      SELECT scenario_id, eligible_cases, breaches_avoided_inc, resolution_hours_saved
+      FROM mart.scenario_grid
+      WHERE reopen_pct = 0
+      ORDER BY breaches_avoided_inc DESC NULLS LAST, resolution_hours_saved DESC
+      LIMIT 5
+    """).fetchdf().to_dict(orient="records")
+
+    step_usage = telemetry.finish(con)
     con.close()
     t_end = time.perf_counter()
 
     out = {
         "step": 8,
         "runtime_seconds": {"by_file": file_timings, "end_to_end": round(t_end - t0, 3)},
+        "telemetry": step_usage,
         "counts": counts,
         "scenario_results": headline,
+        "scenario_grid_top_levers": top_levers,
+        "bootstrap": {**bootstrap, "scenario_intervals": scenario_ci},
         "notes": {
             "eligibility": "S1 applies only to Tier 3 cases with milestone-based stage decomposition available; S2 uses reopen penalty minutes as rework proxy.",
-            "sla_threshold_minutes": {"sla_a": 1440, "sla_b": 120},
+            "sla_threshold_minutes": {"sla_a": int(CONFIG.sla.first_resolution_hours * 60), "sla_b": int(CONFIG.sla.first_touch_hours * 60)},
         },
     }
 
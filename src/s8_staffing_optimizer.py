@@ -0,0 +1,354 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from src.business_time import BusinessClock
+from src.config import CONFIG
+from src.s8_resimulate import SLA_A_MINUTES, simulate, stage_params
+
+DB_PATH = "ops_warehouse.duckdb"
+OUT_PATH = Path("reports/run_summaries/step8_staffing_summary.json")
+PLAN_TABLE = "mart.staffing_plan"
+
+TARGET_TIER = "TIER_3"
+DEFAULT_TARGET_BREACH_PCT = 22.0
+
+# Fluid-queue horizon: hourly steps over the staffed window, repeated until the backlog is periodic,
+# plus one trailing week so late-week arrivals can drain.
+WARMUP_WEEKS = 3
+DAYS = tuple(range(7))  # Mon=0 ... Sun=6
+HOURS = tuple(range(min(s[1] for s in CONFIG.staffing.shifts), max(s[2] for s in CONFIG.staffing.shifts)))
+
+# The generator does not couple staffing to stage times, so agent throughput is calibrated from the
+# warehouse: observed closures per effective agent-hour, assuming the historical schedule ran at
+# this utilization.
+BASELINE_UTILIZATION = 0.90
+SAMPLE_CASES = 20_000
+MAX_ITERATIONS = 500
+
+
+def current_schedule() -> np.ndarray:
+    """(7 × shifts) planned headcount exactly as step 2 splits StaffingModel across shifts."""
+    staffing = CONFIG.staffing
+    ratios = [staffing.day_shift_ratio if name == "DAY" else 1.0 - staffing.day_shift_ratio for name, _, _ in staffing.shifts]
+    return np.array(
+        [[int(round(staffing.planned_agents_weekday[d] * r)) for r in ratios] for d in DAYS],
+        dtype=np.int64,
+    )
+
+
+def shift_coverage() -> np.ndarray:
+    """(shifts × hours) 1 where the shift is on the floor during that local hour."""
+    return np.array(
+        [[1.0 if start <= h < end else 0.0 for h in HOURS] for _, start, end in CONFIG.staffing.shifts]
+    )
+
+
+def load_arrivals(con: duckdb.DuckDBPyConnection) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean intakes per (weekday, local hour) over the window, all tiers and the target tier.
+    Intakes outside the staffed hours are folded into the first/last staffed hour.
+    """
+    df = con.execute(f"""
+        WITH intakes AS (
+          SELECT
+            isodow(timezone('{CONFIG.teams.primary_tz}', intake_ts)) - 1 AS dow,
+            LEAST({HOURS[-1]}, GREATEST({HOURS[0]}, hour(timezone('{CONFIG.teams.primary_tz}', intake_ts)))) AS hr,
+            tier
+          FROM raw.cases
+          WHERE intake_ts IS NOT NULL
+        ),
+        days AS (
+          SELECT isodow(cal_date) - 1 AS dow, COUNT(*) AS n_days
+          FROM raw.calendar_dim
+          GROUP BY 1
+        )
+        SELECT
+          i.dow,
+          i.hr,
+          COUNT(*) / ANY_VALUE(d.n_days) AS arrivals_all,
+          COUNT(*) FILTER (WHERE i.tier = '{TARGET_TIER}') / ANY_VALUE(d.n_days) AS arrivals_target
+        FROM intakes i
+        JOIN days d USING(dow)
+        GROUP BY 1,2
+    """).df()
+
+    all_tiers = np.zeros((len(DAYS), len(HOURS)))
+    target = np.zeros((len(DAYS), len(HOURS)))
+    for r in df.itertuples(index=False):
+        all_tiers[int(r.dow), int(r.hr) - HOURS[0]] = r.arrivals_all
+        target[int(r.dow), int(r.hr) - HOURS[0]] = r.arrivals_target
+    return all_tiers, target
+
+
+def calibrate_service_rate(con: duckdb.DuckDBPyConnection) -> float:
+    """Cases closed per effective agent-hour at BASELINE_UTILIZATION."""
+    closed, agent_hours = con.execute("""
+        SELECT
+          (SELECT COUNT(*) FROM staging.case_sla_metrics WHERE resolved_ts IS NOT NULL OR cancelled_ts IS NOT NULL),
+          (SELECT SUM(effective_agents * (shift_end_hour - shift_start_hour)) FROM raw.staffing_schedule)
+    """).fetchone()
+    return float(closed) / float(agent_hours) / BASELINE_UTILIZATION
+
+
+def sample_service_minutes(
+    con: duckdb.DuckDBPyConnection,
+    clock: BusinessClock,
+    n: int = SAMPLE_CASES,
+    seed: int = CONFIG.output.random_seed,
+) -> np.ndarray:
+    """
+    Sorted business minutes intake -> resolved (including customer wait) for target-tier cases with
+    no queueing, drawn from the generator's stage-time model at business-hour intake instants.
+    """
+    rng = np.random.default_rng(seed)
+    intake_idx = rng.integers(0, len(clock.minute_starts), size=n)
+    crn = pd.DataFrame({
+        "tier": TARGET_TIER,
+        "intake_epoch": clock.minute_starts[intake_idx] + rng.uniform(0, 60, size=n),
+        **{col: rng.standard_normal(n) for col in (
+            "z_triage", "z_assignment", "z_investigation", "z_review_qa", "z_customer_wait", "z_resolve_lag",
+        )},
+        "u_customer_wait": rng.random(n),
+        "u_cancel": np.ones(n),  # cancellations never reach SLA A
+    })
+    return np.sort(simulate(crn, stage_params(), clock)["fr_inc_min"].astype(np.float64))
+
+
+class StaffingKernel:
+    """
+    Vectorized SLA evaluation for a batch of schedules.
+
+    Hourly fluid queue over the staffed window (Mon..Sun × HOURS), shared by all tiers in FIFO order:
+    capacity = headcount on the floor × (1 - shrinkage) × service_rate, backlog carries across
+    hours, nights and weekends. An arrival waits until cumulative capacity clears the backlog ahead
+    of it; only business hours count toward the wait. Its SLA A outcome is the
+    no-queue service time (sample_service_minutes) plus that wait.
+    """
+
+    def __init__(
+        self,
+        arrivals: np.ndarray,
+        arrivals_target: np.ndarray,
+        service_rate: float,
+        service_minutes: np.ndarray,
+        shrinkage: float = CONFIG.staffing.shrinkage_rate,
+        warmup_weeks: int = WARMUP_WEEKS,
+    ):
+        self.weeks = warmup_weeks + 2
+        self.steps_per_week = arrivals.size
+        self.arrivals = np.tile(arrivals.ravel(), self.weeks)
+        self.weights = arrivals_target.ravel() / arrivals_target.sum()
+        self.coverage = shift_coverage()
+        self.agent_rate = (1.0 - shrinkage) * service_rate
+        self.service_minutes = service_minutes
+        self.shift_hours = self.coverage.sum(axis=1)
+
+        hours = CONFIG.business_hours
+        business_step = np.array([
+            60.0 if d in hours.workdays and hours.start_hour <= h < hours.end_hour else 0.0
+            for d in DAYS
+            for h in HOURS
+        ])
+        self.business_cum = np.concatenate([[0.0], np.cumsum(np.tile(business_step, self.weeks))])
+        self.evaluated = 0
+
+    def cost(self, schedules: np.ndarray) -> np.ndarray:
+        """Planned agent-hours per week."""
+        return (schedules * self.shift_hours).sum(axis=(-2, -1))
+
+    def breach_pct(self, schedules: np.ndarray) -> np.ndarray:
+        """Target-tier SLA A breach % (including customer wait) for (C × 7 × shifts) schedules."""
+        schedules = np.asarray(schedules, dtype=np.float64).reshape(-1, len(DAYS), self.coverage.shape[0])
+        n = schedules.shape[0]
+        capacity = np.tile((schedules @ self.coverage).reshape(n, -1) * self.agent_rate, (1, self.weeks))
+
+        backlog = np.zeros((n, capacity.shape[1]))
+        level = np.zeros(n)
+        for t in range(capacity.shape[1]):
+            backlog[:, t] = level
+            level = np.maximum(0.0, level + self.arrivals[t] - capacity[:, t])
+
+        # scored week follows the warm-up; arrivals spread across the hour queue behind half of it
+        first = capacity.shape[1] - 2 * self.steps_per_week
+        cum_capacity = np.concatenate([np.zeros((n, 1)), np.cumsum(capacity, axis=1)], axis=1)
+        positions = np.arange(capacity.shape[1] + 1, dtype=np.float64)
+        steps = np.arange(first, first + self.steps_per_week)
+        wait_min = np.empty((n, self.steps_per_week))
+        for c in range(n):
+            cleared_at = cum_capacity[c, steps] + backlog[c, steps] + 0.5 * self.arrivals[steps]
+            served = np.interp(cleared_at, cum_capacity[c], positions, right=np.inf)
+            wait_min[c] = np.interp(served, positions, self.business_cum, right=np.inf) - self.business_cum[steps]
+
+        budget = SLA_A_MINUTES - wait_min
+        within = np.searchsorted(self.service_minutes, budget.ravel(), side="right").reshape(budget.shape)
+        breach = 1.0 - within / len(self.service_minutes)
+        self.evaluated += n
+        return 100.0 * (breach * self.weights).sum(axis=1)
+
+
+def _moves(schedule: np.ndarray, step: int) -> np.ndarray:
+    """Every schedule one headcount step away in a single cell."""
+    cells = np.argwhere(np.ones_like(schedule, dtype=bool))
+    out = np.repeat(schedule[None], len(cells), axis=0)
+    out[np.arange(len(cells)), cells[:, 0], cells[:, 1]] += step
+    return out[(out >= 0).all(axis=(1, 2))]
+
+
+def _swaps(schedule: np.ndarray) -> np.ndarray:
+    """Every schedule that moves one agent between two cells."""
+    cells = np.argwhere(np.ones_like(schedule, dtype=bool))
+    pairs = [(a, b) for a in range(len(cells)) for b in range(len(cells)) if a != b]
+    out = np.repeat(schedule[None], len(pairs), axis=0)
+    src, dst = cells[[p[0] for p in pairs]], cells[[p[1] for p in pairs]]
+    out[np.arange(len(pairs)), src[:, 0], src[:, 1]] -= 1
+    out[np.arange(len(pairs)), dst[:, 0], dst[:, 1]] += 1
+    return out[(out >= 0).all(axis=(1, 2))]
+
+
+def optimize(
+    kernel: StaffingKernel,
+    start: np.ndarray,
+    target_breach_pct: float,
+    max_iterations: int = MAX_ITERATIONS,
+) -> Tuple[np.ndarray, List[Dict], bool]:
+    """
+    Greedy local search for the cheapest feasible schedule.
+    1. repair: add the agent with the largest breach drop per agent-hour until the target is met;
+       stop as infeasible once no added agent lowers the breach
+    2. trim: drop the agent whose removal keeps the target with the lowest breach
+    3. when no removal is feasible, take the best breach-reducing swap and try trimming again
+    Every neighbourhood is scored in one kernel call. Returns (schedule, trace, feasible).
+    """
+    current = start.copy()
+    breach = float(kernel.breach_pct(current)[0])
+    trace: List[Dict] = []
+
+    for iteration in range(max_iterations):
+        if breach > target_breach_pct:
+            candidates = _moves(current, +1)
+            scores = kernel.breach_pct(candidates)
+            gain = (breach - scores) / (kernel.cost(candidates) - kernel.cost(current))
+            pick, move = int(np.argmax(gain)), "add"
+            if gain[pick] <= 0:
+                break
+        else:
+            candidates = _moves(current, -1)
+            scores = kernel.breach_pct(candidates)
+            keeps_target = scores <= target_breach_pct
+            if keeps_target.any():
+                pick, move = int(np.where(keeps_target, scores, np.inf).argmin()), "remove"
+            else:
+                candidates = _swaps(current)
+                scores = kernel.breach_pct(candidates)
+                pick, move = int(scores.argmin()), "swap"
+                if scores[pick] >= breach - 1e-9:
+                    break
+
+        current, breach = candidates[pick], float(scores[pick])
+        trace.append({
+            "iteration": iteration,
+            "move": move,
+            "agent_hours": float(kernel.cost(current)),
+            "breach_pct": round(breach, 3),
+        })
+
+    return current, trace, breach <= target_breach_pct
+
+
+def run(target_breach_pct: float = DEFAULT_TARGET_BREACH_PCT, db_path: Optional[str] = None) -> Dict:
+    t0 = time.perf_counter()
+    con = duckdb.connect(db_path or DB_PATH)
+
+    clock = BusinessClock.from_warehouse(con)
+    arrivals, arrivals_target = load_arrivals(con)
+    service_rate = calibrate_service_rate(con)
+    service_minutes = sample_service_minutes(con, clock)
+    kernel = StaffingKernel(arrivals, arrivals_target, service_rate, service_minutes)
+    t_setup = time.perf_counter()
+
+    # no schedule beats the no-queue service times, so a target below this floor cannot be met
+    breach_floor_pct = 100.0 * float(np.mean(service_minutes > SLA_A_MINUTES))
+    start = current_schedule()
+    start_breach = float(kernel.breach_pct(start)[0])
+    if target_breach_pct < breach_floor_pct:
+        plan, trace, feasible = start, [], False
+    else:
+        plan, trace, feasible = optimize(kernel, start, target_breach_pct)
+    plan_breach = float(kernel.breach_pct(plan)[0])
+    t_search = time.perf_counter()
+
+    shift_names = [name for name, _, _ in CONFIG.staffing.shifts]
+    plan_df = pd.DataFrame([
+        {
+            "weekday": d,
+            "shift_name": shift_names[s],
+            "shift_start_hour": CONFIG.staffing.shifts[s][1],
+            "shift_end_hour": CONFIG.staffing.shifts[s][2],
+            "current_planned_agents": int(start[d, s]),
+            "optimized_planned_agents": int(plan[d, s]),
+            "agent_delta": int(plan[d, s] - start[d, s]),
+        }
+        for d in DAYS
+        for s in range(len(shift_names))
+    ])
+    # an infeasible search result is not a plan: keep the last feasible one in place
+    if feasible:
+        con.execute(f"CREATE OR REPLACE TABLE {PLAN_TABLE} AS SELECT * FROM plan_df")
+    con.close()
+    t_end = time.perf_counter()
+
+    search_seconds = t_search - t_setup
+    out = {
+        "step": "8_staffing",
+        "runtime_seconds": {
+            "setup": round(t_setup - t0, 3),
+            "search": round(search_seconds, 3),
+            "end_to_end": round(t_end - t0, 3),
+        },
+        "kernel": {
+            "candidates_evaluated": kernel.evaluated,
+            "candidates_per_second": round(kernel.evaluated / max(search_seconds, 1e-9), 1),
+            "service_rate_cases_per_agent_hour": round(service_rate, 4),
+            "baseline_utilization": BASELINE_UTILIZATION,
+            "no_queue_breach_floor_pct": round(breach_floor_pct, 3),
+        },
+        "target": {"tier": TARGET_TIER, "sla": "A_including_cw", "max_breach_pct": target_breach_pct},
+        "current": {"agent_hours_per_week": float(kernel.cost(start)), "breach_pct": round(start_breach, 3)},
+        "optimized": {"agent_hours_per_week": float(kernel.cost(plan)), "breach_pct": round(plan_breach, 3)},
+        "feasible": feasible,
+        "plan_written": PLAN_TABLE if feasible else None,
+        "iterations": len(trace),
+        "trace_tail": trace[-5:],
+        "notes": {
+            "model": "hourly fluid queue on a typical week; stage times from StageTimeDistributions via the step 8 re-simulator",
+            "scope": "the generator does not couple staffing to stage times, so throughput per agent is calibrated from observed closures",
+        },
+    }
+
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    OUT_PATH.write_text(json.dumps(out, indent=2, default=str), encoding="utf-8")
+    print(json.dumps(out, indent=2, default=str))
+    print(f"\nWrote: {OUT_PATH}")
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Search for the cheapest weekly staffing plan that meets the SLA target.")
+    parser.add_argument(
+        "--target-breach-pct",
+        type=float,
+        default=DEFAULT_TARGET_BREACH_PCT,
+        help=f"Max {TARGET_TIER} SLA A breach %% (including customer wait); default {DEFAULT_TARGET_BREACH_PCT}",
+    )
+    args = parser.parse_args()
+    run(target_breach_pct=args.target_breach_pct)
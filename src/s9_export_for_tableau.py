@@ -1,60 +1,319 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
+import shutil
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import duckdb
-import pandas as pd
+
+from src.telemetry import StepTelemetry
 
 DB_PATH = "ops_warehouse.duckdb"
 EXPORT_DIR = Path("data/exports")
 OUT_PATH = Path("reports/run_summaries/step9_export_summary.json")
 
-TABLES: List[Tuple[str, str]] = [
-    ("mart.sla_daily", "mart_sla_daily.csv"),
-    ("mart.sla_by_tier_case_type", "mart_sla_by_tier_case_type.csv"),
-    ("mart.staffing_daily", "mart_staffing_daily.csv"),
-    ("mart.backlog_daily_proxy", "mart_backlog_daily_proxy.csv"),
-    ("mart.congestion_daily", "mart_congestion_daily.csv"),
-    ("mart.driver_stage_durations", "mart_driver_stage_durations.csv"),
-    ("mart.driver_reopen_impact", "mart_driver_reopen_impact.csv"),
-    ("mart.scenario_results", "mart_scenario_results.csv"),
+# Tables are exported by DuckDB COPY straight to disk (never materialized in Python), several at once.
+MAX_WORKERS = 4
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    """
+    One COPY target.
+    - format: 'csv' (single file, header row) or 'parquet'
+    - partition_by: optional SQL expression; the export becomes a hive-partitioned directory
+      (<name>/<partition_name>=<value>/data.<format>) instead of a single file. Each file also
+      carries a <partition_name> column (DuckDB 1.0 COPY writes the partition column)
+    """
+
+    table: str
+    name: str
+    format: str = "csv"
+    partition_by: Optional[str] = None
+    partition_name: str = "partition"
+
+    @property
+    def path(self) -> Path:
+        if self.partition_by:
+            return EXPORT_DIR / self.name
+        return EXPORT_DIR / f"{self.name}.{self.format}"
+
+
+EXPORTS: List[ExportSpec] = [
+    ExportSpec("mart.sla_daily", "mart_sla_daily"),
+    ExportSpec("mart.sla_by_tier_case_type", "mart_sla_by_tier_case_type"),
+    ExportSpec("mart.staffing_daily", "mart_staffing_daily"),
+    ExportSpec("mart.backlog_daily_proxy", "mart_backlog_daily_proxy"),
+    ExportSpec("mart.congestion_daily", "mart_congestion_daily"),
+    ExportSpec("mart.driver_stage_durations", "mart_driver_stage_durations"),
+    ExportSpec("mart.driver_reopen_impact", "mart_driver_reopen_impact"),
+    ExportSpec("mart.scenario_results", "mart_scenario_results"),
+    ExportSpec("mart.process_transitions", "mart_process_transitions"),
+    ExportSpec("mart.process_variants", "mart_process_variants"),
+    # case grain
+    ExportSpec(
+        "staging.case_sla_metrics", "case_sla_metrics", format="parquet",
+        partition_by="strftime(intake_date, '%Y-%m')", partition_name="intake_month",
+    ),
+    ExportSpec(
+        "staging.case_stage_durations", "case_stage_durations", format="parquet",
+        partition_by="strftime(intake_date, '%Y-%m')", partition_name="intake_month",
+    ),
 ]
 
+_FORMAT_OPTIONS = {
+    "csv": "FORMAT CSV, HEADER",
+    "parquet": "FORMAT PARQUET, COMPRESSION ZSTD",
+}
+
+# Incremental exports: a file (or partition file) is rewritten only when the fingerprint of the rows
+# that feed it changed, the file is missing/resized, or the spec's format changed.
+MANIFEST_PATH = EXPORT_DIR / "_manifest.json"
+# bumped whenever the files of unchanged rows change (2: pandas-style CSV cells, 3: partition column)
+MANIFEST_VERSION = 3
+_UNPARTITIONED = ""
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> Dict:
+    if not path.exists():
+        return {"version": MANIFEST_VERSION, "exports": {}}
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "exports": {}}
+    return manifest
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _partition_key(spec: ExportSpec) -> str:
+    return f"COALESCE(CAST({spec.partition_by} AS VARCHAR), 'NULL')"
+
+
+def source_fingerprints(cur: duckdb.DuckDBPyConnection, spec: ExportSpec) -> Dict[str, Dict]:
+    """
+    Row count and order-independent content hash per output file (one per partition value).
+    SUM over row hashes, unlike XOR, still changes when a duplicate row is added or removed.
+    """
+    key = _partition_key(spec) if spec.partition_by else f"'{_UNPARTITIONED}'"
+    rows = cur.execute(f"""
+        SELECT {key} AS part, COUNT(*), CAST(SUM(CAST(hash(t) AS HUGEINT)) AS VARCHAR)
+        FROM {spec.table} t
+        GROUP BY 1
+    """).fetchall()
+    fps = {part: {"rows": int(n), "fingerprint": fp} for part, n, fp in rows}
+    # an empty table still produces its (header-only) file
+    if not spec.partition_by and not fps:
+        fps[_UNPARTITIONED] = {"rows": 0, "fingerprint": "empty"}
+    return fps
+
+
+def _part_path(spec: ExportSpec, part: str) -> Path:
+    if part == _UNPARTITIONED:
+        return spec.path
+    return spec.path / f"{spec.partition_name}={part}" / f"data.{spec.format}"
+
+
+# CSV cells keep the rendering of the earlier pandas to_csv export, so dashboard extracts see the
+# same text: pandas wrote booleans as True / False and HUGEINT sums (float64 in pandas) with a
+# trailing .0, where COPY writes true / false and plain integers. Other column types in the
+# exported marts already render the same.
+_CSV_CASTS = {
+    "BOOLEAN": "CASE WHEN {col} THEN 'True' WHEN NOT {col} THEN 'False' END",
+    "HUGEINT": "CAST({col} AS VARCHAR) || '.0'",
+}
 
-def export_table(con: duckdb.DuckDBPyConnection, table: str, filename: str) -> Dict:
+
+def _select_list(spec: ExportSpec, columns: List[Tuple[str, str]]) -> str:
+    """Columns of the COPY query: (name, type) pairs from DESCRIBE; casts apply to CSV only."""
+    if spec.format != "csv" or not any(dtype in _CSV_CASTS for _, dtype in columns):
+        return "*"
+    items = []
+    for name, dtype in columns:
+        col = f'"{name}"'
+        items.append(f"{_CSV_CASTS[dtype].format(col=col)} AS {col}" if dtype in _CSV_CASTS else col)
+    return ", ".join(items)
+
+
+def _incoming_dir(spec: ExportSpec) -> Path:
+    return spec.path.parent / f".{spec.name}.incoming"
+
+
+def copy_sql(
+    spec: ExportSpec,
+    columns: Optional[List[Tuple[str, str]]] = None,
+    parts: Optional[List[str]] = None,
+) -> str:
+    """
+    One COPY per export. A partitioned export writes only the given partitions, all in one scan,
+    as a hive-partitioned tree under _incoming_dir(spec); export_table moves the files into place.
+    """
+    if spec.format not in _FORMAT_OPTIONS:
+        raise ValueError(f"Unsupported export format: {spec.format}")
+    select = _select_list(spec, columns or [])
+    options = _FORMAT_OPTIONS[spec.format]
+    if not spec.partition_by:
+        return f"COPY (SELECT {select} FROM {spec.table}) TO '{spec.path.as_posix()}' ({options})"
+    keys = ", ".join("'" + part.replace("'", "''") + "'" for part in parts or [])
+    return (
+        f"COPY (SELECT {select}, {_partition_key(spec)} AS {spec.partition_name} FROM {spec.table} "
+        f"WHERE {_partition_key(spec)} IN ({keys})) "
+        f"TO '{_incoming_dir(spec).as_posix()}' ({options}, PARTITION_BY ({spec.partition_name}), OVERWRITE_OR_IGNORE)"
+    )
+
+
+def _write_parts(cur: duckdb.DuckDBPyConnection, spec: ExportSpec, columns: List[Tuple[str, str]], parts: List[str]) -> None:
+    """Write the changed files of one export: a single COPY, then (partitioned) a move per partition."""
+    if not spec.partition_by:
+        spec.path.parent.mkdir(parents=True, exist_ok=True)
+        cur.execute(copy_sql(spec, columns))
+        return
+    incoming = _incoming_dir(spec)
+    shutil.rmtree(incoming, ignore_errors=True)
+    try:
+        cur.execute(copy_sql(spec, columns, parts))
+        for part in parts:
+            written = list((incoming / f"{spec.partition_name}={part}").glob(f"*.{spec.format}"))
+            if len(written) != 1:
+                raise RuntimeError(f"{spec.table}: expected one file for partition {part!r}, got {len(written)}")
+            path = _part_path(spec, part)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(written[0], path)
+    finally:
+        shutil.rmtree(incoming, ignore_errors=True)
+
+
+def _is_current(previous: Optional[Dict], fp: Dict, path: Path) -> bool:
+    return (
+        previous is not None
+        and previous["fingerprint"] == fp["fingerprint"]
+        and path.exists()
+        and path.stat().st_size == previous["bytes"]
+    )
+
+
+def _remove_stale_files(spec: ExportSpec, keep: List[Path]) -> int:
+    """Drop files under a partitioned export that the manifest no longer lists (vanished partitions)."""
+    if not spec.partition_by or not spec.path.is_dir():
+        return 0
+    removed = 0
+    keep_set = {p.resolve() for p in keep}
+    for f in sorted(spec.path.rglob("*"), reverse=True):
+        if f.is_file() and f.resolve() not in keep_set:
+            f.unlink()
+            removed += 1
+        elif f.is_dir() and not any(f.iterdir()):
+            f.rmdir()
+    return removed
+
+
+def export_table(con: duckdb.DuckDBPyConnection, spec: ExportSpec, previous: Optional[Dict] = None) -> Tuple[Dict, Dict]:
+    """Export one spec incrementally; returns (run summary, manifest entry)."""
     t0 = time.perf_counter()
-    df = con.execute(f"SELECT * FROM {table}").df()
-    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
-    out_path = EXPORT_DIR / filename
-    df.to_csv(out_path, index=False)
-    t1 = time.perf_counter()
-    return {
-        "table": table,
-        "file": str(out_path),
-        "rows": int(len(df)),
-        "cols": int(df.shape[1]),
-        "seconds": round(t1 - t0, 3),
+    signature = {"table": spec.table, "format": spec.format, "partition_by": spec.partition_by}
+    previous_parts = previous["parts"] if previous and previous.get("signature") == signature else {}
+
+    cur = con.cursor()  # one cursor per worker thread
+    parts: Dict[str, Dict] = {}
+    rewritten: List[str] = []
+    bytes_written = 0
+    rows_written = 0
+    try:
+        fps = source_fingerprints(cur, spec)
+        columns = [(r[0], r[1]) for r in cur.execute(f"DESCRIBE {spec.table}").fetchall()]
+        for part, fp in sorted(fps.items()):
+            if _is_current(previous_parts.get(part), fp, _part_path(spec, part)):
+                parts[part] = previous_parts[part]
+            else:
+                rewritten.append(part)
+        if rewritten:
+            _write_parts(cur, spec, columns, rewritten)
+        for part in rewritten:
+            fp, path = fps[part], _part_path(spec, part)
+            size = path.stat().st_size
+            parts[part] = {**fp, "file": str(path), "bytes": size, "sha256": _sha256(path)}
+            bytes_written += size
+            rows_written += fp["rows"]
+    finally:
+        cur.close()
+    parts = dict(sorted(parts.items()))
+    removed = _remove_stale_files(spec, [_part_path(spec, p) for p in parts])
+    seconds = time.perf_counter() - t0
+
+    summary = {
+        "table": spec.table,
+        "file": str(spec.path),
+        "format": spec.format,
+        "partition_by": spec.partition_name if spec.partition_by else None,
+        "status": "skipped" if not rewritten else ("rewritten" if len(rewritten) == len(parts) else "partial"),
+        "files_rewritten": len(rewritten),
+        "files_skipped": len(parts) - len(rewritten),
+        "files_removed": removed,
+        "rewritten_partitions": rewritten if spec.partition_by else None,
+        "rows": sum(p["rows"] for p in parts.values()),
+        "cols": len(columns),
+        "bytes": sum(p["bytes"] for p in parts.values()),
+        "bytes_written": bytes_written,
+        "seconds": round(seconds, 3),
+        "rows_written": rows_written,
+        "rows_per_second": round(rows_written / seconds, 1) if rows_written and seconds > 0 else None,
     }
+    return summary, {"signature": signature, "parts": parts}
 
 
-def run() -> Dict:
+def run(exports: Optional[List[ExportSpec]] = None, max_workers: int = MAX_WORKERS, force: bool = False) -> Dict:
     t0 = time.perf_counter()
+    exports = exports if exports is not None else EXPORTS
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = {"version": MANIFEST_VERSION, "exports": {}} if force else load_manifest()
     con = duckdb.connect(DB_PATH)
+    telemetry = StepTelemetry("s9_export_for_tableau")
 
-    exports = []
-    for table, fname in TABLES:
-        exports.append(export_table(con, table, fname))
+    workers = max(1, min(max_workers, len(exports)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda spec: export_table(con, spec, manifest["exports"].get(spec.name)), exports))
 
+    # exports overlap in the pool, so CPU / RSS are only meaningful for the step as a whole
+    for summary, _ in results:
+        telemetry.record(
+            summary["file"],
+            wall_seconds=summary["seconds"],
+            rows_in=summary["rows"],
+            rows_out=summary["rows_written"],
+            bytes_written=summary["bytes_written"],
+            rows_per_second=summary["rows_per_second"],
+        )
+    step_usage = telemetry.finish(con)
     con.close()
+
+    for spec, (_, entry) in zip(exports, results):
+        manifest["exports"][spec.name] = entry
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
     t1 = time.perf_counter()
 
+    summaries = [r[0] for r in results]
     out = {
         "step": 9,
         "runtime_seconds": round(t1 - t0, 3),
-        "exports": exports,
+        "workers": workers,
+        "telemetry": step_usage,
+        "manifest": str(MANIFEST_PATH),
+        "files_rewritten": sum(r["files_rewritten"] for r in summaries),
+        "files_skipped": sum(r["files_skipped"] for r in summaries),
+        "bytes_written": sum(r["bytes_written"] for r in summaries),
+        "total_bytes": sum(r["bytes"] for r in summaries),
+        "exports": summaries,
     }
 
     OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import json
+import math
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import duckdb
+
+from src import s4_build_staging, s5_build_sla_engine, s6_build_marts, s7_driver_analysis, s8_scenario_modeling
+from src.sql_template import LAYERS, render_sql_file
+from src.telemetry import StepTelemetry
+
+DB_PATH = "ops_warehouse.duckdb"
+OUT_PATH = Path("reports/run_summaries/sample_pipeline_summary.json")
+
+DEFAULT_SAMPLE = 0.01
+SCHEMA_PREFIX = "sample_"
+Z_95 = 1.959964
+
+# Steps 4-8 SQL, in pipeline order; each file runs unchanged except for the schema names.
+SQL_FILES: List[str] = (
+    s4_build_staging.SQL_FILES
+    + s5_build_sla_engine.SQL_FILES
+    + s6_build_marts.SQL_FILES
+    + s7_driver_analysis.SQL_FILES
+    + s8_scenario_modeling.SQL_FILES
+)
+
+# Case-keyed raw tables are sampled; the rest are dimensions and are read in full.
+SAMPLED_TABLES = ("raw.cases", "raw.events_log")
+DIMENSION_TABLES = ("raw.calendar_dim", "raw.staffing_schedule")
+
+# A case is in the sample when the top 64 bits of md5(case_id), as a fraction of 2^64, fall below
+# the sampling rate: the same cases in every table and every run, and a 1% sample is a subset of
+# a 5% one.
+SAMPLE_PREDICATE = "md5_number_upper(case_id) / 18446744073709551616.0 < ?"
+
+# Headline metrics per tier (and ALL). Each is a total of y over the filtered cases, or a ratio
+# (percent of filtered cases with y = 1), both estimated from the sample by Horvitz-Thompson
+# weighting with inclusion probability = sampling rate. Filters follow the step 5 headlines.
+HEADLINES = {
+    "cases_with_sla_metrics": ("total", "1", "TRUE"),
+    "resolved_cases": ("total", "1", "resolved_ts IS NOT NULL"),
+    "sla_a_breaches_including_cw": ("total", "CAST(sla_a_breached_including_cw AS INT)", "resolved_ts IS NOT NULL"),
+    "sla_b_breach_pct": ("ratio", "CAST(sla_b_breached AS INT)", "resolved_ts IS NOT NULL"),
+    "sla_a_breach_pct_including_cw": ("ratio", "CAST(sla_a_breached_including_cw AS INT)", "resolved_ts IS NOT NULL"),
+    "sla_a_breach_pct_paused_cw": ("ratio", "CAST(sla_a_breached_paused_cw AS INT)", "resolved_ts IS NOT NULL"),
+}
+
+
+def sample_schema(schema: str) -> str:
+    return f"{SCHEMA_PREFIX}{schema}"
+
+
+def sample_table(table: str) -> str:
+    schema, name = table.split(".")
+    return f"{sample_schema(schema)}.{name}"
+
+
+SAMPLE_SCHEMAS = {layer: sample_schema(layer) for layer in LAYERS}
+
+
+def build_sample_raw(con: duckdb.DuckDBPyConnection, rate: float) -> Dict[str, int]:
+    for schema in SAMPLE_SCHEMAS.values():
+        con.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+    counts = {}
+    for table in SAMPLED_TABLES:
+        target = sample_table(table)
+        con.execute(f"CREATE OR REPLACE TABLE {target} AS SELECT * FROM {table} WHERE {SAMPLE_PREDICATE}", [rate])
+        counts[target] = con.execute(f"SELECT COUNT(*) FROM {target}").fetchone()[0]
+    for table in DIMENSION_TABLES:
+        target = sample_table(table)
+        con.execute(f"CREATE OR REPLACE VIEW {target} AS SELECT * FROM {table}")
+    return counts
+
+
+def _sums_sql(metrics_schema: str) -> str:
+    parts = []
+    for name, (_, y, where) in HEADLINES.items():
+        parts.append(f"COUNT(*) FILTER (WHERE {where}) AS {name}__n")
+        parts.append(f"SUM({y}) FILTER (WHERE {where}) AS {name}__y")
+        parts.append(f"SUM(({y}) * ({y})) FILTER (WHERE {where}) AS {name}__yy")
+    return f"""
+        SELECT COALESCE(tier, 'ALL') AS tier, {', '.join(parts)}
+        FROM {metrics_schema}.case_sla_metrics
+        GROUP BY GROUPING SETS ((), (tier))
+        ORDER BY tier
+    """
+
+
+def _sums(con: duckdb.DuckDBPyConnection, staging_schema: str) -> Dict[str, Dict]:
+    cur = con.execute(_sums_sql(staging_schema))
+    names = [d[0] for d in cur.description]
+    return {row[0]: dict(zip(names, row)) for row in cur.fetchall()}
+
+
+def estimate(kind: str, n: int, sum_y: float, sum_yy: float, rate: float) -> Dict:
+    """
+    Horvitz-Thompson estimate and 95% interval under Bernoulli sampling with probability `rate`.
+    total: Y = sum(y) / rate, Var = (1 - rate) / rate^2 * sum(y^2).
+    ratio: R = sum(y) / n (a ratio of two HT totals), linearized
+           Var = (1 - rate) * sum((y - R)^2) / n^2, reported in percent.
+    """
+    sum_y = float(sum_y or 0)
+    sum_yy = float(sum_yy or 0)
+    if kind == "total":
+        value = sum_y / rate
+        se = math.sqrt((1 - rate) * sum_yy) / rate
+        scale = 1.0
+    else:
+        if n == 0:
+            return {"estimate": None, "std_error": None, "ci_lower": None, "ci_upper": None}
+        value = sum_y / n
+        residual_ss = max(sum_yy - 2 * value * sum_y + value * value * n, 0.0)
+        se = math.sqrt((1 - rate) * residual_ss) / n
+        scale = 100.0
+    return {
+        "estimate": round(scale * value, 4),
+        "std_error": round(scale * se, 4),
+        "ci_lower": round(scale * (value - Z_95 * se), 4),
+        "ci_upper": round(scale * (value + Z_95 * se), 4),
+    }
+
+
+def headline_estimates(con: duckdb.DuckDBPyConnection, rate: float, compare_full: bool = True) -> Dict[str, Dict]:
+    """Scaled headlines per tier; with compare_full, the full-warehouse value and whether the interval covers it."""
+    sample = _sums(con, sample_schema("staging"))
+    full = _sums(con, "staging") if compare_full else {}
+    out: Dict[str, Dict] = {}
+    for tier, row in sample.items():
+        out[tier] = {}
+        for name, (kind, _, _) in HEADLINES.items():
+            est = estimate(kind, row[f"{name}__n"], row[f"{name}__y"], row[f"{name}__yy"], rate)
+            if tier in full:
+                f = full[tier]
+                exact = estimate(kind, f[f"{name}__n"], f[f"{name}__y"], f[f"{name}__yy"], 1.0)["estimate"]
+                est["full_value"] = exact
+                est["within_ci"] = None if est["estimate"] is None else bool(est["ci_lower"] <= exact <= est["ci_upper"])
+            out[tier][name] = est
+    return out
+
+
+def _has_full_staging(con: duckdb.DuckDBPyConnection) -> bool:
+    return bool(con.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE schema_name = 'staging' AND table_name = 'case_sla_metrics'"
+    ).fetchone()[0])
+
+
+def run(rate: float = DEFAULT_SAMPLE) -> Dict:
+    if not 0 < rate <= 1:
+        raise ValueError(f"Sampling rate must be in (0, 1], got {rate}")
+    t0 = time.perf_counter()
+    con = duckdb.connect(DB_PATH)
+    telemetry = StepTelemetry("sample_pipeline")
+
+    with telemetry.track("sample raw"):
+        sampled = build_sample_raw(con, rate)
+    full_cases = con.execute("SELECT COUNT(*) FROM raw.cases").fetchone()[0]
+    t_sample = time.perf_counter()
+
+    file_timings = {}
+    for f in SQL_FILES:
+        sql = render_sql_file(f, schemas=SAMPLE_SCHEMAS)
+        with telemetry.track(f, con, sql) as usage:
+            con.execute(sql)
+        file_timings[f] = usage["wall_seconds"]
+    t_chain = time.perf_counter()
+
+    headlines = headline_estimates(con, rate, compare_full=_has_full_staging(con))
+    step_usage = telemetry.finish(con)
+    con.close()
+    t_end = time.perf_counter()
+
+    sample_cases = sampled[sample_table("raw.cases")]
+    out = {
+        "step": "sample_pipeline",
+        "sample_rate": rate,
+        "schemas": list(SAMPLE_SCHEMAS.values()),
+        "runtime_seconds": {
+            "sample": round(t_sample - t0, 3),
+            "by_file": file_timings,
+            "chain": round(t_chain - t_sample, 3),
+            "end_to_end": round(t_end - t0, 3),
+        },
+        "telemetry": step_usage,
+        "counts": {**sampled, "raw.cases": full_cases},
+        "scale_factor": round(1 / rate, 4),
+        # full cases / sampled cases: how far the realized sample is from the nominal rate
+        "realized_scale_factor": round(full_cases / sample_cases, 4) if sample_cases else None,
+        "headlines": headlines,
+        "notes": {
+            "estimator": "Horvitz-Thompson with inclusion probability = sample rate; 95% normal intervals.",
+            "dimensions": "Calendar and staffing tables are not sampled, so staffing-per-case marts in the sample schemas are not on the full-run scale.",
+        },
+    }
+
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    OUT_PATH.write_text(json.dumps(out, indent=2, default=str), encoding="utf-8")
+    print(json.dumps(out, indent=2, default=str))
+    print(f"\nWrote: {OUT_PATH}")
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run steps 4-8 on a stable hash sample of cases in sample_* schemas.")
+    parser.add_argument("--sample", type=float, default=DEFAULT_SAMPLE, help="fraction of cases to keep, e.g. 0.01")
+    args = parser.parse_args()
+
+    run(args.sample)
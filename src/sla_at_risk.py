@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import heapq
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from src.business_time import BusinessClock
+from src.config import CONFIG
+from src.warehouse import current_path
+
+# None = follow the published warehouse snapshot (src/warehouse.py CURRENT pointer)
+DB_PATH: Optional[str] = None
+OUT_PATH = Path("reports/run_summaries/sla_at_risk_summary.json")
+AT_RISK_TABLE = "mart.sla_at_risk"
+DEFAULT_TOP_N = 50
+
+SLA_B_MINUTES = int(CONFIG.sla.first_touch_hours * 60)
+SLA_A_MINUTES = int(CONFIG.sla.first_resolution_hours * 60)
+
+# Open SLA clocks per case, from staging.case_milestones (staging.case_sla_metrics only carries
+# cases with a terminal milestone). A clock's deadline is the business minute index at which it
+# breaches: intake index + threshold, with the step 5 "first business minute at/after" rule. The
+# index is taken on the engine's BusinessClock rather than staging.business_minutes_dim, because
+# live intakes run past the end of raw.calendar_dim. SLA A is the including-customer-wait clock.
+# {case_filter} scopes the query to a batch of cases.
+OPEN_CLOCKS_SQL = f"""
+WITH open_cases AS (
+  SELECT case_id, tier, case_type, intake_ts, triage_ts
+  FROM staging.case_milestones
+  WHERE resolved_ts IS NULL
+    AND cancelled_ts IS NULL
+    AND intake_ts IS NOT NULL
+    AND {{case_filter}}
+)
+SELECT case_id, tier, case_type, intake_ts, 'B' AS sla, {SLA_B_MINUTES} AS threshold_minutes
+FROM open_cases
+WHERE triage_ts IS NULL
+UNION ALL
+SELECT case_id, tier, case_type, intake_ts, 'A' AS sla, {SLA_A_MINUTES} AS threshold_minutes
+FROM open_cases
+"""
+
+# Calendar days the clock must reach past any intake or as-of instant: SLA A spans less than this
+# many weeks of config business hours, plus a week of slack.
+BUSINESS_MINUTES_PER_WEEK = (
+    len(CONFIG.business_hours.workdays) * (CONFIG.business_hours.end_hour - CONFIG.business_hours.start_hour) * 60
+)
+COVER_DAYS = 7 * (SLA_A_MINUTES // BUSINESS_MINUTES_PER_WEEK + 2)
+
+AS_OF_SQL = "SELECT MAX(event_ts_canonical) FROM staging.events_clean"
+
+Key = Tuple[str, str]  # (case_id, sla)
+
+
+class AtRiskQueue:
+    """
+    Min-heap of open SLA clocks ordered by deadline (business-minute index).
+    Deadlines never move while a clock is open, so the order is fixed and updates are a push;
+    closed or re-scored clocks are dropped lazily when they surface. Every push is stamped with a
+    sequence number and only the clock's latest stamp is valid, so a re-scored clock never surfaces
+    twice. Clocks whose deadline has passed are moved to `breached` as the as-of index advances
+    (it must not go backwards).
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[int, int, str, str]] = []  # (deadline_idx, seq, case_id, sla)
+        self._live: Dict[Key, Dict] = {}
+        self._seq: Dict[Key, int] = {}  # latest stamp per live clock
+        self._next_seq = 0
+        self.breached: Dict[Key, Dict] = {}
+        self._as_of_idx = -1
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def _push(self, key: Key, row: Dict) -> None:
+        self._next_seq += 1
+        self._seq[key] = self._next_seq
+        heapq.heappush(self._heap, (int(row["deadline_idx"]), self._next_seq, key[0], key[1]))
+
+    def _compact(self) -> None:
+        # stale entries are only discarded when they surface; rebuild once they outnumber live ones
+        if len(self._heap) > 2 * len(self._live) + 1024:
+            self._heap = [e for e in self._heap if self._seq.get((e[2], e[3])) == e[1]]
+            heapq.heapify(self._heap)
+
+    def replace_cases(self, case_ids: Iterable[str], clocks: pd.DataFrame) -> None:
+        """Drop every clock of the given cases, then add their currently open clocks."""
+        case_ids = set(case_ids)
+        for key in [k for k in self._live if k[0] in case_ids]:
+            del self._live[key]
+            del self._seq[key]
+        for key in [k for k in self.breached if k[0] in case_ids]:
+            del self.breached[key]
+        for row in clocks.to_dict(orient="records"):
+            key = (row["case_id"], row["sla"])
+            if row["deadline_idx"] < self._as_of_idx:
+                self.breached[key] = row
+            else:
+                self._live[key] = row
+                self._push(key, row)
+        self._compact()
+
+    def _pop_valid(self) -> Optional[Tuple[int, Dict]]:
+        """Pop the earliest clock whose entry carries its latest stamp: (seq, row)."""
+        while self._heap:
+            _, seq, case_id, sla = heapq.heappop(self._heap)
+            if self._seq.get((case_id, sla)) == seq:
+                return seq, self._live[(case_id, sla)]
+        return None
+
+    def advance(self, as_of_idx: int) -> None:
+        self._as_of_idx = max(self._as_of_idx, as_of_idx)
+        while self._heap and self._heap[0][0] < self._as_of_idx:
+            popped = self._pop_valid()
+            if popped is None:
+                break
+            seq, row = popped
+            if int(row["deadline_idx"]) >= self._as_of_idx:
+                heapq.heappush(self._heap, (int(row["deadline_idx"]), seq, row["case_id"], row["sla"]))
+                break
+            key = (row["case_id"], row["sla"])
+            del self._live[key]
+            del self._seq[key]
+            self.breached[key] = row
+
+    def top(self, n: int) -> List[Dict]:
+        """The n open clocks closest to breaching (smallest remaining business minutes)."""
+        popped: List[Tuple[int, Dict]] = []
+        seen = set()
+        while len(popped) < n:
+            entry = self._pop_valid()
+            if entry is None:
+                break
+            key = (entry[1]["case_id"], entry[1]["sla"])
+            if key in seen:
+                continue
+            seen.add(key)
+            popped.append(entry)
+        for seq, row in popped:
+            heapq.heappush(self._heap, (int(row["deadline_idx"]), seq, row["case_id"], row["sla"]))
+        return [row for _, row in popped]
+
+    def rows(self) -> List[Dict]:
+        return list(self._live.values()) + list(self.breached.values())
+
+
+class AtRiskEngine:
+    """Keeps an AtRiskQueue in step with staging and writes mart.sla_at_risk."""
+
+    def __init__(self, con: duckdb.DuckDBPyConnection):
+        # staging.business_minutes_dim opens at the business hour in the session time zone, so the
+        # clock does too; calendar_dim holidays inside the generated window, config workdays past it
+        self.tz = con.execute("SELECT current_setting('TimeZone')").fetchone()[0]
+        self.clock = BusinessClock.from_warehouse(con, self.tz)
+        self.queue = AtRiskQueue()
+        self.as_of: Optional[pd.Timestamp] = None
+
+    def _cover(self, ts) -> None:
+        """Extend the clock so deadlines of clocks opened by ts, and ts itself, are on the spine."""
+        ts = pd.Timestamp(ts)
+        ts = ts.tz_localize("UTC") if ts.tz is None else ts
+        local_day = ts.tz_convert(self.tz).date()
+        self.clock.extend_through(local_day + timedelta(days=COVER_DAYS), tz=self.tz)
+
+    def _as_of_idx(self) -> int:
+        return int(self.clock.index([self.as_of.timestamp()])[0])
+
+    def _advance_to(self, as_of) -> None:
+        if as_of is None:
+            return
+        as_of = pd.Timestamp(as_of)
+        self._cover(as_of)
+        if self.as_of is None or as_of > self.as_of:
+            self.as_of = as_of
+        self.queue.advance(self._as_of_idx())
+
+    def _open_clocks(self, con: duckdb.DuckDBPyConnection, case_filter: str) -> pd.DataFrame:
+        clocks = con.execute(OPEN_CLOCKS_SQL.format(case_filter=case_filter)).df()
+        if clocks.empty:
+            clocks["deadline_idx"] = pd.Series(dtype=np.int64)
+            return clocks.drop(columns="threshold_minutes")
+        intake = pd.to_datetime(clocks["intake_ts"], utc=True)
+        self._cover(intake.max())
+        intake_epoch = (intake - pd.Timestamp(0, tz="UTC")).dt.total_seconds().to_numpy()
+        clocks["deadline_idx"] = self.clock.index(intake_epoch) + clocks.pop("threshold_minutes").to_numpy()
+        return clocks
+
+    def load(self, con: duckdb.DuckDBPyConnection) -> None:
+        self._advance_to(con.execute(AS_OF_SQL).fetchone()[0])
+        clocks = self._open_clocks(con, "TRUE")
+        self.queue.replace_cases([], clocks)
+
+    def refresh_cases(self, con: duckdb.DuckDBPyConnection, cases_relation: str) -> int:
+        """Re-score the cases listed in a relation (e.g. the stream batch) after staging changed."""
+        case_ids = [r[0] for r in con.execute(f"SELECT case_id FROM {cases_relation}").fetchall()]
+        clocks = self._open_clocks(con, f"case_id IN (SELECT case_id FROM {cases_relation})")
+        self._advance_to(con.execute(f"""
+            SELECT MAX(event_ts_canonical)
+            FROM staging.events_clean
+            WHERE case_id IN (SELECT case_id FROM {cases_relation})
+        """).fetchone()[0])
+        self.queue.replace_cases(case_ids, clocks)
+        return len(clocks)
+
+    def top(self, n: int = DEFAULT_TOP_N) -> pd.DataFrame:
+        return self._frame(self.queue.top(n))
+
+    def _frame(self, rows: List[Dict]) -> pd.DataFrame:
+        df = pd.DataFrame(rows, columns=["case_id", "tier", "case_type", "intake_ts", "sla", "deadline_idx"])
+        deadline = df["deadline_idx"].to_numpy(dtype=np.int64)
+        in_spine = deadline < len(self.clock.minute_starts)
+        deadline_epoch = self.clock.minute_starts[np.minimum(deadline, len(self.clock.minute_starts) - 1)]
+        df["deadline_ts"] = pd.to_datetime(np.where(in_spine, deadline_epoch, np.nan), unit="s", utc=True)
+        df["remaining_business_minutes"] = deadline - self._as_of_idx()
+        df["is_breached"] = df["remaining_business_minutes"] < 0
+        df["as_of_ts"] = self.as_of
+        return df.drop(columns="deadline_idx")
+
+    def write_mart(self, con: duckdb.DuckDBPyConnection) -> int:
+        at_risk_df = self._frame(self.queue.rows())
+        con.execute(f"""
+            CREATE OR REPLACE TABLE {AT_RISK_TABLE} AS
+            SELECT
+              *,
+              ROW_NUMBER() OVER (ORDER BY remaining_business_minutes, case_id, sla) AS risk_rank
+            FROM at_risk_df
+        """)
+        return len(at_risk_df)
+
+
+def run(top_n: int = DEFAULT_TOP_N) -> Dict:
+    t0 = time.perf_counter()
+    con = duckdb.connect(DB_PATH or str(current_path()))
+
+    engine = AtRiskEngine(con)
+    engine.load(con)
+    t_load = time.perf_counter()
+
+    top = engine.top(top_n)
+    t_top = time.perf_counter()
+
+    rows = engine.write_mart(con)
+    con.close()
+    t_end = time.perf_counter()
+
+    out = {
+        "step": "sla_at_risk",
+        "runtime_seconds": {
+            "load": round(t_load - t0, 3),
+            "top_n_query_ms": round(1000 * (t_top - t_load), 3),
+            "write_mart": round(t_end - t_top, 3),
+            "end_to_end": round(t_end - t0, 3),
+        },
+        "as_of_ts": str(engine.as_of),
+        "counts": {
+            "open_clocks": len(engine.queue),
+            "breached_open_clocks": len(engine.queue.breached),
+            "sla_at_risk_rows": rows,
+        },
+        "top": top.head(10).to_dict(orient="records"),
+    }
+
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    OUT_PATH.write_text(json.dumps(out, indent=2, default=str), encoding="utf-8")
+    print(json.dumps(out, indent=2, default=str))
+    print(f"\nWrote: {OUT_PATH}")
+    return out
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import duckdb
+
+SKETCH_TABLE = "mart.sla_quantile_sketch"
+
+SKETCH_METRICS: Tuple[str, ...] = (
+    "first_touch_business_minutes",
+    "first_resolution_business_minutes_including_cw",
+    "first_resolution_business_minutes_paused_cw",
+)
+DEFAULT_QUANTILES: Tuple[float, ...] = (0.50, 0.90, 0.95)
+
+
+@dataclass(frozen=True)
+class MergedSketch:
+    """
+    Merged log-bucket sketch for one metric over an arbitrary slice of (intake_date, tier) cells.
+    Built from mart.sla_quantile_sketch (see sql/mart/s6_06_sla_quantile_sketch.sql).
+    """
+
+    metric: str
+    n: int
+    zero_count: int
+    min_value: Optional[float]
+    max_value: Optional[float]
+    relative_accuracy: float
+    buckets: Tuple[Tuple[int, int], ...]  # (bucket_key, count) ascending by key
+
+    @property
+    def gamma(self) -> float:
+        return (1.0 + self.relative_accuracy) / (1.0 - self.relative_accuracy)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Rank-based quantile estimate. Relative error is bounded by relative_accuracy
+        against the order statistic at rank q * (n - 1).
+        """
+        if self.n == 0:
+            return None
+        rank = q * (self.n - 1)
+        if rank < self.zero_count:
+            return 0.0
+
+        cum = self.zero_count
+        value = self.max_value
+        for key, count in self.buckets:
+            cum += count
+            if cum > rank:
+                value = 2.0 * self.gamma ** key / (self.gamma + 1.0)
+                break
+
+        # bucket representatives can overshoot the observed range at the extremes
+        return float(min(max(value, self.min_value), self.max_value))
+
+
+def merge_sketches(
+    con: duckdb.DuckDBPyConnection,
+    metric: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    tiers: Optional[Sequence[str]] = None,
+) -> MergedSketch:
+    """
+    Merge per-day, per-tier sketches for any date range (inclusive) and tier combination.
+    Only the sketch table is read; case-level rows are never touched.
+    """
+    where = ["metric = ?"]
+    params: List = [metric]
+    if start_date is not None:
+        where.append("intake_date >= ?")
+        params.append(start_date)
+    if end_date is not None:
+        where.append("intake_date <= ?")
+        params.append(end_date)
+    if tiers is not None:
+        where.append("list_contains(?, tier)")
+        params.append(list(tiers))
+    where_sql = " AND ".join(where)
+
+    totals = con.execute(f"""
+        SELECT
+          COALESCE(SUM(n), 0) AS n,
+          COALESCE(SUM(zero_count), 0) AS zero_count,
+          MIN(min_value) AS min_value,
+          MAX(max_value) AS max_value,
+          MAX(relative_accuracy) AS relative_accuracy
+        FROM {SKETCH_TABLE}
+        WHERE {where_sql}
+    """, params).fetchone()
+
+    buckets = con.execute(f"""
+        SELECT bucket_key, SUM(bucket_count) AS bucket_count
+        FROM (
+          SELECT
+            UNNEST(bucket_keys) AS bucket_key,
+            UNNEST(bucket_counts) AS bucket_count
+          FROM {SKETCH_TABLE}
+          WHERE {where_sql}
+        )
+        GROUP BY 1
+        ORDER BY 1
+    """, params).fetchall()
+
+    return MergedSketch(
+        metric=metric,
+        n=int(totals[0]),
+        zero_count=int(totals[1]),
+        min_value=totals[2],
+        max_value=totals[3],
+        relative_accuracy=float(totals[4]) if totals[4] is not None else 0.0,
+        buckets=tuple((int(k), int(c)) for k, c in buckets),
+    )
+
+
+def merged_quantiles(
+    con: duckdb.DuckDBPyConnection,
+    metric: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    tiers: Optional[Sequence[str]] = None,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+) -> Dict[str, Optional[float]]:
+    sketch = merge_sketches(con, metric, start_date=start_date, end_date=end_date, tiers=tiers)
+    return {f"p{int(round(q * 100))}": sketch.quantile(q) for q in quantiles}
+
+
+def rolling_quantiles(
+    con: duckdb.DuckDBPyConnection,
+    metric: str,
+    end_date: date,
+    window_days: int = 28,
+    tiers: Optional[Sequence[str]] = None,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+) -> Dict[str, Optional[float]]:
+    start_date = end_date - timedelta(days=window_days - 1)
+    return merged_quantiles(con, metric, start_date=start_date, end_date=end_date, tiers=tiers, quantiles=quantiles)
+
+
+def _rel_error(estimate: Optional[float], exact: Optional[float]) -> Optional[float]:
+    if estimate is None or exact is None:
+        return None
+    if exact == 0:
+        return 0.0 if estimate == 0 else math.inf
+    return abs(estimate - exact) / abs(exact)
+
+
+def error_vs_exact(
+    con: duckdb.DuckDBPyConnection,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+) -> Dict:
+    """
+    Compare sketch rollups against exact quantile_cont over staging.case_sla_metrics
+    for two rollup shapes: per tier over the full window, and per intake week (all tiers).
+    Returns max / mean relative error per metric.
+    """
+    out: Dict = {}
+    q_cols = ", ".join(f"quantile_cont({{m}}, {q}) AS p{int(round(q * 100))}" for q in quantiles)
+
+    for metric in SKETCH_METRICS:
+        errors: List[float] = []
+
+        exact_by_tier = con.execute(f"""
+            SELECT tier, {q_cols.format(m=metric)}
+            FROM staging.case_sla_metrics
+            WHERE {metric} IS NOT NULL
+            GROUP BY 1
+        """).fetchall()
+        for row in exact_by_tier:
+            est = merged_quantiles(con, metric, tiers=[row[0]], quantiles=quantiles)
+            for i, key in enumerate(est):
+                err = _rel_error(est[key], row[1 + i])
+                if err is not None:
+                    errors.append(err)
+
+        exact_by_week = con.execute(f"""
+            SELECT
+              CAST(date_trunc('week', intake_date) AS DATE) AS week_start,
+              {q_cols.format(m=metric)}
+            FROM staging.case_sla_metrics
+            WHERE {metric} IS NOT NULL
+            GROUP BY 1
+        """).fetchall()
+        for row in exact_by_week:
+            week_start = row[0]
+            est = merged_quantiles(
+                con, metric, start_date=week_start, end_date=week_start + timedelta(days=6), quantiles=quantiles
+            )
+            for i, key in enumerate(est):
+                err = _rel_error(est[key], row[1 + i])
+                if err is not None:
+                    errors.append(err)
+
+        finite = [e for e in errors if math.isfinite(e)]
+        out[metric] = {
+            "rollups_compared": len(exact_by_tier) + len(exact_by_week),
+            "max_rel_error": (round(max(finite), 5) if finite else None),
+            "mean_rel_error": (round(sum(finite) / len(finite), 5) if finite else None),
+            "non_finite_errors": len(errors) - len(finite),
+        }
+
+    return out
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from pathlib import Path
+from string import Template
+from typing import Dict, Optional
+
+from src.config import CONFIG, Config
+
+# Warehouse layers. SQL files name their tables ${raw}.x / ${staging}.x / ${mart}.x, so the same
+# files can build into other schemas (config variants, sampled runs).
+LAYERS = ("raw", "staging", "mart")
+DEFAULT_SCHEMAS: Dict[str, str] = {layer: layer for layer in LAYERS}
+
+
+def variant_schemas(suffix: str) -> Dict[str, str]:
+    """Schemas of a config variant: its own staging / mart, the shared raw layer."""
+    return {"raw": "raw", "staging": f"staging_{suffix}", "mart": f"mart_{suffix}"}
+
+
+def scenario_names(config: Config = CONFIG) -> Dict[str, str]:
+    """mart.scenario_results names; shared with the bootstrap intervals (src/bootstrap.py)."""
+    levers = config.scenarios
+    return {
+        "s1": f"S1_{levers.s1_tier.replace('_', '')}_reduce_investigation_to_reviewQA_{round(100 * levers.s1_stage_reduction_pct)}pct",
+        "s2": f"S2_reduce_reopens_{round(100 * levers.s2_reopen_reduction_pct)}pct",
+        "s3": "S3_combined_S1_plus_S2",
+    }
+
+
+def _sql_literal(value: Optional[str]) -> str:
+    return "CAST(NULL AS VARCHAR)" if value is None else "'" + value.replace("'", "''") + "'"
+
+
+def sql_params(config: Config = CONFIG, schemas: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Template parameters: schema names plus the config values the SQL layer depends on."""
+    hours = config.business_hours
+    names = scenario_names(config)
+    return {
+        **DEFAULT_SCHEMAS,
+        **(schemas or {}),
+        "sla_b_minutes": str(int(config.sla.first_touch_hours * 60)),
+        "sla_a_minutes": str(int(config.sla.first_resolution_hours * 60)),
+        "business_start_hour": str(hours.start_hour),
+        "business_day_minutes": str((hours.end_hour - hours.start_hour) * 60),
+        "exposure_cap_biz_days": str(config.drivers.congestion_exposure_cap_biz_days),
+        "exposure_weighting": config.drivers.congestion_exposure_weighting,
+        "s1_tier": config.scenarios.s1_tier,
+        "s1_reduction_pct": repr(config.scenarios.s1_stage_reduction_pct),
+        "s2_reopen_reduction_pct": repr(config.scenarios.s2_reopen_reduction_pct),
+        "s1_scenario_name": names["s1"],
+        "s2_scenario_name": names["s2"],
+        "s3_scenario_name": names["s3"],
+        # VALUES rows of the allowed (prev_status, status) matrix and an IN list of terminal states
+        "allowed_transitions": ",\n  ".join(
+            f"({_sql_literal(a)}, {_sql_literal(b)})" for a, b in config.states.allowed_transitions()
+        ),
+        "terminal_states": ", ".join(_sql_literal(s) for s in config.states.terminal_states),
+    }
+
+
+def render(sql: str, params: Dict[str, str]) -> str:
+    # substitute() (not safe_substitute): an unknown ${name} is an error, never silently left in
+    return Template(sql).substitute(params)
+
+
+def render_sql_file(path: str, config: Config = CONFIG, schemas: Optional[Dict[str, str]] = None) -> str:
+    return render(Path(path).read_text(encoding="utf-8"), sql_params(config, schemas))
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import duckdb
+import pyarrow.ipc as ipc
+
+from src.case_refresh import BATCH_CASES, refresh_batch_cases, refresh_statements
+from src.s4_build_staging import ALL_CASES_FILES
+from src.sla_at_risk import AtRiskEngine
+from src.sql_template import render_sql_file
+from src.warehouse import current_path
+
+# None = follow the published warehouse snapshot (src/warehouse.py CURRENT pointer)
+DB_PATH: Optional[str] = None
+SPOOL_DIR = Path("data/stream/spool")
+PROCESSED_DIR = Path("data/stream/processed")
+OUT_PATH = Path("reports/run_summaries/stream_ingest_summary.json")
+
+POLL_SECONDS = 0.5
+MAX_FILES_PER_BATCH = 64
+
+# Writers drop complete files into the spool (write *.tmp, then rename). File name prefix picks the
+# target table; anything else is an event file.
+SPOOL_SUFFIXES = (".jsonl", ".arrow")
+CASES_PREFIX = "cases"
+
+# Staging steps re-run for the cases touched by a batch. Each file is the batch definition from
+# steps 4/5, scoped to the batch's cases, so streaming and batch builds share one set of rules.
+REFRESH_SQL_FILES = [
+    "sql/staging/s4_01_events_dedup.sql",
+    "sql/staging/s4_02_events_clean.sql",
+    "sql/staging/s4_03_case_milestones.sql",
+    "sql/staging/s4_04_event_transitions.sql",
+    "sql/staging/s5_02_case_sla_metrics.sql",
+]
+
+
+class SpoolIngestor:
+    """
+    Tails SPOOL_DIR and micro-batches every complete file found per poll into raw.cases /
+    raw.events_log, then refreshes staging for the affected cases, all in one transaction.
+    Processed files move to PROCESSED_DIR. With an AtRiskEngine, the affected cases' open SLA
+    clocks are re-scored after each commit and mart.sla_at_risk is rewritten.
+    """
+
+    def __init__(
+        self,
+        con: duckdb.DuckDBPyConnection,
+        spool_dir: Path = SPOOL_DIR,
+        processed_dir: Path = PROCESSED_DIR,
+        max_files: int = MAX_FILES_PER_BATCH,
+        at_risk: Optional[AtRiskEngine] = None,
+    ):
+        self.con = con
+        self.at_risk = at_risk
+        self.spool_dir = spool_dir
+        self.processed_dir = processed_dir
+        self.max_files = max_files
+        self.refresh_sql = refresh_statements(REFRESH_SQL_FILES)
+        # step 4 tables over all cases (transition violation rates): rebuilt in full after each batch
+        self.all_cases_sql = [render_sql_file(f) for f in ALL_CASES_FILES]
+        # column names and types of each raw target, used to read spool files with a fixed schema
+        self.schemas = {
+            table: [(r[0], r[1]) for r in con.execute(f"DESCRIBE {table}").fetchall()]
+            for table in ("raw.cases", "raw.events_log")
+        }
+        self.batches: List[Dict] = []
+        self.last_batch_cases: List[str] = []
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.processed_dir.mkdir(parents=True, exist_ok=True)
+
+    def pending(self) -> List[Path]:
+        files = sorted(p for p in self.spool_dir.iterdir() if p.is_file() and p.suffix in SPOOL_SUFFIXES)
+        return files[: self.max_files]
+
+    def _stage_files(self, table: str, files: List[Path], relation: str) -> int:
+        """Load one table's spool files into a temp relation with the raw table's columns and types."""
+        cols = ", ".join(name for name, _ in self.schemas[table])
+        json_columns = "{" + ", ".join(f"'{name}': '{dtype}'" for name, dtype in self.schemas[table]) + "}"
+        self.con.execute(f"CREATE OR REPLACE TEMP TABLE {relation} AS SELECT {cols} FROM {table} LIMIT 0")
+        for f in files:
+            if f.suffix == ".arrow":
+                with ipc.open_file(f) as reader:
+                    batch_table = reader.read_all()
+                self.con.register("spool_arrow", batch_table)
+                self.con.execute(f"INSERT INTO {relation} BY NAME SELECT {cols} FROM spool_arrow")
+                self.con.unregister("spool_arrow")
+            else:
+                self.con.execute(f"""
+                    INSERT INTO {relation} BY NAME
+                    SELECT {cols}
+                    FROM read_json(?, format='newline_delimited', columns={json_columns})
+                """, [str(f)])
+        return self.con.execute(f"SELECT COUNT(*) FROM {relation}").fetchone()[0]
+
+    def ingest(self, files: List[Path]) -> Dict:
+        t0 = time.perf_counter()
+        arrived = min(f.stat().st_mtime for f in files)
+        case_files = [f for f in files if f.name.startswith(CASES_PREFIX)]
+        event_files = [f for f in files if not f.name.startswith(CASES_PREFIX)]
+
+        self.con.execute("BEGIN TRANSACTION")
+        try:
+            new_cases = self._stage_files("raw.cases", case_files, "stream_cases")
+            new_events = self._stage_files("raw.events_log", event_files, "stream_events")
+            self.con.execute("INSERT INTO raw.cases SELECT * FROM stream_cases")
+            self.con.execute("INSERT INTO raw.events_log SELECT * FROM stream_events")
+            self.con.execute(f"""
+                CREATE OR REPLACE TEMP TABLE {BATCH_CASES} AS
+                SELECT case_id FROM stream_cases
+                UNION
+                SELECT case_id FROM stream_events
+            """)
+            t_load = time.perf_counter()
+            affected = refresh_batch_cases(self.con, self.refresh_sql)
+            batch_cases = [r[0] for r in self.con.execute(f"SELECT case_id FROM {BATCH_CASES}").fetchall()]
+            if affected:
+                for sql in self.all_cases_sql:
+                    self.con.execute(sql)
+            self.con.execute("COMMIT")
+        except Exception:
+            self.con.execute("ROLLBACK")
+            raise
+        t_end = time.perf_counter()
+        self.last_batch_cases = batch_cases
+
+        if self.at_risk is not None:
+            self.at_risk.refresh_cases(self.con, BATCH_CASES)
+            self.at_risk.write_mart(self.con)
+        t_risk = time.perf_counter()
+
+        for f in files:
+            shutil.move(str(f), self.processed_dir / f.name)
+
+        seconds = t_end - t0
+        batch = {
+            "files": len(files),
+            "cases": int(new_cases),
+            "events": int(new_events),
+            "affected_cases": int(affected),
+            "load_seconds": round(t_load - t0, 4),
+            "refresh_seconds": round(t_end - t_load, 4),
+            "at_risk_seconds": round(t_risk - t_end, 4),
+            "events_per_second": round(new_events / seconds, 1) if seconds > 0 else None,
+            # spool arrival (oldest file mtime) -> staging committed
+            "end_to_end_latency_seconds": round(time.time() - arrived, 4),
+        }
+        self.batches.append(batch)
+        return batch
+
+    def poll_once(self) -> Optional[Dict]:
+        files = self.pending()
+        return self.ingest(files) if files else None
+
+    def metrics(self) -> Dict:
+        if not self.batches:
+            return {"batches": 0}
+        events = sum(b["events"] for b in self.batches)
+        busy = sum(b["load_seconds"] + b["refresh_seconds"] for b in self.batches)
+        latencies = sorted(b["end_to_end_latency_seconds"] for b in self.batches)
+        return {
+            "batches": len(self.batches),
+            "files": sum(b["files"] for b in self.batches),
+            "events": events,
+            "cases": sum(b["cases"] for b in self.batches),
+            "events_per_busy_second": round(events / busy, 1) if busy > 0 else None,
+            "latency_p50_seconds": latencies[len(latencies) // 2],
+            "latency_max_seconds": latencies[-1],
+        }
+
+
+def check_visible(db_path: str, case_ids: List[str]) -> Dict:
+    """How many of a batch's cases a fresh reader of db_path sees in staging.case_milestones."""
+    con = duckdb.connect(db_path, read_only=True)
+    try:
+        visible = con.execute(
+            "SELECT COUNT(*) FROM staging.case_milestones WHERE case_id IN (SELECT UNNEST(?))", [case_ids]
+        ).fetchone()[0]
+    finally:
+        con.close()
+    return {"db_path": db_path, "batch_cases": len(case_ids), "visible_cases": int(visible)}
+
+
+def _open(db_path: str, spool_dir: Path, at_risk: bool) -> SpoolIngestor:
+    con = duckdb.connect(db_path)
+    engine = None
+    if at_risk:
+        engine = AtRiskEngine(con)
+        engine.load(con)
+    return SpoolIngestor(con, spool_dir, at_risk=engine)
+
+
+def run(
+    spool_dir: Path = SPOOL_DIR,
+    poll_seconds: float = POLL_SECONDS,
+    max_batches: Optional[int] = None,
+    idle_exit_seconds: Optional[float] = None,
+    at_risk: bool = True,
+) -> Dict:
+    """
+    Poll the spool until interrupted (or until max_batches / idle_exit_seconds), then write the
+    throughput and latency summary. Without an explicit DB_PATH the ingestor writes to the
+    published snapshot and reopens when CURRENT moves, so batches land where readers look; the
+    summary checks that the last batch is visible to a fresh reader of that file.
+    """
+    t0 = time.perf_counter()
+    db_path = DB_PATH or str(current_path())
+    ingestor = _open(db_path, spool_dir, at_risk)
+    batches: List[Dict] = []
+
+    last_batch = time.perf_counter()
+    try:
+        while max_batches is None or len(batches) + len(ingestor.batches) < max_batches:
+            if DB_PATH is None and str(current_path()) != db_path:
+                # a new snapshot was published: follow it
+                batches += ingestor.batches
+                ingestor.con.close()
+                db_path = str(current_path())
+                ingestor = _open(db_path, spool_dir, at_risk)
+            batch = ingestor.poll_once()
+            if batch is not None:
+                print(json.dumps(batch))
+                last_batch = time.perf_counter()
+                continue
+            if idle_exit_seconds is not None and time.perf_counter() - last_batch > idle_exit_seconds:
+                break
+            time.sleep(poll_seconds)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ingestor.con.close()
+
+    ingestor.batches = batches + ingestor.batches
+    out = {
+        "step": "stream_ingest",
+        "runtime_seconds": round(time.perf_counter() - t0, 3),
+        "metrics": ingestor.metrics(),
+        "last_batches": ingestor.batches[-5:],
+        "visibility": check_visible(db_path, ingestor.last_batch_cases) if ingestor.last_batch_cases else None,
+    }
+
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    OUT_PATH.write_text(json.dumps(out, indent=2), encoding="utf-8")
+    print(json.dumps(out, indent=2))
+    print(f"\nWrote: {OUT_PATH}")
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Micro-batch spool files into raw + staging tables.")
+    parser.add_argument("--spool", type=Path, default=SPOOL_DIR)
+    parser.add_argument("--poll-seconds", type=float, default=POLL_SECONDS)
+    parser.add_argument("--idle-exit-seconds", type=float, default=None, help="stop after this long without new files")
+    parser.add_argument("--no-at-risk", action="store_true", help="skip the SLA at-risk queue")
+    args = parser.parse_args()
+
+    run(args.spool, args.poll_seconds, idle_exit_seconds=args.idle_exit_seconds, at_risk=not args.no_at_risk)
@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import duckdb
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# None: the published warehouse snapshot (src.warehouse.current_path), where every build writes run_history
+DB_PATH: Optional[str] = None
+OUT_PATH = Path("reports/run_summaries/telemetry_report.json")
+HISTORY_TABLE = "mart.run_history"
+
+# Steps started by one pipeline run share this id (src/warehouse.py sets it); a step run on its
+# own gets the id of its process.
+RUN_ID_ENV = "OPS_RUN_ID"
+_PROCESS_RUN_ID = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+STEP_SCOPE = "step"
+SAMPLE_SECONDS = 0.02
+
+# Regression report: latest record of each (step, scope) vs the median of the runs before it.
+DEFAULT_LAST_RUNS = 5
+REGRESSION_RATIO = 1.25
+# absolute floors so sub-second files and small allocations do not flag on noise
+MIN_DELTA = {"wall_seconds": 0.5, "cpu_seconds": 0.5, "peak_rss_mb": 50.0}
+
+HISTORY_DDL = f"""
+CREATE TABLE IF NOT EXISTS {HISTORY_TABLE} (
+  run_id VARCHAR,
+  git_commit VARCHAR,
+  recorded_at TIMESTAMP,
+  step VARCHAR,
+  scope VARCHAR,
+  wall_seconds DOUBLE,
+  user_cpu_seconds DOUBLE,
+  sys_cpu_seconds DOUBLE,
+  peak_rss_mb DOUBLE,
+  rows_in BIGINT,
+  rows_out BIGINT,
+  bytes_read BIGINT,
+  bytes_written BIGINT,
+  rows_per_second DOUBLE
+)
+"""
+HISTORY_COLUMNS = [
+    "run_id", "git_commit", "recorded_at", "step", "scope", "wall_seconds", "user_cpu_seconds",
+    "sys_cpu_seconds", "peak_rss_mb", "rows_in", "rows_out", "bytes_read", "bytes_written", "rows_per_second",
+]
+
+# warehouse layers, optionally prefixed (e.g. the sample_* schemas of src/sample_pipeline.py)
+_TABLE_NAME = r"(?:\w+_)?(?:raw|staging|mart)\.\w+"
+_TARGETS = re.compile(rf"CREATE\s+OR\s+REPLACE\s+(?:TEMP\s+)?(?:TABLE|VIEW)\s+({_TABLE_NAME})", re.I)
+_TABLES = re.compile(rf"\b({_TABLE_NAME})\b", re.I)
+
+
+def current_run_id() -> str:
+    return os.environ.get(RUN_ID_ENV) or _PROCESS_RUN_ID
+
+
+@lru_cache(maxsize=1)
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _max_rss_bytes() -> Optional[int]:
+    """Process lifetime high-water mark (fallback where /proc is unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _io_bytes() -> Dict[str, Optional[int]]:
+    # logical bytes through read/write syscalls (page-cache hits included); Linux only
+    try:
+        with open("/proc/self/io", encoding="ascii") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return {"read": int(fields["rchar"]), "written": int(fields["wchar"])}
+    except (OSError, KeyError, ValueError):
+        return {"read": None, "written": None}
+
+
+def _counters() -> Dict:
+    times = os.times()
+    return {"wall": time.perf_counter(), "user": times.user, "sys": times.system, "io": _io_bytes()}
+
+
+class _PeakRss:
+    """Samples RSS every SAMPLE_SECONDS on a daemon thread and keeps a peak per open scope."""
+
+    def __init__(self):
+        self._peaks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.sampling = _rss_bytes() is not None
+        if self.sampling:
+            threading.Thread(target=self._sample, daemon=True).start()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(SAMPLE_SECONDS):
+            self._observe()
+
+    def _observe(self) -> None:
+        rss = _rss_bytes() or 0
+        with self._lock:
+            for scope, peak in self._peaks.items():
+                if rss > peak:
+                    self._peaks[scope] = rss
+
+    def open(self, scope: str) -> None:
+        with self._lock:
+            self._peaks[scope] = _rss_bytes() or 0
+
+    def close(self, scope: str) -> Optional[int]:
+        if not self.sampling:
+            self._peaks.pop(scope, None)
+            return _max_rss_bytes()
+        self._observe()
+        with self._lock:
+            return self._peaks.pop(scope)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def _delta(start: Dict, end: Dict, key: str) -> Optional[int]:
+    a, b = start["io"][key], end["io"][key]
+    return None if a is None or b is None else b - a
+
+
+def _count(con: duckdb.DuckDBPyConnection, tables: List[str]) -> Optional[int]:
+    existing = {
+        f"{schema}.{name}"
+        for schema, name in con.execute(
+            "SELECT table_schema, table_name FROM information_schema.tables WHERE table_catalog = current_database()"
+        ).fetchall()
+    }
+    tables = [t for t in tables if t in existing]
+    if not tables:
+        return None
+    return sum(con.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in tables)
+
+
+def sql_tables(sql: str) -> Dict[str, List[str]]:
+    """Warehouse tables a SQL file reads ("in") and creates ("out"), by schema-qualified name."""
+    sql = re.sub(r"--[^\n]*", "", sql)
+    targets = sorted({t.lower() for t in _TARGETS.findall(sql)})
+    sources = sorted({t.lower() for t in _TABLES.findall(sql)} - set(targets))
+    return {"in": sources, "out": targets}
+
+
+class StepTelemetry:
+    """
+    Resource usage of one pipeline step and of each unit (SQL file, load, export) inside it:
+    wall time, user/sys CPU, peak RSS, rows in/out and bytes read/written. CPU and bytes are
+    process-wide deltas, so units should run one at a time (threaded units use `record`).
+    `finish` appends every record to mart.run_history.
+    """
+
+    def __init__(self, step: str, run_id: Optional[str] = None):
+        self.step = step
+        self.run_id = run_id or current_run_id()
+        self.records: Dict[str, Dict] = {}
+        self._rss = _PeakRss()
+        self._rss.open(STEP_SCOPE)
+        self._start = _counters()
+
+    def _measure(self, start: Dict, end: Dict, peak: Optional[int], rows_in: Optional[int], rows_out: Optional[int]) -> Dict:
+        wall = end["wall"] - start["wall"]
+        rows = rows_out if rows_out is not None else rows_in
+        return {
+            "wall_seconds": round(wall, 3),
+            "user_cpu_seconds": round(end["user"] - start["user"], 3),
+            "sys_cpu_seconds": round(end["sys"] - start["sys"], 3),
+            "peak_rss_mb": None if peak is None else round(peak / 2**20, 1),
+            "rows_in": rows_in,
+            "rows_out": rows_out,
+            "bytes_read": _delta(start, end, "read"),
+            "bytes_written": _delta(start, end, "written"),
+            "rows_per_second": round(rows / wall, 1) if rows and wall > 0 else None,
+        }
+
+    @contextmanager
+    def track(self, scope: str, con: Optional[duckdb.DuckDBPyConnection] = None, sql: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Measure the enclosed block as one unit. With a connection and the SQL it runs, rows in/out
+        are the row counts of the warehouse tables the SQL reads and creates.
+        The yielded dict is filled in on exit.
+        """
+        tables = sql_tables(sql) if sql is not None and con is not None else {"in": [], "out": []}
+        rows_in = _count(con, tables["in"]) if con is not None else None
+        record: Dict = {}
+        self._rss.open(scope)
+        start = _counters()
+        yield record
+        end = _counters()
+        peak = self._rss.close(scope)
+        rows_out = _count(con, tables["out"]) if con is not None else None
+        record.update(self._measure(start, end, peak, rows_in, rows_out))
+        self.records[scope] = record
+
+    def record(self, scope: str, **fields) -> None:
+        """Add a unit measured by the caller (e.g. one export of a thread pool)."""
+        self.records[scope] = {**dict.fromkeys(HISTORY_COLUMNS[5:]), **fields}
+
+    def finish(self, con: duckdb.DuckDBPyConnection, rows_in: Optional[int] = None, rows_out: Optional[int] = None) -> Dict:
+        """Close the step record, append all records to mart.run_history and return them."""
+        end = _counters()
+        peak = self._rss.close(STEP_SCOPE)
+        self._rss.stop()
+
+        def total(key: str) -> Optional[int]:
+            values = [r[key] for r in self.records.values() if r.get(key) is not None]
+            return sum(values) if values else None
+
+        step = self._measure(
+            self._start,
+            end,
+            peak,
+            rows_in if rows_in is not None else total("rows_in"),
+            rows_out if rows_out is not None else total("rows_out"),
+        )
+
+        recorded_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        head = [self.run_id, git_commit(), recorded_at, self.step]
+        rows = [head + [STEP_SCOPE] + [step[c] for c in HISTORY_COLUMNS[5:]]]
+        rows += [head + [scope] + [r[c] for c in HISTORY_COLUMNS[5:]] for scope, r in self.records.items()]
+        con.execute("CREATE SCHEMA IF NOT EXISTS mart")
+        con.execute(HISTORY_DDL)
+        con.executemany(f"INSERT INTO {HISTORY_TABLE} VALUES ({', '.join('?' for _ in HISTORY_COLUMNS)})", rows)
+
+        return {"run_id": self.run_id, "git_commit": git_commit(), "step": step, "by_file": self.records}
+
+
+REPORT_SQL = f"""
+WITH ranked AS (
+  SELECT
+    *,
+    ROUND(user_cpu_seconds + sys_cpu_seconds, 3) AS cpu_seconds,
+    ROW_NUMBER() OVER (PARTITION BY step, scope ORDER BY recorded_at DESC) AS run_rank
+  FROM {HISTORY_TABLE}
+),
+baseline AS (
+  SELECT
+    step,
+    scope,
+    COUNT(*) AS baseline_runs,
+    ROUND(MEDIAN(wall_seconds), 3) AS wall_seconds,
+    ROUND(MEDIAN(cpu_seconds), 3) AS cpu_seconds,
+    ROUND(MEDIAN(peak_rss_mb), 3) AS peak_rss_mb,
+    ROUND(MEDIAN(rows_per_second), 3) AS rows_per_second
+  FROM ranked
+  WHERE run_rank BETWEEN 2 AND ?
+  GROUP BY step, scope
+)
+SELECT
+  l.step,
+  l.scope,
+  l.run_id,
+  l.git_commit,
+  b.baseline_runs,
+  l.wall_seconds, b.wall_seconds AS baseline_wall_seconds,
+  l.cpu_seconds, b.cpu_seconds AS baseline_cpu_seconds,
+  l.peak_rss_mb, b.peak_rss_mb AS baseline_peak_rss_mb,
+  l.rows_per_second, b.rows_per_second AS baseline_rows_per_second
+FROM ranked l
+JOIN baseline b USING (step, scope)
+WHERE l.run_rank = 1
+ORDER BY l.step, l.scope
+"""
+
+
+def _regressions(row: Dict) -> List[str]:
+    flags = []
+    for metric, floor in MIN_DELTA.items():
+        latest, base = row[metric], row[f"baseline_{metric}"]
+        if latest is not None and base is not None and latest > base * REGRESSION_RATIO and latest - base > floor:
+            flags.append(metric)
+    latest, base = row["rows_per_second"], row["baseline_rows_per_second"]
+    if latest is not None and base and latest * REGRESSION_RATIO < base and row["wall_seconds"] > MIN_DELTA["wall_seconds"]:
+        flags.append("rows_per_second")
+    return flags
+
+
+def report(con: duckdb.DuckDBPyConnection, last_runs: int = DEFAULT_LAST_RUNS) -> List[Dict]:
+    """Latest record of every step / file vs the median of its previous last_runs - 1 records."""
+    cur = con.execute(REPORT_SQL, [last_runs])
+    names = [d[0] for d in cur.description]
+    rows = [dict(zip(names, r)) for r in cur.fetchall()]
+    for row in rows:
+        row["regressions"] = _regressions(row)
+    return rows
+
+
+def run(last_runs: int = DEFAULT_LAST_RUNS, db_path: Optional[str] = DB_PATH) -> Dict:
+    if db_path is None:
+        from src.warehouse import current_path  # src.warehouse imports this module
+
+        db_path = str(current_path())
+    con = duckdb.connect(db_path, read_only=True)
+    has_history = con.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE schema_name = 'mart' AND table_name = 'run_history'"
+    ).fetchone()[0]
+    rows = report(con, last_runs) if has_history else []
+    con.close()
+
+    out = {
+        "step": "telemetry_report",
+        "db_path": db_path,
+        "last_runs": last_runs,
+        "regression_ratio": REGRESSION_RATIO,
+        "compared": len(rows),
+        "regressions": [r for r in rows if r["regressions"]],
+        "by_scope": rows,
+    }
+
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    OUT_PATH.write_text(json.dumps(out, indent=2, default=str), encoding="utf-8")
+    print(json.dumps(out, indent=2, default=str))
+    print(f"\nWrote: {OUT_PATH}")
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare the latest step telemetry with earlier runs.")
+    parser.add_argument("--last", type=int, default=DEFAULT_LAST_RUNS, help="runs to consider per step / file (latest included)")
+    parser.add_argument("--db", default=DB_PATH, help="database file (default: published snapshot)")
+    args = parser.parse_args()
+
+    run(args.last, args.db)
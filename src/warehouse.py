@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import duckdb
+
+from src.telemetry import RUN_ID_ENV
+
+# Snapshot publishing: every pipeline run builds into its own database file and readers follow
+# the CURRENT pointer, which is swapped atomically (os.replace) only after all steps succeed.
+WAREHOUSE_DIR = Path("warehouse")
+BUILD_DIR = WAREHOUSE_DIR / "building"
+CURRENT_POINTER = WAREHOUSE_DIR / "CURRENT"
+LEGACY_DB_PATH = Path("ops_warehouse.duckdb")
+SNAPSHOT_PREFIX = "ops_warehouse_"
+KEEP_SNAPSHOTS = 3
+SCHEMAS = ("raw", "staging", "mart")
+
+# Step modules in run order; step 2 takes the generation mode, the rest expose run().
+PIPELINE_STEPS: Sequence[str] = (
+    "src.s2_generate_and_load",
+    "src.s3_raw_qa",
+    "src.s4_build_staging",
+    "src.s5_build_sla_engine",
+    "src.s6_build_marts",
+    "src.s7_driver_analysis",
+    "src.s8_scenario_modeling",
+    "src.s9_export_for_tableau",
+)
+
+
+def list_snapshots() -> List[Path]:
+    """Published snapshots, oldest first (names sort by build time)."""
+    return sorted(WAREHOUSE_DIR.glob(f"{SNAPSHOT_PREFIX}*.duckdb"))
+
+
+def current_path() -> Path:
+    """
+    Database readers and in-place writers (stream ingest, the at-risk, process-mining and timeline
+    entry points, CLI step runs) open: the published snapshot, or the legacy single file if none.
+    Writing there keeps incremental rows visible to readers and carries them into the next build.
+    """
+    if CURRENT_POINTER.exists():
+        return WAREHOUSE_DIR / CURRENT_POINTER.read_text(encoding="utf-8").strip()
+    return LEGACY_DB_PATH
+
+
+def _set_current(snapshot: Path) -> None:
+    tmp = CURRENT_POINTER.with_name(CURRENT_POINTER.name + ".tmp")
+    tmp.write_text(snapshot.name, encoding="utf-8")
+    os.replace(tmp, CURRENT_POINTER)
+
+
+def begin_build(fresh: bool = False) -> Path:
+    """
+    New unpublished database under warehouse/building/, seeded from the current snapshot unless
+    fresh (tables a run does not rebuild, e.g. optional step 8 outputs, carry over).
+    """
+    BUILD_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    build = BUILD_DIR / f"{SNAPSHOT_PREFIX}{stamp}.duckdb"
+    source = current_path()
+    if not fresh and source.exists():
+        shutil.copy2(source, build)
+        # commits a live writer has not checkpointed yet are only in the WAL
+        wal = Path(f"{source}.wal")
+        if wal.exists():
+            shutil.copy2(wal, Path(f"{build}.wal"))
+
+    con = duckdb.connect(str(build))
+    for schema in SCHEMAS:
+        con.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+    con.close()
+    return build
+
+
+def publish(build: Path, keep: int = KEEP_SNAPSHOTS) -> Path:
+    """Checkpoint the build, move it next to the other snapshots and swap CURRENT to it."""
+    con = duckdb.connect(str(build))
+    con.execute("CHECKPOINT")
+    con.close()
+
+    snapshot = WAREHOUSE_DIR / build.name
+    os.replace(build, snapshot)
+    _set_current(snapshot)
+    prune(keep)
+    return snapshot
+
+
+def prune(keep: int = KEEP_SNAPSHOTS) -> List[Path]:
+    """Delete all but the newest `keep` snapshots; the current one is never removed."""
+    current = current_path()
+    removed = []
+    for snapshot in list_snapshots()[:-keep] if keep > 0 else list_snapshots():
+        if snapshot == current:
+            continue
+        snapshot.unlink()
+        removed.append(snapshot)
+    return removed
+
+
+def rollback(snapshot_name: Optional[str] = None) -> Path:
+    """Point CURRENT at the given snapshot, or at the one published before the current one."""
+    snapshots = list_snapshots()
+    if snapshot_name is not None:
+        target = WAREHOUSE_DIR / snapshot_name
+        if target not in snapshots:
+            raise ValueError(f"Unknown snapshot: {snapshot_name}")
+    else:
+        current = current_path()
+        older = [s for s in snapshots if s < current]
+        if not older:
+            raise ValueError("No earlier snapshot to roll back to")
+        target = older[-1]
+    _set_current(target)
+    return target
+
+
+def run_step(module_name: str, db_path, mode: str = "full", **kwargs) -> None:
+    """
+    Run one pipeline step module against db_path: its module-level DB_PATH is swapped for the
+    duration of the call. Step 2 takes the generation mode, the rest run(**kwargs).
+    """
+    module = importlib.import_module(module_name)
+    original = module.DB_PATH
+    # steps keep their own DB_PATH type (step 2 uses a Path, the rest a str; None means current_path())
+    module.DB_PATH = str(db_path) if original is None else type(original)(db_path)
+    try:
+        if hasattr(module, "generate_and_load"):
+            module.generate_and_load(mode=mode)
+        else:
+            module.run(**kwargs)
+    finally:
+        module.DB_PATH = original
+
+
+def run_pipeline(
+    steps: Sequence[str] = PIPELINE_STEPS,
+    mode: str = "full",
+    keep: int = KEEP_SNAPSHOTS,
+    fresh: bool = False,
+) -> Dict:
+    """
+    Run the given steps against a new build and publish it only if every step succeeds.
+    A failed build is deleted; readers keep seeing the previous snapshot throughout.
+    """
+    t0 = time.perf_counter()
+    build = begin_build(fresh=fresh)
+    timings: Dict[str, float] = {}
+    # every step's telemetry lands under the build's name in mart.run_history
+    previous_run_id = os.environ.get(RUN_ID_ENV)
+    os.environ[RUN_ID_ENV] = build.stem
+    try:
+        for name in steps:
+            t1 = time.perf_counter()
+            run_step(name, build, mode=mode)
+            timings[name] = round(time.perf_counter() - t1, 3)
+    except BaseException:
+        for leftover in (build, Path(f"{build}.wal")):
+            leftover.unlink(missing_ok=True)
+        raise
+    finally:
+        if previous_run_id is None:
+            os.environ.pop(RUN_ID_ENV, None)
+        else:
+            os.environ[RUN_ID_ENV] = previous_run_id
+
+    snapshot = publish(build, keep=keep)
+    return {
+        "snapshot": str(snapshot),
+        "kept_snapshots": [s.name for s in list_snapshots()],
+        "runtime_seconds": {"by_step": timings, "end_to_end": round(time.perf_counter() - t0, 3)},
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build, publish and roll back warehouse snapshots.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_p = sub.add_parser("build", help="run the pipeline into a new snapshot and publish it")
+    build_p.add_argument("--mode", choices=["dev", "full"], default="full")
+    build_p.add_argument("--keep", type=int, default=KEEP_SNAPSHOTS)
+    build_p.add_argument("--fresh", action="store_true", help="start from an empty database")
+    build_p.add_argument("--steps", nargs="+", default=list(PIPELINE_STEPS), help="step modules to run, in order")
+    rollback_p = sub.add_parser("rollback", help="point CURRENT at an earlier snapshot")
+    rollback_p.add_argument("snapshot", nargs="?", default=None)
+    sub.add_parser("list", help="show snapshots and the current one")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print(json.dumps(run_pipeline(args.steps, mode=args.mode, keep=args.keep, fresh=args.fresh), indent=2))
+    elif args.command == "rollback":
+        print(f"CURRENT -> {rollback(args.snapshot)}")
+    else:
+        current = current_path()
+        for s in list_snapshots():
+            print(f"{'*' if s == current else ' '} {s.name}")